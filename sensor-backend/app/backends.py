@@ -0,0 +1,182 @@
+"""
+Inference backends for the semantic sensor API.
+The embedding model runs on PyTorch or on ONNX Runtime (optionally int8 dynamically quantized) behind one encode interface.
+"""
+
+import os
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from .store import normalize_rows
+
+BACKENDS = ("torch", "onnx")
+ONNX_QUANTIZATIONS = ("avx2", "avx512", "avx512_vnni", "arm64")
+
+# Texts embedded by both backends when checking that they agree
+PARITY_TEXTS = [
+    "The quick brown fox jumps over the lazy dog.",
+    "Customer address: 221B Baker Street, London",
+    "Please describe the damage to the vehicle in a few sentences.",
+    "Invoice total due within 30 days of receipt",
+    "Der Vertrag verlängert sich automatisch um ein Jahr.",
+    "short",
+    "Symptoms started three days ago with a mild fever and a persistent dry cough that got worse at night.",
+    "SKU-4471 blue, size M, returned unopened",
+]
+
+
+class InferenceBackend:
+    """A loaded embedding model together with the runtime executing it."""
+
+    def __init__(self, model, model_name: str, backend: str = "torch", quantization: Optional[str] = None):
+        """
+        Wrap a loaded model.
+
+        Args:
+            model: Object with a SentenceTransformer-compatible encode method
+            model_name: Model name or path it was loaded from
+            backend: Runtime executing the model (torch or onnx)
+            quantization: ONNX dynamic quantization config, if the model is quantized
+        """
+        self.model = model
+        self.model_name = model_name
+        self.backend = backend
+        self.quantization = quantization
+        self.parity: Optional[dict] = None
+
+    def encode(self, sentences, **kwargs):
+        """Encode one text or a list of texts, as SentenceTransformer.encode does."""
+        return self.model.encode(sentences, **kwargs)
+
+    @property
+    def tokenizer(self):
+        """The model's tokenizer, if it exposes one."""
+        return getattr(self.model, "tokenizer", None)
+
+    @property
+    def max_seq_length(self) -> Optional[int]:
+        """Longest input in tokens, including special tokens; longer inputs are truncated by the model."""
+        return getattr(self.model, "max_seq_length", None)
+
+    def describe(self) -> dict:
+        """
+        Backend identity and parity check outcome.
+
+        Returns:
+            dict: Model name, backend, quantization config and parity result
+        """
+        return {
+            "model": self.model_name,
+            "backend": self.backend,
+            "quantization": self.quantization,
+            "parity": self.parity,
+        }
+
+
+def _sentence_transformer(*args, **kwargs):
+    # sentence_transformers imports torch, which takes seconds; only pay for it when a model is loaded
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(*args, **kwargs)
+
+
+def _export_dir(export_root: str, model_name: str) -> str:
+    return os.path.join(export_root, model_name.replace("/", "__") + "-onnx")
+
+
+def _load_onnx(model_name: str, quantization: Optional[str], export_root: str):
+    # CPU-only nodes: pin the provider rather than probing for accelerators
+    model_kwargs = {"provider": "CPUExecutionProvider"}
+    if not quantization:
+        return _sentence_transformer(model_name, backend="onnx", model_kwargs=model_kwargs)
+
+    # Quantized weights are exported once next to the ONNX model and reused on later starts
+    export_dir = _export_dir(export_root, model_name)
+    file_name = f"onnx/model_qint8_{quantization}.onnx"
+    if not os.path.exists(os.path.join(export_dir, file_name)):
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+
+        print(f"Exporting int8 dynamically quantized ONNX model ({quantization}) to {export_dir}")
+        model = _sentence_transformer(model_name, backend="onnx", model_kwargs=model_kwargs)
+        model.save(export_dir)
+        export_dynamic_quantized_onnx_model(model, quantization, export_dir)
+    return _sentence_transformer(export_dir, backend="onnx", model_kwargs={**model_kwargs, "file_name": file_name})
+
+
+def load_backend(
+    model_name: str,
+    backend: str = "torch",
+    quantization: Optional[str] = None,
+    export_root: str = "models",
+) -> InferenceBackend:
+    """
+    Load the embedding model on the requested runtime.
+
+    Args:
+        model_name: Sentence-transformers model name or local path
+        backend: torch or onnx
+        quantization: ONNX dynamic quantization config (avx2, avx512, avx512_vnni, arm64); ignored for torch
+        export_root: Directory receiving exported quantized ONNX models
+
+    Returns:
+        InferenceBackend: The loaded model
+
+    Raises:
+        ValueError: If the backend or quantization config is unknown
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend {backend!r}, expected one of {', '.join(BACKENDS)}")
+    if backend == "torch":
+        return InferenceBackend(_sentence_transformer(model_name), model_name, "torch")
+
+    if quantization and quantization not in ONNX_QUANTIZATIONS:
+        raise ValueError(
+            f"Unknown ONNX quantization {quantization!r}, expected one of {', '.join(ONNX_QUANTIZATIONS)}"
+        )
+    return InferenceBackend(_load_onnx(model_name, quantization, export_root), model_name, "onnx", quantization or None)
+
+
+def check_parity(reference, candidate, tolerance: float, texts: Optional[List[str]] = None) -> dict:
+    """
+    Compare the embeddings of two models on the same texts.
+
+    Args:
+        reference: Trusted model (normally the PyTorch one)
+        candidate: Model that should reproduce the reference embeddings
+        tolerance: Lowest acceptable cosine similarity between the two embeddings of a text
+        texts: Texts to embed (a built-in mix of lengths and languages by default)
+
+    Returns:
+        dict: Minimum and mean cosine similarity, the tolerance and whether it was met
+    """
+    texts = texts or PARITY_TEXTS
+    expected = normalize_rows(reference.encode(texts, batch_size=len(texts)))
+    actual = normalize_rows(candidate.encode(texts, batch_size=len(texts)))
+    cosines = np.sum(expected * actual, axis=1)
+    return {
+        "texts": len(texts),
+        "min_cosine": round(float(cosines.min()), 6),
+        "mean_cosine": round(float(cosines.mean()), 6),
+        "tolerance": tolerance,
+        "passed": bool(cosines.min() >= tolerance),
+    }
+
+
+def warm_up(model, batch_size: int = 32) -> float:
+    """
+    Encode a dummy batch and a single text, so the first requests do not pay for lazy initialization.
+
+    Args:
+        model: Loaded model
+        batch_size: Size of the dummy batch, normally the paragraph batch size
+
+    Returns:
+        float: Seconds spent
+    """
+    texts = (PARITY_TEXTS * (batch_size // len(PARITY_TEXTS) + 1))[:max(1, batch_size)]
+    start = time.perf_counter()
+    model.encode(texts, batch_size=len(texts))
+    model.encode(texts[:1], batch_size=1)
+    return time.perf_counter() - start
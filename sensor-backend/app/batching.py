@@ -0,0 +1,167 @@
+"""
+Cross-request micro-batching for query encoding.
+Concurrent similarity checks are gathered into one batched model call instead of many batch-of-1 calls.
+"""
+
+import asyncio
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .inference import InferenceExecutor
+from .metrics import QUERY_BATCH_SIZE
+
+
+class MicroBatcher:
+    """Collects query texts from concurrent requests and encodes them together."""
+
+    def __init__(
+        self,
+        encode_batch: Callable[[List[str]], np.ndarray],
+        executor: InferenceExecutor,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+    ):
+        """
+        Initialize the micro-batcher.
+
+        Args:
+            encode_batch: Blocking function encoding a list of texts into a matrix (one row per text)
+            executor: Executor the batched encode calls run on
+            max_batch_size: Largest number of texts encoded in one call
+            max_wait_ms: Longest time the first text of a batch waits for company
+        """
+        self.encode_batch = encode_batch
+        self.executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closed = False
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._filled: Optional[asyncio.Event] = None
+
+        self._batches = 0
+        self._items = 0
+        self._largest_batch = 0
+
+    def stats(self) -> dict:
+        """
+        Snapshot of batching configuration and activity.
+
+        Returns:
+            dict: Knobs, queue depth and batch size counters
+        """
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self._batches,
+            "items": self._items,
+            "largest_batch": self._largest_batch,
+            "average_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+        }
+
+    def _ensure_started(self) -> None:
+        # The queue and worker belong to the running loop, so they are created on first use
+        if self._worker is None or self._worker.done():
+            self._loop = asyncio.get_running_loop()
+            self._queue = asyncio.Queue()
+            # One batch in flight per inference thread; texts arriving meanwhile form the next batch
+            self._slots = asyncio.Semaphore(self.executor.max_workers)
+            self._filled = asyncio.Event()
+            self._worker = asyncio.ensure_future(self._collect())
+
+    async def encode(self, text: str) -> np.ndarray:
+        """
+        Encode one text as part of the next batch.
+
+        Args:
+            text: Validated query text
+
+        Returns:
+            np.ndarray: The text's embedding row
+        """
+        if self._closed:
+            # Callers that picked this batcher before it was replaced are encoded one call each
+            return (await self.executor.run(self.encode_batch, [text]))[0]
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((text, future))
+        if self._queue.qsize() >= self.max_batch_size - 1:
+            self._filled.set()
+        return await future
+
+    def close(self) -> None:
+        """Stop the collecting task once the texts already queued are encoded; safe to call from any thread."""
+        self._closed = True
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._stop)
+
+    def _stop(self) -> None:
+        # None marks the end of the queue for the collecting task
+        if self._worker is not None and not self._worker.done():
+            self._queue.put_nowait(None)
+            self._filled.set()
+
+    async def _collect(self) -> None:
+        while True:
+            await self._slots.acquire()
+            first = await self._queue.get()
+            if first is None:
+                self._slots.release()
+                return
+            batch = [first]
+
+            # Give other requests up to max_wait_ms to join, unless the batch is already full
+            if self._queue.qsize() < self.max_batch_size - 1 and self.max_wait_ms > 0:
+                self._filled.clear()
+                try:
+                    await asyncio.wait_for(self._filled.wait(), self.max_wait_ms / 1000)
+                except asyncio.TimeoutError:
+                    pass
+
+            closing = False
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+
+            asyncio.ensure_future(self._flush(batch))
+            if closing:
+                return
+
+    async def _flush(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        try:
+            # Waiters whose request was cancelled no longer need an embedding
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                return
+
+            # Identical texts in one batch are encoded once
+            rows: Dict[str, int] = {}
+            for text, _ in batch:
+                rows.setdefault(text, len(rows))
+
+            self._batches += 1
+            self._items += len(batch)
+            self._largest_batch = max(self._largest_batch, len(batch))
+            QUERY_BATCH_SIZE.observe(len(batch))
+
+            try:
+                embeddings = await self.executor.run(self.encode_batch, list(rows))
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            for text, future in batch:
+                if not future.done():
+                    future.set_result(embeddings[rows[text]])
+        finally:
+            self._slots.release()
@@ -0,0 +1,155 @@
+"""
+Query embedding cache for the semantic sensor API.
+Repeated similarity checks with the same text reuse the embedding instead of running the model again.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+
+def normalize_query_text(text: str) -> str:
+    """
+    Canonical form of a query used for cache keys.
+
+    Only whitespace is collapsed, which never changes how the tokenizer splits the text.
+
+    Args:
+        text: Query text
+
+    Returns:
+        str: Text with runs of whitespace replaced by single spaces
+    """
+    return " ".join(text.split())
+
+
+class EmbeddingCache:
+    """Bounded LRU cache of query embeddings, keyed by text hash and model identity."""
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached embeddings (0 disables the cache)
+            max_bytes: Maximum memory held by cached embeddings
+        """
+        self.max_entries = max(0, max_entries)
+        self.max_bytes = max(0, max_bytes)
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self._model = None
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def bind_model(self, model) -> None:
+        """
+        Associate the cache with a model, dropping every entry made by a previous one.
+
+        Args:
+            model: The model whose embeddings will be cached
+        """
+        with self._lock:
+            if model is self._model:
+                return
+            self._model = model
+            self._generation += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def _key(self, text: str) -> str:
+        digest = hashlib.sha1(normalize_query_text(text).encode("utf-8")).hexdigest()
+        return f"{self._generation}:{digest}"
+
+    def get(self, text: str, count: bool = True, model=None) -> Optional[np.ndarray]:
+        """
+        Look up the embedding of a query text.
+
+        Args:
+            text: Query text
+            count: Whether the lookup is recorded in the hit/miss counters
+            model: Model the caller encodes with; a lookup for any other model misses
+
+        Returns:
+            Optional[np.ndarray]: The cached embedding, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            if model is not None and model is not self._model:
+                return None
+            key = self._key(text)
+            embedding = self._entries.get(key)
+            if embedding is None:
+                if count:
+                    self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if count:
+                self.hits += 1
+            return embedding
+
+    def put(self, text: str, embedding: np.ndarray, model=None) -> None:
+        """
+        Store the embedding of a query text, evicting least recently used entries as needed.
+
+        Args:
+            text: Query text
+            embedding: Its embedding
+            model: Model that produced the embedding; embeddings of any other model are dropped
+        """
+        if not self.enabled or embedding.nbytes > self.max_bytes:
+            return
+        embedding = np.array(embedding, copy=True)
+        embedding.setflags(write=False)
+        with self._lock:
+            if model is not None and model is not self._model:
+                return
+            key = self._key(text)
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._entries[key] = embedding
+            self._bytes += embedding.nbytes
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every cached embedding."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Snapshot of cache size and effectiveness.
+
+        Returns:
+            dict: Entry and memory usage, limits, hit/miss/eviction counters and hit rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
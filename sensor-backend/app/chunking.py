@@ -0,0 +1,160 @@
+"""
+Token-aware chunking for the semantic sensor API.
+Paragraphs longer than the model's sequence length become overlapping token windows, and short lines can be merged.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+# Token budget taken by the special tokens the model adds around every sequence ([CLS] ... [SEP])
+SPECIAL_TOKENS = 2
+
+Span = Tuple[int, int]
+_WORD = re.compile(r"\S+")
+
+
+class Chunker:
+    """Turns the paragraphs of a sensor into the texts that are embedded, remembering their source paragraphs."""
+
+    def __init__(self, tokenizer=None, max_tokens: int = 254, overlap_tokens: int = 32, min_tokens: int = 0):
+        """
+        Initialize a chunker.
+
+        Args:
+            tokenizer: Hugging Face tokenizer of the model; without one, whitespace-separated words count as tokens
+            max_tokens: Longest chunk in tokens, excluding special tokens
+            overlap_tokens: Tokens shared by consecutive windows of a split paragraph
+            min_tokens: Consecutive paragraphs shorter than this are merged into one chunk (0 disables merging)
+        """
+        self.tokenizer = tokenizer
+        self.max_tokens = max(1, max_tokens)
+        self.overlap_tokens = min(max(0, overlap_tokens), self.max_tokens - 1)
+        self.min_tokens = min(max(0, min_tokens), self.max_tokens)
+
+    @classmethod
+    def for_model(cls, model, max_tokens: int = 0, overlap_tokens: int = 32, min_tokens: int = 0) -> "Chunker":
+        """
+        Chunker matching a model's tokenizer and maximum sequence length.
+
+        Args:
+            model: Loaded model (its tokenizer and max_seq_length are used when present)
+            max_tokens: Longest chunk in tokens; 0 or more than the model accepts means the model's limit
+            overlap_tokens: Tokens shared by consecutive windows of a split paragraph
+            min_tokens: Merge consecutive paragraphs shorter than this (0 disables merging)
+
+        Returns:
+            Chunker: The chunker
+        """
+        tokenizer = getattr(model, "tokenizer", None)
+        limit = getattr(model, "max_seq_length", None)
+        if isinstance(limit, int) and limit > SPECIAL_TOKENS:
+            limit -= SPECIAL_TOKENS
+            max_tokens = limit if max_tokens <= 0 else min(max_tokens, limit)
+        elif max_tokens <= 0:
+            max_tokens = 254
+        return cls(tokenizer, max_tokens, overlap_tokens, min_tokens)
+
+    def token_spans(self, texts: List[str]) -> List[List[Span]]:
+        """
+        Character span of every token of each text.
+
+        Args:
+            texts: Texts to tokenize
+
+        Returns:
+            List[List[Span]]: (start, end) character offsets per token, per text
+        """
+        if self.tokenizer is not None:
+            try:
+                encoded = self.tokenizer(
+                    texts, add_special_tokens=False, return_offsets_mapping=True, truncation=False, verbose=False
+                )
+                return [[(start, end) for start, end in offsets] for offsets in encoded["offset_mapping"]]
+            except (NotImplementedError, KeyError, TypeError, ValueError):
+                # Slow (pure Python) tokenizers cannot report offsets
+                pass
+        return [[match.span() for match in _WORD.finditer(text)] for text in texts]
+
+    def chunk(self, paragraphs: List[str]) -> Tuple[List[str], Optional[List[Span]]]:
+        """
+        Split and merge paragraphs into chunks of at most max_tokens tokens.
+
+        Args:
+            paragraphs: Paragraph texts of one sensor
+
+        Returns:
+            Tuple[List[str], Optional[List[Span]]]: Chunk texts, and the (first, last) paragraph each chunk
+                comes from; None when every paragraph is exactly one chunk
+        """
+        # A token covers at least one character, so short paragraphs need no tokenizing unless merging
+        if self.min_tokens:
+            pending = list(range(len(paragraphs)))
+        else:
+            pending = [i for i, paragraph in enumerate(paragraphs) if len(paragraph) > self.max_tokens]
+        spans = dict(zip(pending, self.token_spans([paragraphs[i] for i in pending]))) if pending else {}
+        if all(len(spans.get(i, ())) <= self.max_tokens for i in pending) and not self.min_tokens:
+            return list(paragraphs), None
+
+        chunks: List[str] = []
+        sources: List[Span] = []
+        group: List[int] = []
+        group_tokens = 0
+
+        def flush_group() -> None:
+            nonlocal group, group_tokens
+            if group:
+                chunks.append("\n".join(paragraphs[i] for i in group))
+                sources.append((group[0], group[-1]))
+            group, group_tokens = [], 0
+
+        for i, paragraph in enumerate(paragraphs):
+            tokens = spans.get(i)
+            count = len(tokens) if tokens is not None else self.max_tokens
+            if count > self.max_tokens:
+                flush_group()
+                for text in self._windows(paragraph, tokens):
+                    chunks.append(text)
+                    sources.append((i, i))
+            elif count >= self.min_tokens:
+                flush_group()
+                chunks.append(paragraph)
+                sources.append((i, i))
+            else:
+                if group_tokens + count > self.max_tokens:
+                    flush_group()
+                group.append(i)
+                group_tokens += count
+                if group_tokens >= self.min_tokens:
+                    flush_group()
+        flush_group()
+
+        if len(chunks) == len(paragraphs) and all(first == last == i for i, (first, last) in enumerate(sources)):
+            return chunks, None
+        return chunks, sources
+
+    def _windows(self, text: str, tokens: List[Span]) -> List[str]:
+        # Overlapping windows of max_tokens tokens, cut at token boundaries of the original text;
+        # the last window ends at the last token, so it is full length rather than a short tail
+        step = self.max_tokens - self.overlap_tokens
+        windows = []
+        start = 0
+        while True:
+            end = start + self.max_tokens
+            windows.append(text[tokens[start][0]:tokens[end - 1][1]].strip())
+            if end >= len(tokens):
+                return windows
+            start = min(start + step, len(tokens) - self.max_tokens)
+
+    def describe(self) -> dict:
+        """
+        Chunking settings.
+
+        Returns:
+            dict: Token limits and whether the model's tokenizer is used
+        """
+        return {
+            "max_tokens": self.max_tokens,
+            "overlap_tokens": self.overlap_tokens,
+            "min_tokens": self.min_tokens,
+            "tokenizer": type(self.tokenizer).__name__ if self.tokenizer is not None else "whitespace",
+        }
@@ -0,0 +1,166 @@
+"""
+Runtime configuration for the semantic sensor API.
+Settings are read from environment variables (a local .env file is honoured).
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting, falling back to the default when unset or invalid."""
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        print(f"Invalid value for {name}: {value!r}, using default {default}")
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float setting, falling back to the default when unset or invalid."""
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        print(f"Invalid value for {name}: {value!r}, using default {default}")
+        return default
+
+
+def _env_choice(name: str, default: str, choices: tuple) -> str:
+    """Read a setting restricted to a few values, falling back to the default when unset or invalid."""
+    value = os.getenv(name, "").strip().lower()
+    if not value:
+        return default
+    if value not in choices:
+        print(f"Invalid value for {name}: {value!r}, using default {default}")
+        return default
+    return value
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean setting (1/true/yes/on), falling back to the default when unset."""
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_sizes_mb(name: str) -> dict:
+    """Read a "key=megabytes,..." setting as bytes per key, skipping invalid entries."""
+    sizes = {}
+    for entry in os.getenv(name, "").split(","):
+        key, _, value = entry.partition("=")
+        if not entry.strip():
+            continue
+        try:
+            sizes[key.strip()] = max(0, int(float(value) * 1024 * 1024))
+        except ValueError:
+            print(f"Invalid entry in {name}: {entry.strip()!r}, ignoring it")
+    return sizes
+
+
+# Sentence-transformers model name or local path
+MODEL_NAME = os.getenv("MODEL_NAME", "all-MiniLM-L6-v2").strip() or "all-MiniLM-L6-v2"
+
+# Runtime executing the model: torch, or onnx (ONNX Runtime on CPU)
+INFERENCE_BACKEND = _env_choice("INFERENCE_BACKEND", "torch", ("torch", "onnx"))
+
+# int8 dynamic quantization of the ONNX model for the CPU's instruction set (empty keeps float weights)
+ONNX_QUANTIZATION = _env_choice("ONNX_QUANTIZATION", "", ("avx2", "avx512", "avx512_vnni", "arm64"))
+
+# Directory receiving quantized ONNX exports, reused on later starts
+ONNX_EXPORT_DIR = os.getenv("ONNX_EXPORT_DIR", "models").strip() or "models"
+
+# Compare a non-torch backend's embeddings with PyTorch at load time, falling back to PyTorch below the tolerance
+BACKEND_PARITY_CHECK = _env_bool("BACKEND_PARITY_CHECK", True)
+BACKEND_PARITY_TOLERANCE = _env_float("BACKEND_PARITY_TOLERANCE", 0.99)
+
+# Number of paragraphs sent to the model in a single encode call
+EMBED_BATCH_SIZE = max(1, _env_int("EMBED_BATCH_SIZE", 32))
+
+# Threads running blocking model calls off the event loop
+INFERENCE_WORKERS = max(1, _env_int("INFERENCE_WORKERS", 1))
+
+# Inference jobs allowed to wait for a free worker before requests are rejected
+INFERENCE_QUEUE_SIZE = max(0, _env_int("INFERENCE_QUEUE_SIZE", 64))
+
+# Seconds sent in the Retry-After header when the inference queue is full
+INFERENCE_RETRY_AFTER = max(1, _env_int("INFERENCE_RETRY_AFTER", 1))
+
+# Intra-op threads used by torch (0 keeps the torch default)
+TORCH_NUM_THREADS = _env_int("TORCH_NUM_THREADS", 0)
+
+# Micro-batching of similarity queries: largest batch and longest wait for a batch to fill
+QUERY_BATCH_MAX_SIZE = max(1, _env_int("QUERY_BATCH_MAX_SIZE", 32))
+QUERY_BATCH_MAX_WAIT_MS = max(0, _env_int("QUERY_BATCH_MAX_WAIT_MS", 5))
+
+# LRU cache of query embeddings: entry and memory limits (0 disables)
+QUERY_CACHE_SIZE = max(0, _env_int("QUERY_CACHE_SIZE", 10000))
+QUERY_CACHE_MAX_MB = max(0, _env_int("QUERY_CACHE_MAX_MB", 64))
+
+# Cross-sensor search: indexed paragraphs from which IVF replaces exact search, and lists probed per query
+SEARCH_ANN_MIN_ROWS = max(1, _env_int("SEARCH_ANN_MIN_ROWS", 20000))
+SEARCH_IVF_NPROBE = max(1, _env_int("SEARCH_IVF_NPROBE", 16))
+
+# Directory of the on-disk embedding snapshot (empty keeps sensors in memory only)
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "").strip()
+
+# Journal records below which the snapshot is never compacted
+SNAPSHOT_COMPACT_MIN_RECORDS = max(1, _env_int("SNAPSHOT_COMPACT_MIN_RECORDS", 10000))
+
+# Whether several worker processes share the snapshot directory (e.g. uvicorn --workers N)
+SNAPSHOT_SHARED = _env_bool("SNAPSHOT_SHARED", False)
+
+# Pause between re-embedding steps of a background model reload, leaving the model to request traffic
+RELOAD_PAUSE_MS = max(0, _env_int("RELOAD_PAUSE_MS", 10))
+
+# Storage precision of paragraph embeddings: float32, float16 (half the memory) or int8 (a quarter,
+# with the best candidates re-scored from full-precision rows that the kernel may page out)
+STORAGE_PRECISION = _env_choice("STORAGE_PRECISION", "float32", ("float32", "float16", "int8"))
+
+# Candidates re-scored at full precision per result when STORAGE_PRECISION is int8
+RERANK_CANDIDATES = max(1, _env_int("RERANK_CANDIDATES", 16))
+
+# Streaming NDJSON ingest: sensors created per pipelined batch, and the longest accepted line in bytes
+INGEST_BATCH_SIZE = max(1, _env_int("INGEST_BATCH_SIZE", 64))
+INGEST_MAX_LINE_BYTES = max(1024, _env_int("INGEST_MAX_LINE_BYTES", 131072))
+
+# SQLite file receiving the similarity check history (empty, the default, disables it), written behind the requests:
+# queued records before the drop policy applies, flush interval, records per insert, and whether a full
+# queue discards new records (drop_newest) or the oldest queued ones (drop_oldest)
+HISTORY_DB = os.getenv("HISTORY_DB", "").strip()
+HISTORY_QUEUE_SIZE = max(1, _env_int("HISTORY_QUEUE_SIZE", 10000))
+HISTORY_FLUSH_INTERVAL_MS = max(0, _env_int("HISTORY_FLUSH_INTERVAL_MS", 1000))
+HISTORY_BATCH_SIZE = max(1, _env_int("HISTORY_BATCH_SIZE", 500))
+HISTORY_DROP_POLICY = _env_choice("HISTORY_DROP_POLICY", "drop_newest", ("drop_newest", "drop_oldest"))
+
+# Token-aware chunking: longest embedded chunk in tokens (0 uses the model's max sequence length), tokens
+# shared by the windows of a split paragraph, and the length below which consecutive lines are merged (0 never merges)
+CHUNK_MAX_TOKENS = max(0, _env_int("CHUNK_MAX_TOKENS", 0))
+CHUNK_OVERLAP_TOKENS = max(0, _env_int("CHUNK_OVERLAP_TOKENS", 32))
+CHUNK_MIN_TOKENS = max(0, _env_int("CHUNK_MIN_TOKENS", 0))
+
+# Worker processes encoding bulk sensor creation, each loading its own model (0 encodes in the serving process),
+# torch threads per worker, and the fewest new paragraphs in one bulk call worth sending to them
+ENCODER_PROCESSES = max(0, _env_int("ENCODER_PROCESSES", 0))
+ENCODER_THREADS_PER_PROCESS = max(1, _env_int("ENCODER_THREADS_PER_PROCESS", 1))
+ENCODER_POOL_MIN_TEXTS = max(1, _env_int("ENCODER_POOL_MIN_TEXTS", 256))
+
+# Lexical fast path of similarity checks: inputs repeating a stored paragraph (same text up to case and whitespace)
+# are answered without the model
+LEXICAL_FAST_PATH = _env_bool("LEXICAL_FAST_PATH", True)
+
+# Memory budgets of sensor namespaces (the nameId prefix before ':', "default" without one): resident embedding
+# megabytes per namespace (0 is unlimited), overrides as "acme=64,globex=16", and the directory receiving the
+# embeddings of least recently used sensors evicted from a namespace over budget
+NAMESPACE_MEMORY_MB = max(0.0, _env_float("NAMESPACE_MEMORY_MB", 0))
+NAMESPACE_BUDGETS = _env_sizes_mb("NAMESPACE_BUDGETS")
+EVICTION_DIR = os.getenv("EVICTION_DIR", "data/evicted").strip() or "data/evicted"
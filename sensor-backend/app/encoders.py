@@ -0,0 +1,247 @@
+"""
+Multi-process paragraph encoding for bulk sensor creation.
+Worker processes each load their own copy of the model and write embeddings straight into shared memory.
+"""
+
+import math
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import List, Optional
+
+import numpy as np
+
+# Model of the current worker process, loaded once by the pool initializer
+_worker_model = None
+
+
+def _init_worker(model_name: str, backend: str, quantization: Optional[str], export_root: str, num_threads: int) -> None:
+    global _worker_model
+    from .backends import load_backend
+    from .inference import configure_torch_threads
+
+    # Every process gets a fixed share of the cores instead of all of them fighting over every core
+    configure_torch_threads(num_threads)
+    _worker_model = load_backend(model_name, backend, quantization, export_root)
+
+
+def _dimension() -> int:
+    return int(np.asarray(_worker_model.encode(["dimension probe"])).shape[-1])
+
+
+def _encode_shard(shm_name: str, offset: int, dim: int, texts: List[str], batch_size: int) -> int:
+    # Only the row count travels back; the embeddings are written into the caller's buffer
+    vectors = np.asarray(_worker_model.encode(texts, batch_size=batch_size), dtype=np.float32)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray((len(texts), dim), dtype=np.float32, buffer=shm.buf, offset=offset * dim * 4)
+        out[:] = vectors
+        del out
+    finally:
+        shm.close()
+    return len(texts)
+
+
+class EncoderPool:
+    """Pool of encoder processes, each with its own model, for large batches of paragraphs."""
+
+    def __init__(
+        self,
+        model_name: str,
+        backend: str = "torch",
+        quantization: Optional[str] = None,
+        export_root: str = "models",
+        processes: int = 2,
+        threads_per_process: int = 1,
+        batch_size: int = 32,
+        shards_per_process: int = 4,
+        min_texts: int = 256,
+    ):
+        """
+        Describe a pool; no process is started until start() or the first encode.
+
+        Args:
+            model_name: Model name or path every worker loads
+            backend: Runtime of the workers' model (torch or onnx)
+            quantization: ONNX dynamic quantization config, if any
+            export_root: Directory of exported quantized ONNX models
+            processes: Number of worker processes
+            threads_per_process: torch intra-op threads of each worker
+            batch_size: Paragraphs per model encode call inside a worker
+            shards_per_process: Shards per worker in one encode, so faster workers pick up more of them
+            min_texts: Fewest paragraphs worth sending to the pool; smaller batches are cheaper in process
+        """
+        self.model_name = model_name
+        self.backend = backend
+        self.quantization = quantization
+        self.export_root = export_root
+        self.processes = max(1, processes)
+        self.threads_per_process = max(1, threads_per_process)
+        self.batch_size = max(1, batch_size)
+        self.shards_per_process = max(1, shards_per_process)
+        self.min_texts = max(1, min_texts)
+        # Loaded model the workers reproduce, when the pool was made for one
+        self.source = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._dim: Optional[int] = None
+        self._lock = threading.Lock()
+
+        self.encodes = 0
+        self.texts = 0
+        self.shards = 0
+        self.restarts = 0
+
+    @classmethod
+    def for_model(cls, model, **kwargs) -> "EncoderPool":
+        """
+        Pool whose workers load the same model, on the same backend, as a loaded InferenceBackend.
+
+        Args:
+            model: Loaded model of the serving process
+            **kwargs: Other EncoderPool settings
+
+        Returns:
+            EncoderPool: The pool, serving only that model instance
+        """
+        pool = cls(model.model_name, model.backend, model.quantization, **kwargs)
+        pool.source = model
+        return pool
+
+    def serves(self, model) -> bool:
+        """
+        Whether this pool's workers produce the embeddings of a model, e.g. not after a reload.
+
+        A pool made for a loaded model only serves that instance: a reload under the same name may have
+        picked up new weights the workers never loaded.
+
+        Args:
+            model: Model of a service
+
+        Returns:
+            bool: True when the pool can encode for it
+        """
+        if self.source is not None:
+            return model is self.source
+        return (
+            getattr(model, "model_name", None) == self.model_name
+            and getattr(model, "backend", None) == self.backend
+            and getattr(model, "quantization", None) == self.quantization
+        )
+
+    def start(self) -> None:
+        """Start the worker processes and have them load the model in the background."""
+        with self._lock:
+            executor = self._ensure_executor()
+        # One task per worker makes the pool start all of them now rather than on demand
+        for _ in range(self.processes):
+            executor.submit(_dimension)
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that has loaded torch and started threads is not safe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(
+                    self.model_name, self.backend, self.quantization, self.export_root, self.threads_per_process
+                ),
+            )
+        return self._executor
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode paragraphs across the worker processes (blocking).
+
+        Paragraphs are sorted by length and split into contiguous shards, so each model batch carries
+        little padding. Results are returned in the original order.
+
+        Args:
+            texts: Paragraph texts
+
+        Returns:
+            np.ndarray: float32 matrix of shape (len(texts), dim)
+
+        Raises:
+            BrokenProcessPool: If a worker died; the pool is restarted on the next call
+            Exception: Whatever the model raised in a worker
+        """
+        if not texts:
+            return np.empty((0, self._dim or 0), dtype=np.float32)
+        with self._lock:
+            executor = self._ensure_executor()
+        try:
+            if self._dim is None:
+                self._dim = executor.submit(_dimension).result()
+            dim = self._dim
+
+            order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+            shard_size = max(self.batch_size, math.ceil(len(texts) / (self.processes * self.shards_per_process)))
+            shm = shared_memory.SharedMemory(create=True, size=len(texts) * dim * 4)
+            try:
+                futures = [
+                    executor.submit(
+                        _encode_shard, shm.name, start, dim,
+                        [texts[i] for i in order[start:start + shard_size]], self.batch_size
+                    )
+                    for start in range(0, len(texts), shard_size)
+                ]
+                # Every shard must be done with the buffer before it is released, even if one failed
+                wait(futures)
+                for future in futures:
+                    future.result()
+                sorted_vectors = np.ndarray((len(texts), dim), dtype=np.float32, buffer=shm.buf)
+                vectors = np.empty_like(sorted_vectors)
+                vectors[order] = sorted_vectors
+                del sorted_vectors
+            finally:
+                shm.close()
+                shm.unlink()
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise
+
+        self.encodes += 1
+        self.texts += len(texts)
+        self.shards += len(futures)
+        return vectors
+
+    def _discard(self, executor: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                self.restarts += 1
+        executor.shutdown(wait=False)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the worker processes.
+
+        Args:
+            wait: Block until running shards are done and the workers have exited
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def stats(self) -> dict:
+        """
+        Snapshot of pool settings and work done.
+
+        Returns:
+            dict: Process and thread counts, whether workers are running, and encode, text, shard and restart counts
+        """
+        return {
+            "model": self.model_name,
+            "processes": self.processes,
+            "threads_per_process": self.threads_per_process,
+            "min_texts": self.min_texts,
+            "running": self._executor is not None,
+            "encodes": self.encodes,
+            "texts": self.texts,
+            "shards": self.shards,
+            "restarts": self.restarts,
+        }
@@ -0,0 +1,195 @@
+"""
+Write-behind history of similarity checks for the semantic sensor API.
+Results are queued in memory by the request and written to SQLite in batches by a background task.
+"""
+
+import asyncio
+import os
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.orm import Session
+
+from .models import SimilarityCheck
+
+DROP_POLICIES = ("drop_newest", "drop_oldest")
+
+
+class HistoryLogger:
+    """Bounded queue of similarity check records, flushed to SQLite off the request path."""
+
+    def __init__(
+        self,
+        path: str,
+        max_queue: int = 10000,
+        flush_interval_ms: float = 1000.0,
+        batch_size: int = 500,
+        drop_policy: str = "drop_newest",
+    ):
+        """
+        Open (and create if needed) the history database.
+
+        Args:
+            path: SQLite database file
+            max_queue: Records held in memory before the drop policy applies
+            flush_interval_ms: Longest time a record waits before being written
+            batch_size: Records per insert; a full batch is written without waiting for the interval
+            drop_policy: drop_newest discards records arriving at a full queue, drop_oldest makes room for them
+        """
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy {drop_policy!r}, expected one of {', '.join(DROP_POLICIES)}")
+        self.path = path
+        self.max_queue = max(1, max_queue)
+        self.flush_interval_ms = max(0.0, flush_interval_ms)
+        self.batch_size = max(1, batch_size)
+        self.drop_policy = drop_policy
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # Several workers may write the same file; wait for a competing writer instead of failing
+        self.engine = create_engine(f"sqlite:///{path}", connect_args={"timeout": 30, "check_same_thread": False})
+        event.listen(self.engine, "connect", _enable_wal)
+        SimilarityCheck.__table__.create(self.engine, checkfirst=True)
+
+        self._queue: deque = deque()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._worker: Optional[asyncio.Task] = None
+        self._filled: Optional[asyncio.Event] = None
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_error: Optional[str] = None
+
+    def record(
+        self, input_text: str, name_id: str, score: float, threshold: Optional[float] = None, matches_count: int = 1
+    ) -> None:
+        """
+        Queue one successful check; never blocks or touches the database.
+
+        Args:
+            input_text: Checked text
+            name_id: Sensor it was checked against
+            score: Confidence score of the best matching paragraph
+            threshold: Threshold the caller applied, if any
+            matches_count: Paragraphs returned as matches
+        """
+        row = {
+            "input_text": input_text,
+            "best_match_id": name_id,
+            "best_similarity_score": float(score),
+            "threshold_used": threshold,
+            "matches_count": matches_count,
+            "timestamp": datetime.now(timezone.utc),
+        }
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                if self.drop_policy == "drop_newest":
+                    return
+                self._queue.popleft()
+            self._queue.append(row)
+            full = len(self._queue) >= self.batch_size
+        self._ensure_started()
+        if full:
+            self._filled.set()
+
+    def _ensure_started(self) -> None:
+        # The flush task belongs to the running loop, so it is created on first use
+        if self._worker is None or self._worker.done():
+            self._filled = asyncio.Event()
+            self._worker = asyncio.ensure_future(self._run())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await asyncio.wait_for(self._filled.wait(), timeout=self.flush_interval_ms / 1000)
+            except asyncio.TimeoutError:
+                pass
+            self._filled.clear()
+            # SQLite writes run on the default thread pool, not on the inference threads
+            await loop.run_in_executor(None, self.flush)
+
+    def _take(self) -> List[dict]:
+        with self._lock:
+            count = min(self.batch_size, len(self._queue))
+            return [self._queue.popleft() for _ in range(count)]
+
+    def flush(self) -> int:
+        """
+        Write every queued record now (blocking).
+
+        Returns:
+            int: Records written
+        """
+        written = 0
+        with self._write_lock:
+            while True:
+                rows = self._take()
+                if not rows:
+                    break
+                try:
+                    with Session(self.engine) as session, session.begin():
+                        session.execute(insert(SimilarityCheck), rows)
+                    written += len(rows)
+                except Exception as e:
+                    # A broken database must not grow the queue without bound; the batch is lost
+                    self.failed += len(rows)
+                    self.last_error = str(e)
+                    print(f"Error writing similarity check history: {e}")
+                    break
+            if written:
+                self.written += written
+                self.flushes += 1
+        return written
+
+    def recent(self, limit: int = 50, name_id: Optional[str] = None) -> List[SimilarityCheck]:
+        """
+        Latest checks, newest first, including those still queued (blocking).
+
+        Args:
+            limit: Maximum number of records
+            name_id: Only checks against this sensor
+
+        Returns:
+            List[SimilarityCheck]: Stored records
+        """
+        self.flush()
+        query = select(SimilarityCheck).order_by(SimilarityCheck.id.desc()).limit(limit)
+        if name_id is not None:
+            query = query.where(SimilarityCheck.best_match_id == name_id)
+        with Session(self.engine, expire_on_commit=False) as session:
+            return list(session.scalars(query))
+
+    def stats(self) -> dict:
+        """
+        Snapshot of the write-behind queue.
+
+        Returns:
+            dict: Settings, queue depth and written, dropped and failed record counts
+        """
+        return {
+            "path": self.path,
+            "queue_depth": len(self._queue),
+            "max_queue": self.max_queue,
+            "flush_interval_ms": self.flush_interval_ms,
+            "drop_policy": self.drop_policy,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "last_error": self.last_error,
+        }
+
+
+def _enable_wal(connection, _record) -> None:
+    # Readers of /similarity-checks do not block the writer
+    cursor = connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
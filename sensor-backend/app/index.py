@@ -0,0 +1,219 @@
+"""
+Nearest-neighbour search across all sensors.
+Small stores are searched exactly; large ones through an inverted-file (IVF) index over the embedding store.
+"""
+
+import itertools
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .store import EmbeddingStore, SensorData, top_k_indices
+
+
+def spherical_kmeans(vectors: np.ndarray, clusters: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """
+    Cluster unit vectors by cosine similarity.
+
+    Args:
+        vectors: Matrix of unit-length rows
+        clusters: Number of centroids
+        iterations: Lloyd iterations to run
+        seed: Seed for the initial centroid sample
+
+    Returns:
+        np.ndarray: Matrix of unit-length centroids
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        counts = np.bincount(assignment, minlength=clusters)
+
+        # Empty clusters restart from a random vector
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            sums[empty] = vectors[rng.choice(len(vectors), size=len(empty))]
+
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = np.divide(sums, norms, out=np.zeros_like(sums), where=norms > 0)
+    return centroids.astype(np.float32)
+
+
+class SearchIndex:
+    """Global index mapping embedding store rows to the sensors and paragraphs that use them."""
+
+    def __init__(self, store: EmbeddingStore, ann_min_rows: int = 20000, nprobe: int = 16):
+        """
+        Initialize an empty index.
+
+        Args:
+            store: Embedding store holding the indexed vectors
+            ann_min_rows: Indexed rows from which the IVF index replaces exact search
+            nprobe: Inverted lists scanned per IVF query
+        """
+        self.store = store
+        self.ann_min_rows = max(1, ann_min_rows)
+        self.nprobe = max(1, nprobe)
+        self._lock = threading.RLock()
+
+        # row -> {nameId: paragraph}
+        self._postings: Dict[int, Dict[str, str]] = {}
+        self._live: Optional[np.ndarray] = None
+
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[Set[int]] = []
+        self._row_list: Dict[int, int] = {}
+        self._trained_rows = 0
+
+    @property
+    def method(self) -> str:
+        """Search method the next query will use."""
+        return "ivf" if len(self._postings) >= self.ann_min_rows else "flat"
+
+    def add_sensor(self, name_id: str, sensor_data: SensorData) -> None:
+        """
+        Index the paragraphs of a sensor.
+
+        Args:
+            name_id: Sensor nameId
+            sensor_data: The sensor's paragraphs and store rows
+        """
+        with self._lock:
+            new_rows = []
+            for chunk, row in enumerate(sensor_data.rows.tolist()):
+                paragraph = sensor_data.source(chunk)
+                entry = self._postings.get(row)
+                if entry is None:
+                    entry = self._postings[row] = {}
+                    new_rows.append(row)
+                entry.setdefault(name_id, paragraph)
+            if new_rows:
+                self._live = None
+                self._assign(new_rows)
+
+    def remove_sensor(self, name_id: str, sensor_data: SensorData) -> None:
+        """
+        Remove the paragraphs of a sensor from the index.
+
+        Must run before the sensor's rows are released back to the store.
+
+        Args:
+            name_id: Sensor nameId
+            sensor_data: The sensor's paragraphs and store rows
+        """
+        with self._lock:
+            for row in set(sensor_data.rows.tolist()):
+                entry = self._postings.get(row)
+                if entry is None:
+                    continue
+                entry.pop(name_id, None)
+                if not entry:
+                    del self._postings[row]
+                    self._live = None
+                    list_id = self._row_list.pop(row, None)
+                    if list_id is not None:
+                        self._lists[list_id].discard(row)
+
+    def _assign(self, rows: List[int]) -> None:
+        if self._centroids is None:
+            return
+        vectors = self.store.vectors(np.asarray(rows, dtype=np.int64))
+        for row, list_id in zip(rows, np.argmax(vectors @ self._centroids.T, axis=1).tolist()):
+            self._lists[list_id].add(row)
+            self._row_list[row] = list_id
+
+    def _train(self) -> None:
+        rows = np.fromiter(self._postings, dtype=np.int64, count=len(self._postings))
+        clusters = max(1, int(np.sqrt(len(rows))))
+        # A sample of 64 vectors per centroid is plenty for k-means
+        rng = np.random.default_rng(0)
+        sample = rows if len(rows) <= 64 * clusters else rng.choice(rows, size=64 * clusters, replace=False)
+
+        self._centroids = spherical_kmeans(self.store.vectors(sample), clusters)
+        self._lists = [set() for _ in range(clusters)]
+        self._row_list = {}
+        self._trained_rows = len(rows)
+        self._assign(rows.tolist())
+        print(f"Trained IVF search index: {clusters} lists over {len(rows)} paragraphs")
+
+    def _needs_training(self) -> bool:
+        count = len(self._postings)
+        if count < self.ann_min_rows:
+            return False
+        # Retrain when the store has doubled or halved since the centroids were fitted
+        return self._centroids is None or count > 2 * self._trained_rows or 2 * count < self._trained_rows
+
+    def _search_flat(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        if self._live is None:
+            self._live = np.fromiter(self._postings, dtype=np.int64, count=len(self._postings))
+        # One product over the whole store is cheaper than gathering the live rows first
+        scores = self.store.scores(query)[self._live]
+        best = top_k_indices(scores, self.store.candidates(k))
+        order, final = self.store.rerank(query, self._live[best], scores[best], k)
+        return self._live[best[order]], final
+
+    def _search_ivf(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        probes = top_k_indices(self._centroids @ query, self.nprobe)
+        candidates = np.fromiter(
+            itertools.chain.from_iterable(self._lists[i] for i in probes.tolist()), dtype=np.int64
+        )
+        if not len(candidates):
+            return candidates, np.empty(0, dtype=np.float32)
+        scores = self.store.scores(query, candidates)
+        best = top_k_indices(scores, self.store.candidates(k))
+        order, final = self.store.rerank(query, candidates[best], scores[best], k)
+        return candidates[best[order]], final
+
+    def search(self, query: np.ndarray, k: int) -> List[Tuple[str, str, float]]:
+        """
+        Find the paragraphs closest to a query across all sensors.
+
+        Args:
+            query: Unit-length query embedding
+            k: Number of hits wanted
+
+        Returns:
+            List[Tuple[str, str, float]]: (nameId, paragraph, score) hits, best first
+        """
+        with self._lock:
+            if not self._postings or k <= 0:
+                return []
+            if self._needs_training():
+                self._train()
+
+            # A row shared by several sensors yields one hit per sensor; windows of one paragraph yield
+            # one hit, so more rows are fetched while duplicates leave fewer than k hits
+            wanted = k
+            while True:
+                if self.method == "ivf":
+                    rows, scores = self._search_ivf(query, wanted)
+                else:
+                    rows, scores = self._search_flat(query, wanted)
+                hits = []
+                seen = set()
+                for row, score in zip(rows.tolist(), scores.tolist()):
+                    for name_id, paragraph in self._postings[row].items():
+                        if (name_id, paragraph) not in seen:
+                            seen.add((name_id, paragraph))
+                            hits.append((name_id, paragraph, score))
+                if len(hits) >= k or len(rows) < wanted:
+                    return hits[:k]
+                wanted *= 2
+
+    def stats(self) -> dict:
+        """
+        Snapshot of index state.
+
+        Returns:
+            dict: Indexed rows, active method, and IVF list count and training size
+        """
+        return {
+            "indexed_paragraphs": len(self._postings),
+            "method": self.method,
+            "ivf_lists": len(self._lists),
+            "ivf_trained_rows": self._trained_rows,
+        }
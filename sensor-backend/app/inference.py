@@ -0,0 +1,111 @@
+"""
+Inference execution for the semantic sensor API.
+Blocking model calls run on a dedicated thread pool so the asyncio event loop stays responsive.
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from fastapi import HTTPException
+
+
+def configure_torch_threads(num_threads: int) -> None:
+    """
+    Set the intra-op thread count used by torch.
+
+    Args:
+        num_threads: Number of threads; 0 or less keeps the torch default
+    """
+    if num_threads <= 0:
+        return
+    try:
+        import torch
+        torch.set_num_threads(num_threads)
+        print(f"Torch intra-op threads set to {num_threads}")
+    except ImportError:
+        print("Torch is not installed, ignoring thread configuration")
+
+
+class InferenceExecutor:
+    """Bounded thread pool for blocking inference work."""
+
+    def __init__(self, max_workers: int = 1, max_queue: int = 64, retry_after: int = 1):
+        """
+        Initialize the inference executor.
+
+        Args:
+            max_workers: Number of inference threads running concurrently
+            max_queue: Number of jobs allowed to wait for a free thread
+            retry_after: Seconds clients are told to wait when the queue is full
+        """
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.retry_after = max(1, retry_after)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._rejected = 0
+
+    @property
+    def pending(self) -> int:
+        """Jobs currently running or waiting for a thread."""
+        return self._pending
+
+    def stats(self) -> dict:
+        """
+        Snapshot of executor load.
+
+        Returns:
+            dict: Worker count, queue capacity, pending and rejected job counts
+        """
+        return {
+            "workers": self.max_workers,
+            "queue_capacity": self.max_queue,
+            "pending": self._pending,
+            "rejected": self._rejected,
+        }
+
+    def _release(self, _future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a blocking callable on the inference pool and await its result.
+
+        Args:
+            func: Callable to execute
+            *args: Positional arguments for the callable
+            **kwargs: Keyword arguments for the callable
+
+        Returns:
+            Any: The callable's return value
+
+        Raises:
+            HTTPException: 503 with a Retry-After header if the queue is full
+        """
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Inference queue is full, please retry later",
+                    headers={"Retry-After": str(self.retry_after)}
+                )
+            self._pending += 1
+
+        # Release the slot when the job finishes, even if the caller stops waiting
+        try:
+            future = self._pool.submit(functools.partial(func, *args, **kwargs))
+        except RuntimeError:
+            self._release(None)
+            raise HTTPException(status_code=503, detail="Inference executor is shutting down")
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        """Stop accepting work and wait for running jobs to finish."""
+        self._pool.shutdown(wait=True)
@@ -0,0 +1,176 @@
+"""
+Streaming NDJSON ingestion for the semantic sensor API.
+Sensors are read line by line, created in pipelined batches and reported back one result line each.
+"""
+
+import asyncio
+import json
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+
+from .inference import InferenceExecutor
+
+
+class NDJSONResponse(StreamingResponse):
+    """Streams result lines while the request body is still being read."""
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send) -> None:
+        # StreamingResponse would also listen on receive for a disconnect and swallow the body
+        # chunks the generator has not read yet; a disconnect ends the body read instead
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def ndjson_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    Split a byte stream into non-empty lines.
+
+    Args:
+        chunks: Request body chunks
+        max_line_bytes: Longest accepted line; longer lines are yielded as None and skipped
+
+    Yields:
+        Tuple[int, Optional[bytes]]: One-based line number and the line, or None if it was too long
+    """
+    buffer = b""
+    line_no = 0
+    oversized = False
+    async for chunk in chunks:
+        *lines, buffer = (buffer + chunk).split(b"\n")
+        for line in lines:
+            line_no += 1
+            if oversized or len(line) > max_line_bytes:
+                oversized = False
+                yield line_no, None
+            elif line.strip():
+                yield line_no, line
+        # Drop the rest of an overlong line as it arrives, so it is never held in memory
+        if len(buffer) > max_line_bytes:
+            buffer = b""
+            oversized = True
+    if oversized:
+        yield line_no + 1, None
+    elif buffer.strip():
+        yield line_no + 1, buffer
+
+
+def parse_sensor_line(line: bytes) -> Tuple[str, str]:
+    """
+    Read one sensor from an NDJSON line.
+
+    Args:
+        line: JSON object with name_id and text
+
+    Returns:
+        Tuple[str, str]: nameId and text
+
+    Raises:
+        HTTPException: If the line is not such an object
+    """
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+    if not isinstance(record, dict):
+        raise HTTPException(status_code=400, detail="Each line must be a JSON object with name_id and text")
+    name_id, text = record.get("name_id"), record.get("text")
+    if not isinstance(name_id, str) or not isinstance(text, str):
+        raise HTTPException(status_code=400, detail="Each line must have string name_id and text fields")
+    return name_id, text
+
+
+async def ingest_ndjson(
+    chunks: AsyncIterator[bytes],
+    current_service: Callable[[], object],
+    executor: InferenceExecutor,
+    batch_size: int = 64,
+    max_line_bytes: int = 131072,
+) -> AsyncIterator[bytes]:
+    """
+    Create the sensors of an NDJSON upload, streaming one result line per sensor.
+
+    The next batch is read and parsed while the previous one is encoded, and only those two
+    batches are held at a time, so memory does not depend on the upload size.
+
+    Args:
+        chunks: Request body chunks
+        current_service: Returns the service serving requests (it changes on model reload)
+        executor: Inference executor running each batch
+        batch_size: Sensors created per model pass
+        max_line_bytes: Longest accepted line
+
+    Yields:
+        bytes: Result lines with the input line number, nameId, status and paragraph count or
+            error, then a summary line
+    """
+    counts = {"created": 0, "skipped": 0, "failed": 0}
+
+    def encode(result: dict) -> bytes:
+        counts[result["status"]] += 1
+        return json.dumps(result).encode("utf-8") + b"\n"
+
+    async def run(batch: List[Tuple[int, str, str]]) -> List[dict]:
+        while True:
+            try:
+                results = await executor.run(
+                    current_service().create_sensors, [(name_id, text) for _, name_id, text in batch]
+                )
+                return [{"line": line_no, **result} for (line_no, _, _), result in zip(batch, results)]
+            except HTTPException as e:
+                if e.status_code == 503 and e.headers and "Retry-After" in e.headers:
+                    # Queue full: wait for the model instead of failing the batch
+                    await asyncio.sleep(executor.retry_after)
+                    continue
+                status_code, error = e.status_code, str(e.detail)
+            except Exception as e:
+                status_code, error = 500, str(e)
+            # The response is already streaming; report the batch as failed rather than abort it
+            return [
+                {"line": line_no, "name_id": name_id, "status": "failed", "status_code": status_code, "error": error}
+                for line_no, name_id, _ in batch
+            ]
+
+    running: Optional[asyncio.Future] = None
+    batch: List[Tuple[int, str, str]] = []
+    try:
+        async for line_no, line in ndjson_lines(chunks, max_line_bytes):
+            if line is None:
+                yield encode({
+                    "line": line_no, "name_id": None, "status": "failed", "status_code": 413,
+                    "error": f"Line is too long (maximum {max_line_bytes:,} bytes)",
+                })
+                continue
+            try:
+                name_id, text = parse_sensor_line(line)
+            except HTTPException as e:
+                yield encode({"line": line_no, "name_id": None, "status": "failed", "status_code": e.status_code, "error": e.detail})
+                continue
+            batch.append((line_no, name_id, text))
+            if len(batch) >= batch_size:
+                if running is not None:
+                    for result in await running:
+                        yield encode(result)
+                running = asyncio.ensure_future(run(batch))
+                batch = []
+
+        if running is not None:
+            for result in await running:
+                yield encode(result)
+            running = None
+        if batch:
+            for result in await run(batch):
+                yield encode(result)
+    except ClientDisconnect:
+        # Sensors of batches already started are still created
+        return
+    finally:
+        if running is not None and not running.done():
+            running.cancel()
+
+    yield json.dumps({"done": True, **counts}).encode("utf-8") + b"\n"
@@ -0,0 +1,97 @@
+"""
+Lexical fast path for similarity checks in the semantic sensor API.
+Inputs repeating a stored paragraph up to case, Unicode form and whitespace are answered by hash without the model.
+"""
+
+import hashlib
+import re
+import unicodedata
+from typing import Dict, Optional
+
+_SPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Text as compared by the lexical fast path: Unicode-normalized, case-folded, whitespace collapsed.
+
+    Args:
+        text: Input or paragraph text
+
+    Returns:
+        str: Normalized text
+    """
+    return _SPACE.sub(" ", unicodedata.normalize("NFKC", text).casefold()).strip()
+
+
+def _text_key(normalized: str) -> bytes:
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+
+
+class SensorLexicon:
+    """Exact-match keys of one sensor's paragraphs."""
+
+    __slots__ = ("keys",)
+
+    def __init__(self, keys: Dict[bytes, int]):
+        self.keys = keys
+
+
+class LexicalMatcher:
+    """Finds the stored paragraph an input repeats."""
+
+    def __init__(self):
+        """Initialize a matcher with zeroed counts."""
+        self.exact_hits = 0
+        self.misses = 0
+
+    def lexicon(self, sensor_data) -> SensorLexicon:
+        """
+        Lexical index of a sensor's paragraphs, built on first use and kept on the sensor data.
+
+        Args:
+            sensor_data: SensorData of the sensor
+
+        Returns:
+            SensorLexicon: Exact key of every paragraph
+        """
+        lexicon = sensor_data.lexicon
+        if lexicon is not None:
+            return lexicon
+        keys: Dict[bytes, int] = {}
+        for i, paragraph in enumerate(sensor_data.paragraphs):
+            keys.setdefault(_text_key(normalize_text(paragraph)), i)
+        lexicon = SensorLexicon(keys)
+        # SensorData is replaced, never changed, when a sensor's text changes, so the index stays valid
+        sensor_data.lexicon = lexicon
+        return lexicon
+
+    def exact(self, text: str, sensor_data) -> Optional[int]:
+        """
+        Paragraph of a sensor that an input repeats up to case, Unicode form and whitespace.
+
+        Args:
+            text: Validated input text
+            sensor_data: SensorData of the sensor
+
+        Returns:
+            Optional[int]: Paragraph index, or None
+        """
+        index = self.lexicon(sensor_data).keys.get(_text_key(normalize_text(text)))
+        if index is not None:
+            self.exact_hits += 1
+        else:
+            self.misses += 1
+        return index
+
+    def stats(self) -> dict:
+        """
+        Hit counts.
+
+        Returns:
+            dict: Exact and missed lookups
+        """
+        return {
+            "exact_hits": self.exact_hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,128 @@
+"""
+Prometheus metrics for the semantic sensor API.
+Stage histograms split request latency into validation, model encoding and scoring; gauges expose store and queue state.
+"""
+
+from typing import Callable, Dict
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+
+# Own registry, so only the API's metrics are exported
+REGISTRY = CollectorRegistry()
+
+# Sub-millisecond scoring up to multi-second encodes of long sensors
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+STAGE_SECONDS = Histogram(
+    "sensor_stage_duration_seconds",
+    "Time spent in each stage of request processing",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+    registry=REGISTRY,
+)
+VALIDATION = STAGE_SECONDS.labels(stage="validation")
+QUERY_ENCODE = STAGE_SECONDS.labels(stage="query_encode")
+PARAGRAPH_ENCODE = STAGE_SECONDS.labels(stage="paragraph_encode")
+SCORING = STAGE_SECONDS.labels(stage="scoring")
+
+REQUEST_SECONDS = Histogram(
+    "sensor_request_duration_seconds",
+    "End-to-end request latency per endpoint",
+    ["endpoint"],
+    buckets=STAGE_BUCKETS,
+    registry=REGISTRY,
+)
+REQUESTS = Counter(
+    "sensor_requests_total",
+    "Requests per endpoint and status code",
+    ["endpoint", "status"],
+    registry=REGISTRY,
+)
+ERRORS = Counter(
+    "sensor_errors_total",
+    "Failed requests per endpoint and error class",
+    ["endpoint", "error_class"],
+    registry=REGISTRY,
+)
+QUERY_BATCH_SIZE = Histogram(
+    "sensor_query_batch_size",
+    "Query texts per micro-batch sent to the model",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+    registry=REGISTRY,
+)
+ENCODED_TEXTS = Counter(
+    "sensor_encoded_texts_total",
+    "Texts sent to the model",
+    ["kind"],
+    registry=REGISTRY,
+)
+
+# Error classes by status code; anything else is client_error or server_error
+ERROR_CLASSES: Dict[int, str] = {
+    400: "validation",
+    404: "not_found",
+    409: "conflict",
+    413: "too_large",
+    422: "validation",
+    500: "internal",
+    503: "unavailable",
+}
+
+
+def error_class(status_code: int) -> str:
+    """
+    Coarse class of a failed request.
+
+    Args:
+        status_code: HTTP status code of the response (400 or above)
+
+    Returns:
+        str: Error class label
+    """
+    return ERROR_CLASSES.get(status_code, "client_error" if status_code < 500 else "server_error")
+
+
+def record_request(endpoint: str, status_code: int, seconds: float) -> None:
+    """
+    Count a finished request.
+
+    Args:
+        endpoint: Route path template, e.g. /text-sensor/{name_id}
+        status_code: Response status code
+        seconds: Time from receiving the request to the response
+    """
+    REQUEST_SECONDS.labels(endpoint=endpoint).observe(seconds)
+    REQUESTS.labels(endpoint=endpoint, status=str(status_code)).inc()
+    if status_code >= 400:
+        ERRORS.labels(endpoint=endpoint, error_class=error_class(status_code)).inc()
+
+
+def register_gauges(readings: Dict[str, tuple]) -> None:
+    """
+    Expose values read at scrape time as gauges.
+
+    Args:
+        readings: Metric name -> (help text, zero-argument function returning the value)
+    """
+    for name, (documentation, read) in readings.items():
+        Gauge(name, documentation, registry=REGISTRY).set_function(_safe(read))
+
+
+def _safe(read: Callable[[], float]) -> Callable[[], float]:
+    # A reading that fails (e.g. before the model loaded) must not break the whole scrape
+    def reading() -> float:
+        try:
+            return float(read())
+        except Exception:
+            return float("nan")
+    return reading
+
+
+def render() -> tuple:
+    """
+    Current metrics in the Prometheus text format.
+
+    Returns:
+        tuple: (payload bytes, content type)
+    """
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,297 @@
+"""
+Per-namespace memory budgets for the semantic sensor API.
+A nameId prefix up to ':' names its namespace; the least recently used sensors of a namespace over budget are evicted to disk.
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+SEPARATOR = ":"
+
+# Namespace of nameIds without a prefix
+DEFAULT_NAMESPACE = "default"
+
+
+def namespace_of(name_id: str) -> str:
+    """
+    Namespace of a nameId.
+
+    Args:
+        name_id: Validated nameId, e.g. "acme:billing-address"
+
+    Returns:
+        str: Its prefix ("acme"), or DEFAULT_NAMESPACE without one
+    """
+    namespace, separator, _ = name_id.partition(SEPARATOR)
+    return namespace if separator else DEFAULT_NAMESPACE
+
+
+class NamespaceBudgets:
+    """Resident embedding memory per namespace, in least recently used order, and the evicted sensors' files."""
+
+    def __init__(self, directory: str, default_budget: int = 0, budgets: Optional[Dict[str, int]] = None):
+        """
+        Initialize empty accounting.
+
+        Args:
+            directory: Directory receiving the embeddings of evicted sensors
+            default_budget: Resident embedding bytes allowed per namespace (0 is unlimited)
+            budgets: Budgets of specific namespaces, overriding the default
+        """
+        self.root = directory
+        self.default_budget = max(0, default_budget)
+        self.budgets = {namespace: max(0, budget) for namespace, budget in (budgets or {}).items()}
+        # Files of one model generation; a reloaded model starts a new one
+        self.directory = os.path.join(directory, uuid.uuid4().hex)
+        self._lock = threading.Lock()
+        # Signalled when the last read of an evicted file ends, so clear() can wait for them
+        self._idle = threading.Condition(self._lock)
+        self._readers = 0
+        self._closed = False
+        self._resident: Dict[str, "OrderedDict[str, int]"] = {}
+        self._used: Dict[str, int] = {}
+        self._evicted: Dict[str, set] = {}
+        self._counts: Dict[str, Dict[str, int]] = {}
+        # Embeddings of evicted sensors until their file is written, so eviction does no I/O under the store lock
+        self._pending: Dict[str, np.ndarray] = {}
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="eviction-writer")
+
+    def renew(self) -> "NamespaceBudgets":
+        """
+        Empty accounting with the same budgets, for the service of a reloaded model.
+
+        Returns:
+            NamespaceBudgets: The new instance, writing to its own files
+        """
+        return NamespaceBudgets(self.root, self.default_budget, self.budgets)
+
+    def budget(self, namespace: str) -> int:
+        """
+        Resident embedding bytes a namespace may hold.
+
+        Args:
+            namespace: Namespace name
+
+        Returns:
+            int: Budget in bytes; 0 is unlimited
+        """
+        return self.budgets.get(namespace, self.default_budget)
+
+    def _count(self, namespace: str, event: str) -> None:
+        counts = self._counts.setdefault(namespace, {"evictions": 0, "reloads": 0})
+        counts[event] += 1
+
+    def admit(self, name_id: str, size: int) -> List[str]:
+        """
+        Account a sensor made resident (or replaced) as the most recently used of its namespace.
+
+        Args:
+            name_id: Sensor nameId
+            size: Resident embedding bytes of the sensor
+
+        Returns:
+            List[str]: Least recently used sensors of the namespace to evict to stay within its budget;
+                never the admitted sensor itself
+        """
+        namespace = namespace_of(name_id)
+        with self._lock:
+            resident = self._resident.setdefault(namespace, OrderedDict())
+            used = self._used.get(namespace, 0) - resident.pop(name_id, 0) + size
+            resident[name_id] = size
+            self._used[namespace] = used
+            self._evicted.get(namespace, set()).discard(name_id)
+
+            budget = self.budget(namespace)
+            victims = []
+            if budget:
+                for victim, victim_size in resident.items():
+                    if used <= budget or victim == name_id:
+                        break
+                    victims.append(victim)
+                    used -= victim_size
+            return victims
+
+    def touch(self, name_id: str) -> None:
+        """
+        Mark a resident sensor as just used.
+
+        Args:
+            name_id: Sensor nameId
+        """
+        with self._lock:
+            resident = self._resident.get(namespace_of(name_id))
+            if resident is not None and name_id in resident:
+                resident.move_to_end(name_id)
+
+    def forget(self, name_id: str) -> None:
+        """
+        Stop accounting a deleted or replaced sensor and remove its file.
+
+        Args:
+            name_id: Sensor nameId
+        """
+        namespace = namespace_of(name_id)
+        with self._lock:
+            size = self._resident.get(namespace, OrderedDict()).pop(name_id, 0)
+            self._used[namespace] = self._used.get(namespace, 0) - size
+            self._evicted.get(namespace, set()).discard(name_id)
+            self._pending.pop(name_id, None)
+            # Under the lock, so a file written for a later eviction is not removed
+            self._discard(name_id)
+
+    def evicted(self) -> List[str]:
+        """
+        Sensors whose embeddings are on disk (or being written there).
+
+        Returns:
+            List[str]: Their nameIds
+        """
+        with self._lock:
+            return [name_id for names in self._evicted.values() for name_id in names]
+
+    def path(self, name_id: str) -> str:
+        """
+        File holding the embeddings of an evicted sensor.
+
+        Args:
+            name_id: Sensor nameId
+
+        Returns:
+            str: Path of the .npy file
+        """
+        digest = hashlib.blake2b(name_id.encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + ".npy")
+
+    def evict(self, name_id: str, vectors: np.ndarray) -> None:
+        """
+        Stop accounting an evicted sensor's chunk embeddings as resident; a background thread writes them to disk.
+
+        Args:
+            name_id: Sensor nameId
+            vectors: float32 embedding of every chunk, in chunk order (a copy the caller no longer changes)
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        namespace = namespace_of(name_id)
+        with self._lock:
+            size = self._resident.get(namespace, OrderedDict()).pop(name_id, 0)
+            self._used[namespace] = self._used.get(namespace, 0) - size
+            self._evicted.setdefault(namespace, set()).add(name_id)
+            self._count(namespace, "evictions")
+            self._pending[name_id] = vectors
+        self._writer.submit(self._write, name_id, vectors)
+
+    def _write(self, name_id: str, vectors: np.ndarray) -> None:
+        path = self.path(name_id)
+        tmp = path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "wb") as f:
+                np.save(f, vectors)
+        except OSError as e:
+            # The vectors stay pending in memory, so the sensor still reloads
+            print(f"Could not write the embeddings of evicted sensor '{name_id}': {e}")
+            return
+        with self._lock:
+            # Reloaded, replaced or deleted while being written: the file is stale
+            current = self._pending.get(name_id) is vectors
+            if current:
+                os.replace(tmp, path)
+                del self._pending[name_id]
+        if not current:
+            os.remove(tmp)
+
+    def read(self, name_id: str) -> np.ndarray:
+        """
+        Embeddings of an evicted sensor, from memory while their file is still being written.
+
+        Args:
+            name_id: Sensor nameId
+
+        Returns:
+            np.ndarray: float32 matrix, one row per chunk
+
+        Raises:
+            FileNotFoundError: If the sensor is no longer evicted, or the files were cleared
+        """
+        with self._lock:
+            if self._closed:
+                raise FileNotFoundError(f"Evicted embeddings of '{name_id}' were cleared")
+            vectors = self._pending.get(name_id)
+            if vectors is not None:
+                return vectors
+            self._readers += 1
+        try:
+            return np.load(self.path(name_id))
+        finally:
+            with self._lock:
+                self._readers -= 1
+                if not self._readers:
+                    self._idle.notify_all()
+
+    def reloaded(self, name_id: str) -> None:
+        """
+        Count an evicted sensor made resident again and remove its file.
+
+        Args:
+            name_id: Sensor nameId
+        """
+        with self._lock:
+            self._pending.pop(name_id, None)
+            self._count(namespace_of(name_id), "reloads")
+            self._discard(name_id)
+
+    def _discard(self, name_id: str) -> None:
+        try:
+            os.remove(self.path(name_id))
+        except FileNotFoundError:
+            pass
+
+    def clear(self) -> None:
+        """
+        Remove every file of this generation, e.g. once a reloaded model has replaced it.
+
+        Reads already started finish first; later ones fail with FileNotFoundError.
+        """
+        with self._lock:
+            self._closed = True
+            self._pending.clear()
+            while self._readers:
+                self._idle.wait()
+        self._writer.shutdown(wait=True)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def stats(self) -> dict:
+        """
+        Memory and eviction figures per namespace.
+
+        Returns:
+            dict: Default budget, evictions not written to disk yet, and per namespace its budget,
+                resident bytes and sensors, evicted sensors, and eviction and reload counts
+        """
+        with self._lock:
+            namespaces = set(self._resident) | set(self._evicted) | set(self._counts)
+            return {
+                "directory": self.root,
+                "default_budget_bytes": self.default_budget,
+                "evictions": sum(counts["evictions"] for counts in self._counts.values()),
+                "reloads": sum(counts["reloads"] for counts in self._counts.values()),
+                "pending_writes": len(self._pending),
+                "namespaces": {
+                    namespace: {
+                        "budget_bytes": self.budget(namespace),
+                        "resident_bytes": self._used.get(namespace, 0),
+                        "resident_sensors": len(self._resident.get(namespace, ())),
+                        "evicted_sensors": len(self._evicted.get(namespace, ())),
+                        **self._counts.get(namespace, {"evictions": 0, "reloads": 0}),
+                    }
+                    for namespace in sorted(namespaces)
+                },
+            }
@@ -0,0 +1,223 @@
+"""
+Background model reload for the semantic sensor API.
+A new model and a re-embedded copy of every sensor are built next to the serving ones, then swapped in together.
+"""
+
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from .inference import InferenceExecutor
+from .services import SensorService
+from .store import paragraph_key
+
+
+def changed_sensors(source: SensorService, target: SensorService) -> List[str]:
+    """
+    Sensors whose text differs between two services, including sensors missing from either.
+
+    Args:
+        source: Service holding the authoritative sensors
+        target: Service being brought up to date
+
+    Returns:
+        List[str]: nameIds to copy or remove
+    """
+    names = dict.fromkeys(list(source.text_store))
+    names.update(dict.fromkeys(list(target.text_store)))
+    return [name for name in names if source.text_store.get(name) != target.text_store.get(name)]
+
+
+def copy_sensors(source: SensorService, target: SensorService, names: List[str]) -> int:
+    """
+    Re-create sensors of one service in another, encoding their paragraphs with the target's model.
+
+    The chunks of all given sensors are encoded together in length-sorted batches.
+
+    Args:
+        source: Service holding the sensors
+        target: Service receiving them
+        names: nameIds to copy; sensors no longer in the source are removed from the target
+
+    Returns:
+        int: Number of chunks encoded
+    """
+    # Text and paragraphs are read together so a concurrent replace is never seen half-done
+    with source.embedding_store.lock:
+        sensors = {}
+        for name in names:
+            text = source.text_store.get(name)
+            sensor_data = source.sensor_data_list.get(name)
+            sensors[name] = None if text is None or sensor_data is None else (text, list(sensor_data.paragraphs))
+
+    for name in [name for name, sensor in sensors.items() if sensor is None]:
+        target.remove_sensor(name, persist=False)
+        del sensors[name]
+
+    # Chunks the target has not embedded yet, cut for the target's model and encoded in one pass
+    chunking = {name: target.chunk_paragraphs(paragraphs) for name, (_, paragraphs) in sensors.items()}
+    pending: Dict[bytes, str] = {}
+    for chunks, _ in chunking.values():
+        for chunk in chunks:
+            pending.setdefault(paragraph_key(chunk), chunk)
+    missing = target.embedding_store.missing(pending)
+    embeddings: Dict[bytes, np.ndarray] = {}
+    if missing:
+        vectors = target.generate_embeddings([pending[key] for key in missing])
+        embeddings = dict(zip(missing, vectors))
+
+    for name, (text, paragraphs) in sensors.items():
+        target.publish_sensor(name, text, paragraphs, embeddings, chunking=chunking[name])
+    return len(missing)
+
+
+class ModelReloader:
+    """Runs one model reload at a time and reports its progress."""
+
+    def __init__(self, executor: InferenceExecutor, step_paragraphs: int = 32, pause_ms: float = 10.0):
+        """
+        Initialize an idle reloader.
+
+        Args:
+            executor: Executor the re-embedding steps share with request traffic
+            step_paragraphs: Paragraphs re-embedded per step
+            pause_ms: Pause between steps, leaving the executor to request traffic
+        """
+        self.executor = executor
+        self.step_paragraphs = max(1, step_paragraphs)
+        self.pause_ms = max(0.0, pause_ms)
+
+        self.state = "idle"
+        self.error: Optional[str] = None
+        self.sensors_total = 0
+        self.sensors_done = 0
+        self.paragraphs_encoded = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.reloads = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(
+        self,
+        load_model: Callable[[], object],
+        build_service: Callable[[object], SensorService],
+        current_service: Callable[[], SensorService],
+        swap: Callable[[SensorService], None],
+        after_swap: Optional[Callable[[SensorService, SensorService], None]] = None,
+    ) -> bool:
+        """
+        Start a reload in the background unless one is already running.
+
+        Args:
+            load_model: Blocking function returning the new model
+            build_service: Builds an empty service with fresh stores for a model
+            current_service: Returns the service currently serving traffic
+            swap: Makes a fully built service the serving one; called on an inference thread
+                while the old service's store lock is held, so it should only swap references
+            after_swap: Persists and cleans up once the swap is done and the old store is unlocked;
+                called on an inference thread with the old and the new service
+
+        Returns:
+            bool: False if a reload was already running
+        """
+        if self.running:
+            return False
+        self.state = "loading"
+        self.error = None
+        self.sensors_total = 0
+        self.sensors_done = 0
+        self.paragraphs_encoded = 0
+        self.started_at = time.time()
+        self.finished_at = None
+        self._task = asyncio.ensure_future(self._run(load_model, build_service, current_service, swap, after_swap))
+        return True
+
+    async def _run(self, load_model, build_service, current_service, swap, after_swap) -> None:
+        try:
+            # Loading can take seconds; it stays off both the event loop and the inference threads
+            model = await asyncio.get_running_loop().run_in_executor(None, load_model)
+            service = build_service(model)
+
+            self.state = "re-embedding"
+            old = current_service()
+            names = list(old.sensor_data_list)
+            self.sensors_total = len(names)
+            for step in self._steps(old, names):
+                self.paragraphs_encoded += await self.executor.run(copy_sensors, old, service, step)
+                self.sensors_done += len(step)
+                await asyncio.sleep(self.pause_ms / 1000)
+
+            # Sensors created, replaced or deleted meanwhile, until few enough remain to finish under the lock
+            for _ in range(3):
+                changed = changed_sensors(old, service)
+                if len(changed) <= self.step_paragraphs:
+                    break
+                self.sensors_total += len(changed)
+                for step in self._steps(old, changed):
+                    self.paragraphs_encoded += await self.executor.run(copy_sensors, old, service, step)
+                    self.sensors_done += len(step)
+                    await asyncio.sleep(self.pause_ms / 1000)
+
+            self.state = "swapping"
+            await self.executor.run(self._finish, old, service, swap)
+            if after_swap is not None:
+                await self.executor.run(after_swap, old, service)
+            self.state = "completed"
+            self.reloads += 1
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(getattr(e, "detail", e))
+            print(f"Model reload failed, keeping the current model: {self.error}")
+        finally:
+            self.finished_at = time.time()
+
+    def _steps(self, service: SensorService, names: List[str]) -> List[List[str]]:
+        # Groups of sensors holding about step_paragraphs paragraphs each
+        steps, step, size = [], [], 0
+        for name in names:
+            sensor_data = service.sensor_data_list.get(name)
+            step.append(name)
+            size += len(sensor_data) if sensor_data is not None else 1
+            if size >= self.step_paragraphs:
+                steps.append(step)
+                step, size = [], 0
+        if step:
+            steps.append(step)
+        return steps
+
+    def _finish(self, old: SensorService, service: SensorService, swap) -> None:
+        # Writers to the old service wait here, then fail with a 503 asking the client to retry,
+        # which reaches the new service
+        with old.embedding_store.lock:
+            changed = changed_sensors(old, service)
+            if changed:
+                self.sensors_total += len(changed)
+                self.paragraphs_encoded += copy_sensors(old, service, changed)
+                self.sensors_done += len(changed)
+            old.retire()
+            swap(service)
+
+    def stats(self) -> dict:
+        """
+        Snapshot of the current or last reload.
+
+        Returns:
+            dict: State, error, sensor progress, encoded paragraphs, timing and completed reloads
+        """
+        end = self.finished_at if self.finished_at is not None else time.time()
+        return {
+            "state": self.state,
+            "error": self.error,
+            "sensors_total": self.sensors_total,
+            "sensors_done": self.sensors_done,
+            "progress": round(min(1.0, self.sensors_done / self.sensors_total), 4) if self.sensors_total else 0.0,
+            "paragraphs_encoded": self.paragraphs_encoded,
+            "elapsed_seconds": round(end - self.started_at, 3) if self.started_at is not None else 0.0,
+            "reloads": self.reloads,
+        }
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 from typing import Dict, List, Optional
 from typing import List, Optional, Dict
 from datetime import datetime
@@ -42,7 +42,7 @@ class SimilarityCheckHistory(BaseModel):
     input_text: str
     best_match_id: Optional[str]
     best_similarity_score: Optional[float]
-    threshold_used: float
+    threshold_used: Optional[float]
     matches_count: int
     timestamp: datetime
     
@@ -62,7 +62,24 @@ class CreateSensorRequest(BaseModel):
         return v.strip()
 
 
-class SimilarityRequest(BaseModel):
+class MatchOptions(BaseModel):
+    top_k: int = Field(
+        default=1, ge=1, le=100,
+        description="Ranked paragraphs returned in matches. Above 1, inputs repeating a paragraph are also scored by the model."
+    )
+    threshold: Optional[float] = Field(default=None, ge=-1.0, le=1.0)  # minimum score of a match
+    first_match: bool = False  # stop scoring at the first paragraph reaching the threshold
+    
+    @model_validator(mode='after')
+    def validate_first_match(self):
+        if self.first_match and self.threshold is None:
+            raise ValueError('first_match requires a threshold')
+        if self.first_match and self.top_k > 1:
+            raise ValueError('first_match returns a single match and cannot be combined with top_k above 1')
+        return self
+
+
+class SimilarityRequest(MatchOptions):
     text: str
     
     @field_validator('text')
@@ -75,9 +92,63 @@ class SimilarityRequest(BaseModel):
         return v.strip()
 
 
+class ParagraphMatch(BaseModel):
+    paragraph: str
+    score: float
+
+
 class SimilarityResponse(BaseModel):
     confidence_score: float
     matched_paragraph: str
+    matches: Optional[List[ParagraphMatch]] = None  # best first, when top_k or threshold was requested
+    threshold: Optional[float] = None
+    matched: Optional[bool] = None  # whether the best paragraph reached the threshold
+    match_path: str = "embedding"  # "exact" when answered without the model
+
+
+class VerifyItem(BaseModel):
+    name_id: str
+    text: str
+
+
+class BatchVerifyRequest(MatchOptions):
+    items: List[VerifyItem]
+
+
+class VerifyItemResult(BaseModel):
+    name_id: str
+    result: Optional[SimilarityResponse] = None  # set when verification succeeded
+    error: Optional[str] = None  # set when this item failed
+    status_code: int = 200
+
+
+class BatchVerifyResponse(BaseModel):
+    results: List[VerifyItemResult]  # same order as the request items
+
+
+class SearchRequest(BaseModel):
+    text: str
+    top_k: int = Field(default=5, ge=1, le=100)
+    
+    @field_validator('text')
+    @classmethod
+    def validate_text(cls, v):
+        if not v or not v.strip():
+            raise ValueError('Text cannot be empty or contain only whitespace')
+        if len(v.strip()) > 5000:
+            raise ValueError('Text is too long (maximum 5,000 characters)')
+        return v.strip()
+
+
+class SearchHit(BaseModel):
+    name_id: str
+    paragraph: str
+    score: float
+
+
+class SearchResponse(BaseModel):
+    hits: List[SearchHit]
+    method: str  # "flat" (exact) or "ivf" (approximate)
 
 
 class BulkCreateRequest(BaseModel):
@@ -90,9 +161,19 @@ class BulkCreateResponse(BaseModel):
     failed: List[str]   # list of nameIds that failed to create
 
 
+class SensorSummary(BaseModel):
+    name_id: str
+    paragraphs_count: int
+    characters: int
+
+
 class SensorListResponse(BaseModel):
-    sensors: Dict[str, str]  # nameId -> text mapping
-    count: int
+    sensors: Optional[Dict[str, str]] = None  # nameId -> text mapping (mode=full)
+    summaries: Optional[List[SensorSummary]] = None  # mode=summary
+    names: Optional[List[str]] = None  # mode=names
+    count: int  # sensors in this page
+    total: Optional[int] = None  # sensors overall
+    next_cursor: Optional[str] = None  # pass as cursor for the next page; absent on the last page
 
 
 class CreateSensorResponse(BaseModel):
@@ -100,10 +181,22 @@ class CreateSensorResponse(BaseModel):
     paragraphs_count: int
 
 
+class UpdateSensorResponse(BaseModel):
+    message: str
+    paragraphs_count: int
+    paragraphs_encoded: int  # distinct new or edited paragraphs sent to the model
+    paragraphs_reused: int  # distinct paragraphs whose stored embeddings were all kept
+
+
 class DeleteSensorResponse(BaseModel):
     message: str
 
 
+class SimilarityHistoryResponse(BaseModel):
+    checks: List[SimilarityCheckHistory]  # newest first
+    count: int
+
+
 class HealthResponse(BaseModel):
     model_config = {"protected_namespaces": ()}
     
@@ -111,4 +204,10 @@ class HealthResponse(BaseModel):
     service: str
     model: str
     model_status: str
-    model_error: Optional[str] = None
\ No newline at end of file
+    model_error: Optional[str] = None
+    storage: Optional[dict] = None
+    search: Optional[dict] = None
+    inference: Optional[Dict[str, dict]] = None
+    reload: Optional[dict] = None
+    history: Optional[dict] = None
+    namespaces: Optional[dict] = None
\ No newline at end of file
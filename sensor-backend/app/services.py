@@ -3,29 +3,105 @@ Business logic services for the semantic sensor API.
 All core functionality is implemented here, separated from HTTP concerns.
 """
 
-from typing import Dict, List, Tuple, Optional
+import base64
+import binascii
+import hashlib
+from bisect import bisect_right
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple, Optional
 from fastapi import HTTPException
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 
-from .validators import validate_name_id, validate_text_content, validate_paragraphs, validate_bulk_sensors
+from .cache import EmbeddingCache
+from .chunking import Chunker
+from .config import (
+    CHUNK_MAX_TOKENS, CHUNK_MIN_TOKENS, CHUNK_OVERLAP_TOKENS, EMBED_BATCH_SIZE,
+    LEXICAL_FAST_PATH
+)
+from .index import SearchIndex
+from .lexical import LexicalMatcher
+from .metrics import ENCODED_TEXTS, PARAGRAPH_ENCODE, QUERY_ENCODE, SCORING, VALIDATION
+from .namespaces import NamespaceBudgets
+from .store import EmbeddingStore, SensorData, normalize_rows, paragraph_key, top_k_indices
+from .validators import (
+    validate_name_id, validate_text_content, validate_paragraphs, validate_bulk_sensors, validate_verify_items
+)
+
+LIST_MODES = ("full", "summary", "names")
+
+
+def _sensor_digest(name_id: str, text: str) -> int:
+    # XOR-combined over all sensors, so one change updates the listing digest in constant time
+    digest = hashlib.blake2b(name_id.encode("utf-8") + b"\0" + text.encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest, "big")
 
 
 class SensorService:
     """Service class for managing text sensors and their embeddings."""
     
-    def __init__(self, model, text_store: dict, sensor_data_list: dict):
+    def __init__(
+        self,
+        model,
+        text_store: dict,
+        sensor_data_list: dict,
+        embedding_store: Optional[EmbeddingStore] = None,
+        search_index: Optional[SearchIndex] = None,
+        batch_size: int = EMBED_BATCH_SIZE,
+        query_cache: Optional[EmbeddingCache] = None,
+        snapshot=None,
+        chunker: Optional[Chunker] = None,
+        encoder_pool=None,
+        lexical: Optional[LexicalMatcher] = None,
+        namespaces: Optional[NamespaceBudgets] = None
+    ):
         """
         Initialize the sensor service.
         
         Args:
             model: The sentence transformer model
             text_store: Dictionary storing original text content
-            sensor_data_list: Dictionary storing (paragraph, embedding) pairs
+            sensor_data_list: Dictionary storing SensorData (paragraphs + embedding store rows)
+            embedding_store: Shared pool of paragraph embeddings (a private one is created if omitted)
+            search_index: Cross-sensor search index over the embedding store (created if omitted)
+            batch_size: Maximum number of paragraphs per model encode call
+            query_cache: Optional cache of query embeddings, rebound to this model
+            snapshot: Optional on-disk Snapshot journaling every create and delete
+            chunker: Splits paragraphs into the texts embedded (sized to the model's sequence length if omitted)
+            encoder_pool: Optional EncoderPool encoding large bulk batches in worker processes
+            lexical: Matcher answering exact repeats without the model (configured from the
+                environment if omitted)
+            namespaces: Optional per-namespace memory budgets; sensors over budget are evicted to disk
         """
         self.model = model
         self.text_store = text_store
         self.sensor_data_list = sensor_data_list
+        self.embedding_store = embedding_store if embedding_store is not None else EmbeddingStore()
+        self.search_index = search_index if search_index is not None else SearchIndex(self.embedding_store)
+        self.batch_size = max(1, batch_size)
+        self.query_cache = query_cache
+        self.snapshot = snapshot
+        self.chunker = chunker if chunker is not None else Chunker.for_model(
+            model, CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS, CHUNK_MIN_TOKENS
+        )
+        self.encoder_pool = encoder_pool
+        if lexical is None and LEXICAL_FAST_PATH:
+            lexical = LexicalMatcher()
+        self.lexical = lexical
+        self.namespaces = namespaces
+        # Set once a reloaded model's service has taken over; writes must go to the new one
+        self.retired = False
+        
+        # Content digest of every (nameId, text) for the listing ETag; equal across workers holding the same sensors
+        self._listing_digest = 0
+        for name_id, text in list(self.text_store.items()):
+            self._listing_digest ^= _sensor_digest(name_id, text)
+        # Sorted nameIds for cursor pagination, valid while no sensor has been added or removed
+        self._names_version = 0
+        self._sorted_names: Tuple[int, List[str]] = (-1, [])
+        
+        # Embeddings cached for a previous model are invalid for this one
+        if self.query_cache is not None:
+            self.query_cache.bind_model(model)
     
     def check_model_availability(self) -> None:
         """
@@ -56,18 +132,8 @@ class SensorService:
                     detail=f"Text sensor '{name_id}' is in corrupted state (text exists but no sensor data). Please recreate the sensor."
                 )
             else:
-                # Normal case: sensor doesn't exist
-                available_sensors = list(self.sensor_data_list.keys())
-                if available_sensors:
-                    raise HTTPException(
-                        status_code=404,
-                        detail=f"Text sensor '{name_id}' not found. Available sensors: {', '.join(available_sensors)}"
-                    )
-                else:
-                    raise HTTPException(
-                        status_code=404,
-                        detail=f"Text sensor '{name_id}' not found. No sensors have been created yet."
-                    )
+                # Normal case: sensor doesn't exist; the message never grows with the number of sensors
+                raise HTTPException(status_code=404, detail=f"Text sensor '{name_id}' not found")
     
     def split_text_into_paragraphs(self, text: str) -> List[str]:
         """
@@ -82,12 +148,45 @@ class SensorService:
         paragraphs = [p.strip() for p in text.split('\n') if p.strip()]
         return validate_paragraphs(paragraphs)
     
-    def generate_embeddings(self, paragraphs: List[str]) -> List[np.ndarray]:
+    def chunk_paragraphs(self, paragraphs: List[str]) -> Tuple[List[str], Optional[List[Tuple[int, int]]]]:
+        """
+        Texts to embed for the paragraphs of a sensor.
+        
+        Paragraphs longer than the model's sequence length are split into overlapping token
+        windows instead of being truncated, and short lines may be merged.
+        
+        Args:
+            paragraphs: Paragraph texts
+            
+        Returns:
+            Tuple[List[str], Optional[List[Tuple[int, int]]]]: Chunk texts and the (first, last)
+                paragraph of each chunk, or None when the chunks are the paragraphs
+        """
+        return self.chunker.chunk(paragraphs)
+    
+    @staticmethod
+    def _unique_chunks(
+        chunks: List[str], spans: Optional[List[Tuple[int, int]]]
+    ) -> Tuple[List[bytes], Dict[bytes, Tuple[str, int]]]:
+        # Key of every chunk, and per distinct key its text and first paragraph (for error messages)
+        keys = [paragraph_key(c) for c in chunks]
+        unique: Dict[bytes, Tuple[str, int]] = {}
+        for i, key in enumerate(keys):
+            if key not in unique:
+                unique[key] = (chunks[i], spans[i][0] if spans is not None else i)
+        return keys, unique
+    
+    def generate_embeddings(self, paragraphs: List[str], positions: Optional[List[int]] = None) -> List[np.ndarray]:
         """
         Generate embeddings for a list of paragraphs.
         
+        Paragraphs are sorted by length and encoded in batches of similar size,
+        so each forward pass carries little padding. Embeddings are returned in
+        the original paragraph order.
+        
         Args:
             paragraphs: List of paragraph texts
+            positions: Zero-based position of each paragraph in its sensor, used in error messages
             
         Returns:
             List[np.ndarray]: List of embeddings
@@ -97,23 +196,259 @@ class SensorService:
         """
         self.check_model_availability()
         
-        embeddings = []
-        for i, paragraph in enumerate(paragraphs):
+        if positions is None:
+            positions = list(range(len(paragraphs)))
+        
+        # Bucket paragraphs by length to keep padding inside each batch small
+        order = sorted(range(len(paragraphs)), key=lambda i: len(paragraphs[i]))
+        
+        embeddings: List[Optional[np.ndarray]] = [None] * len(paragraphs)
+        for start in range(0, len(order), self.batch_size):
+            bucket = order[start:start + self.batch_size]
+            batch = [paragraphs[i] for i in bucket]
             try:
-                embedding = self.model.encode(paragraph)
-                embeddings.append(embedding)
+                with PARAGRAPH_ENCODE.time():
+                    vectors = list(self.model.encode(batch, batch_size=len(batch)))
+                ENCODED_TEXTS.labels(kind="paragraph").inc(len(batch))
+            except Exception:
+                # Fall back to one paragraph at a time to report which one failed
+                vectors = [self._encode_paragraph(paragraphs[i], positions[i]) for i in bucket]
+            
+            for i, vector in zip(bucket, vectors):
+                embeddings[i] = vector
+        
+        return embeddings
+    
+    def encode_bulk(self, paragraphs: List[str]) -> List[np.ndarray]:
+        """
+        Generate embeddings for many paragraphs, across the encoder processes when there are enough.
+        
+        Falls back to generate_embeddings in this process for small batches, when the pool
+        encodes another model than the service's, or when the pool fails.
+        
+        Args:
+            paragraphs: List of paragraph texts
+            
+        Returns:
+            List[np.ndarray]: List of embeddings
+            
+        Raises:
+            HTTPException: If embedding generation fails
+        """
+        pool = self.encoder_pool
+        if pool is not None and len(paragraphs) >= pool.min_texts and pool.serves(self.model):
+            try:
+                with PARAGRAPH_ENCODE.time():
+                    vectors = pool.encode(paragraphs)
+                ENCODED_TEXTS.labels(kind="paragraph").inc(len(paragraphs))
+                return list(vectors)
             except Exception as e:
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Error generating embedding for paragraph {i+1}: {str(e)}"
+                print(f"Encoder pool failed, encoding in process instead: {e}")
+        return self.generate_embeddings(paragraphs)
+    
+    def _encode_paragraph(self, paragraph: str, index: int) -> np.ndarray:
+        """
+        Encode a single paragraph, reporting its position on failure.
+        
+        Args:
+            paragraph: Paragraph text
+            index: Zero-based position of the paragraph in the sensor text
+            
+        Returns:
+            np.ndarray: The paragraph embedding
+            
+        Raises:
+            HTTPException: If embedding generation fails
+        """
+        try:
+            return self.model.encode(paragraph)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error generating embedding for paragraph {index+1}: {str(e)}"
+            )
+    
+    @contextmanager
+    def _mutation(self) -> Iterator[None]:
+        """
+        Serialize a change to the sensors with every other writer, in this process and others.
+        
+        With a snapshot, records other workers wrote are applied first, so row allocation and
+        journal order stay consistent across processes.
+        """
+        with self.embedding_store.lock:
+            if self.retired:
+                raise self._retired_error()
+            if self.snapshot is None:
+                yield
+            else:
+                with self.snapshot.exclusive(self):
+                    yield
+    
+    @staticmethod
+    def _retired_error() -> HTTPException:
+        return HTTPException(
+            status_code=503,
+            detail="The model was reloaded while this request was running, please retry",
+            headers={"Retry-After": "1"}
+        )
+    
+    def publish_sensor(
+        self,
+        name_id: str,
+        text: str,
+        paragraphs: List[str],
+        embeddings: Optional[Dict[bytes, np.ndarray]] = None,
+        replace: bool = False,
+        chunking: Optional[Tuple[List[str], Optional[List[Tuple[int, int]]]]] = None
+    ) -> SensorData:
+        """
+        Reference the stored embedding of every paragraph, encoding only unseen ones, and store the sensor.
+        
+        Encoding runs outside the writer lock; only acquiring rows and publishing the sensor hold it.
+        
+        Args:
+            name_id: Validated sensor nameId
+            text: Validated original text
+            paragraphs: Paragraph texts of the sensor
+            embeddings: Embeddings already computed for some paragraph keys
+            replace: Only replace an existing sensor, failing if it was deleted meanwhile
+            chunking: Result of chunk_paragraphs for these paragraphs, if already computed
+            
+        Returns:
+            SensorData: The published sensor data
+            
+        Raises:
+            HTTPException: 404 if replace is set and the sensor no longer exists
+        """
+        chunks, spans = chunking if chunking is not None else self.chunk_paragraphs(paragraphs)
+        keys, unique = self._unique_chunks(chunks, spans)
+        
+        embeddings = dict(embeddings or {})
+        while True:
+            missing = [key for key in self.embedding_store.missing(keys) if key not in embeddings]
+            if missing:
+                vectors = self.generate_embeddings(
+                    [unique[key][0] for key in missing],
+                    positions=[unique[key][1] for key in missing]
                 )
+                embeddings.update(zip(missing, vectors))
+            with self._mutation():
+                try:
+                    rows = self.embedding_store.acquire(keys, embeddings)
+                except KeyError:
+                    # A paragraph was released by another sensor in the meantime; encode it too
+                    continue
+                if replace and name_id not in self.sensor_data_list:
+                    self.embedding_store.release(rows)
+                    self.check_sensor_exists(name_id, "update")
+                sensor_data = SensorData(paragraphs, rows, chunks if spans is not None else None, spans)
+                self.store_sensor(name_id, text, sensor_data)
+                return sensor_data
+    
+    def store_sensor(self, name_id: str, text: str, sensor_data: SensorData, persist: bool = True) -> None:
+        """
+        Publish sensor data, releasing the embeddings of any version it replaces.
         
-        return embeddings
+        Args:
+            name_id: Validated sensor nameId
+            text: Validated original text
+            sensor_data: Paragraphs and acquired embedding rows
+            persist: Whether to journal the sensor in the snapshot
+        """
+        with self._mutation() if persist else self.embedding_store.lock:
+            previous = self.sensor_data_list.get(name_id)
+            previous_text = self.text_store.get(name_id)
+            if previous_text is not None:
+                self._listing_digest ^= _sensor_digest(name_id, previous_text)
+            if previous is None:
+                self._names_version += 1
+            self.text_store[name_id] = text
+            self._listing_digest ^= _sensor_digest(name_id, text)
+            self.sensor_data_list[name_id] = sensor_data
+            if previous is not None and previous.resident:
+                self.search_index.remove_sensor(name_id, previous)
+            self.search_index.add_sensor(name_id, sensor_data)
+            if previous is not None and previous.resident:
+                self.embedding_store.release(previous.rows)
+            elif previous is not None and self.namespaces is not None:
+                self.namespaces.forget(name_id)
+            if persist and self.snapshot is not None:
+                self.snapshot.record_put(name_id, text, sensor_data)
+                self._maybe_compact_snapshot()
+            self._admit(name_id, sensor_data)
+    
+    def _admit(self, name_id: str, sensor_data: SensorData) -> None:
+        # Called with the store locked, once the sensor is resident
+        if self.namespaces is None:
+            return
+        size = len(sensor_data.rows) * self.embedding_store.row_bytes
+        for victim in self.namespaces.admit(name_id, size):
+            self._evict(victim)
+    
+    def _evict(self, name_id: str) -> None:
+        # Called with the store locked: the embeddings are handed to the namespace writer,
+        # paragraphs and lexical index stay
+        sensor_data = self.sensor_data_list.get(name_id)
+        if sensor_data is None or not sensor_data.resident:
+            return
+        self.namespaces.evict(name_id, self.embedding_store.vectors(sensor_data.rows))
+        self.sensor_data_list[name_id] = sensor_data.with_rows(None)
+        self.search_index.remove_sensor(name_id, sensor_data)
+        self.embedding_store.release(sensor_data.rows)
+    
+    def resident_sensor(self, name_id: str) -> Optional[SensorData]:
+        """
+        Sensor data with its embeddings in the store, reloading them from disk if they were evicted.
+        
+        Args:
+            name_id: Validated sensor nameId
+            
+        Returns:
+            Optional[SensorData]: The sensor data, or None if the sensor does not exist
+        """
+        while True:
+            sensor_data = self.sensor_data_list.get(name_id)
+            if sensor_data is None or self.namespaces is None:
+                return sensor_data
+            if sensor_data.resident:
+                self.namespaces.touch(name_id)
+                return sensor_data
+            
+            # Read outside the lock; the store is only locked to acquire the rows
+            try:
+                vectors = self.namespaces.read(name_id)
+            except FileNotFoundError:
+                if self.retired:
+                    # The files of a replaced service are removed once its readers are done
+                    raise self._retired_error()
+                if self.sensor_data_list.get(name_id) is sensor_data:
+                    raise
+                # Reloaded, replaced or deleted meanwhile
+                continue
+            with self.embedding_store.lock:
+                if self.sensor_data_list.get(name_id) is not sensor_data:
+                    continue
+                keys = [paragraph_key(chunk) for chunk in sensor_data.chunks]
+                rows = self.embedding_store.acquire(keys, dict(zip(keys, vectors)))
+                sensor_data = sensor_data.with_rows(rows)
+                self.sensor_data_list[name_id] = sensor_data
+                self.search_index.add_sensor(name_id, sensor_data)
+                self.namespaces.reloaded(name_id)
+                self._admit(name_id, sensor_data)
+                return sensor_data
+    
+    def _maybe_compact_snapshot(self) -> None:
+        # Called inside _mutation
+        if self.snapshot.needs_compaction(len(self.sensor_data_list)):
+            self.snapshot.compact(self)
     
     def create_sensor(self, name_id: str, text: str) -> dict:
         """
         Create a new text sensor with embeddings.
         
+        Paragraphs already stored for any sensor reuse their embedding instead of being encoded again.
+        
         Args:
             name_id: Unique identifier for the sensor
             text: Text content to create sensor from
@@ -122,27 +457,82 @@ class SensorService:
             dict: Creation result with paragraph count
         """
         # Validate inputs
-        validated_name_id = validate_name_id(name_id)
-        validated_text = validate_text_content(text)
+        with VALIDATION.time():
+            validated_name_id = validate_name_id(name_id)
+            validated_text = validate_text_content(text)
+            
+            # Split into paragraphs
+            paragraphs = self.split_text_into_paragraphs(validated_text)
         
-        # Store original text
-        self.text_store[validated_name_id] = validated_text
+        # Reference stored embeddings, generating only the missing ones, and store text and sensor data together
+        sensor_data = self.publish_sensor(validated_name_id, validated_text, paragraphs)
         
-        # Split into paragraphs
-        paragraphs = self.split_text_into_paragraphs(validated_text)
+        return {
+            "message": "Text sensor created",
+            "paragraphs_count": len(sensor_data)
+        }
+    
+    def update_sensor(self, name_id: str, text: str) -> dict:
+        """
+        Replace the text of an existing sensor.
         
-        # Generate embeddings
-        embeddings = self.generate_embeddings(paragraphs)
+        Embeddings are stored per paragraph content, so unchanged paragraphs (and paragraphs any
+        other sensor holds) keep their embedding; only new or edited paragraphs are encoded. The
+        new version replaces the old one in a single step.
         
-        # Create paired data structure
-        sensor_pairs = list(zip(paragraphs, embeddings))
+        Args:
+            name_id: Sensor to update
+            text: New text content
+            
+        Returns:
+            dict: Update result with the paragraph count, and the distinct paragraphs encoded and reused
+        """
+        with VALIDATION.time():
+            validated_name_id = validate_name_id(name_id)
+            validated_text = validate_text_content(text)
+            paragraphs = self.split_text_into_paragraphs(validated_text)
         
-        # Store paired data
-        self.sensor_data_list[validated_name_id] = sensor_pairs
+        self.check_sensor_exists(validated_name_id, "update")
         
+        # Saving an unchanged draft costs nothing
+        if self.text_store.get(validated_name_id) == validated_text:
+            return {
+                "message": f"Text sensor '{validated_name_id}' unchanged",
+                "paragraphs_count": len(paragraphs),
+                "paragraphs_encoded": 0,
+                "paragraphs_reused": len(set(paragraphs))
+            }
+        
+        # An evicted sensor's embeddings are loaded back from disk rather than encoded again
+        self.resident_sensor(validated_name_id)
+        chunking = self.chunk_paragraphs(paragraphs)
+        keys, unique = self._unique_chunks(*chunking)
+        missing = self.embedding_store.missing(keys)
+        embeddings: Dict[bytes, np.ndarray] = {}
+        if missing:
+            vectors = self.generate_embeddings(
+                [unique[key][0] for key in missing],
+                positions=[unique[key][1] for key in missing]
+            )
+            embeddings = dict(zip(missing, vectors))
+        
+        sensor_data = self.publish_sensor(
+            validated_name_id, validated_text, paragraphs, embeddings, replace=True, chunking=chunking
+        )
+        
+        # Counted per distinct paragraph; one is encoded when any chunk of it was
+        missing_keys = set(missing)
+        spans = chunking[1]
+        encoded = set()
+        for i, key in enumerate(keys):
+            if key in missing_keys:
+                first, last = spans[i] if spans is not None else (i, i)
+                encoded.update(paragraphs[first:last + 1])
         return {
-            "message": "Text sensor created",
-            "paragraphs_count": len(sensor_pairs)
+            "message": f"Text sensor '{validated_name_id}' updated",
+            "paragraphs_count": len(sensor_data),
+            "paragraphs_encoded": len(encoded),
+            "paragraphs_reused": len(set(paragraphs) - encoded)
         }
     
     def bulk_create_sensors(self, sensors_dict: dict) -> dict:
@@ -156,32 +546,289 @@ class SensorService:
             dict: Results with created, skipped, and failed lists
         """
         # Validate bulk input
-        validated_sensors = validate_bulk_sensors(sensors_dict)
+        with VALIDATION.time():
+            validated_sensors = validate_bulk_sensors(sensors_dict)
         
-        created = []
-        skipped = []
-        failed = []
+        results = self.create_sensors(list(validated_sensors.items()))
         
-        for name_id, text in validated_sensors.items():
-            try:
-                # Skip if sensor already exists
-                if name_id in self.sensor_data_list:
-                    skipped.append(name_id)
+        return {
+            "created": [r["name_id"] for r in results if r["status"] == "created"],
+            "skipped": [r["name_id"] for r in results if r["status"] == "skipped"],
+            "failed": [r["name_id"] for r in results if r["status"] == "failed"]
+        }
+    
+    def create_sensors(self, sensors: List[Tuple[str, str]]) -> List[dict]:
+        """
+        Create many text sensors, encoding the new paragraphs of all of them together.
+        
+        Each sensor is validated on its own, so one bad sensor does not fail the others.
+        nameIds that already exist, or appear earlier in the list, are skipped.
+        
+        Args:
+            sensors: (nameId, text) pairs
+            
+        Returns:
+            List[dict]: Per-sensor status (created, skipped or failed) with the paragraph
+                count or the error, in input order
+        """
+        results: List[dict] = []
+        pending: List[Tuple[int, str, str, List[str], tuple]] = []
+        seen = set()
+        with VALIDATION.time():
+            for i, (name_id, text) in enumerate(sensors):
+                results.append({"name_id": name_id})
+                try:
+                    validated_name_id = validate_name_id(name_id)
+                    results[i]["name_id"] = validated_name_id
+                    if validated_name_id in seen or validated_name_id in self.sensor_data_list:
+                        results[i]["status"] = "skipped"
+                        continue
+                    validated_text = validate_text_content(text)
+                    paragraphs = self.split_text_into_paragraphs(validated_text)
+                except HTTPException as e:
+                    results[i].update(status="failed", error=str(e.detail), status_code=e.status_code)
                     continue
-                
-                # Create the sensor
-                self.create_sensor(name_id, text)
-                created.append(name_id)
-                
+                seen.add(validated_name_id)
+                pending.append((i, validated_name_id, validated_text, paragraphs, self.chunk_paragraphs(paragraphs)))
+        
+        # Unique chunks not stored yet, encoded in one pass
+        texts: Dict[bytes, str] = {}
+        for _, _, _, _, (chunks, _) in pending:
+            for chunk in chunks:
+                texts.setdefault(paragraph_key(chunk), chunk)
+        missing = self.embedding_store.missing(texts)
+        embeddings: Dict[bytes, np.ndarray] = {}
+        if missing:
+            try:
+                embeddings = dict(zip(missing, self.encode_bulk([texts[key] for key in missing])))
+            except HTTPException:
+                # One paragraph cannot be encoded; publish_sensor below encodes per sensor and fails only its sensor
+                pass
+        
+        for i, name_id, text, paragraphs, chunking in pending:
+            try:
+                sensor_data = self.publish_sensor(name_id, text, paragraphs, embeddings, chunking=chunking)
+                results[i].update(status="created", paragraphs_count=len(sensor_data))
+            except HTTPException as e:
+                results[i].update(status="failed", error=str(e.detail), status_code=e.status_code)
             except Exception as e:
                 print(f"Error processing sensor {name_id}: {e}")
-                failed.append(name_id)
+                results[i].update(status="failed", error=str(e), status_code=500)
         
-        return {
-            "created": created,
-            "skipped": skipped,
-            "failed": failed
+        return results
+    
+    def lookup_query_embedding(self, text: str, count: bool = True) -> Optional[np.ndarray]:
+        """
+        Return the cached embedding of a query text, if any.
+        
+        Args:
+            text: Validated query text
+            count: Whether the lookup counts towards cache hit/miss statistics
+            
+        Returns:
+            Optional[np.ndarray]: Unit-length embedding, or None when not cached
+        """
+        if self.query_cache is None:
+            return None
+        return self.query_cache.get(text, count=count, model=self.model)
+    
+    def encode_queries(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode query texts in a single model call.
+        
+        Texts found in the query cache are not sent to the model.
+        
+        Args:
+            texts: Validated query texts
+            
+        Returns:
+            np.ndarray: Matrix of unit-length query embeddings, one row per text
+            
+        Raises:
+            HTTPException: If embedding generation fails
+        """
+        self.check_model_availability()
+        
+        # Callers usually checked the cache already, so these lookups are not counted again
+        cached = [self.lookup_query_embedding(text, count=False) for text in texts]
+        missing = [i for i, embedding in enumerate(cached) if embedding is None]
+        
+        if missing:
+            try:
+                with QUERY_ENCODE.time():
+                    embeddings = self.model.encode([texts[i] for i in missing], batch_size=len(missing))
+                ENCODED_TEXTS.labels(kind="query").inc(len(missing))
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"Error generating embedding for input text: {str(e)}")
+            
+            for i, embedding in zip(missing, normalize_rows(embeddings)):
+                cached[i] = embedding
+                if self.query_cache is not None:
+                    self.query_cache.put(texts[i], embedding, model=self.model)
+        
+        return np.stack(cached)
+    
+    def validate_similarity_request(self, input_text: str, name_id: str) -> Tuple[str, str]:
+        """
+        Validate a similarity check before any model work is done.
+        
+        Args:
+            input_text: Text to check similarity for
+            name_id: Sensor to compare against
+            
+        Returns:
+            Tuple[str, str]: The validated input text and nameId
+        """
+        with VALIDATION.time():
+            validated_name_id = validate_name_id(name_id)
+            validated_text = validate_text_content(input_text, max_length=5000, field_name="input text")
+            
+            # Check if sensor exists
+            self.check_sensor_exists(validated_name_id, "similarity check")
+        
+        return validated_text, validated_name_id
+    
+    def score_query(
+        self,
+        query_embedding: np.ndarray,
+        name_id: str,
+        top_k: int = 1,
+        threshold: Optional[float] = None,
+        first_match: bool = False
+    ) -> dict:
+        """
+        Find the paragraphs of a sensor closest to an already encoded query.
+        
+        Args:
+            query_embedding: Unit-length query embedding
+            name_id: Validated sensor nameId
+            top_k: Maximum number of ranked paragraphs to return
+            threshold: Minimum score of a returned paragraph
+            first_match: Stop scoring at the first paragraph reaching the threshold
+            
+        Returns:
+            dict: Similarity result with confidence score and matched paragraph, plus the ranked
+                matches when top_k or a threshold was requested
+        """
+        # Get stored sensor data (it may have been deleted since validation, or evicted to disk)
+        with self._scored_sensor(name_id) as sensor_data:
+            if sensor_data is None:
+                self.check_sensor_exists(name_id, "similarity check")
+            return self._score_sensor(
+                query_embedding, name_id, sensor_data, top_k, threshold, first_match
+            )
+    
+    @contextmanager
+    def _scored_sensor(self, name_id: str) -> Iterator[Optional[SensorData]]:
+        """
+        Resident sensor data whose rows stay referenced until the block exits.
+        
+        A concurrent eviction, update or delete then cannot free the rows and hand them to other
+        paragraphs while they are being scored.
+        
+        Args:
+            name_id: Validated sensor nameId
+            
+        Yields:
+            Optional[SensorData]: The sensor data, or None if the sensor does not exist
+        """
+        sensor_data = None
+        while True:
+            candidate = self.resident_sensor(name_id)
+            if candidate is None:
+                break
+            with self.embedding_store.lock:
+                # Evicted or replaced since it was looked up: look it up again
+                if self.sensor_data_list.get(name_id) is candidate:
+                    self.embedding_store.retain(candidate.rows)
+                    sensor_data = candidate
+                    break
+        try:
+            yield sensor_data
+        finally:
+            if sensor_data is not None:
+                self.embedding_store.release(sensor_data.rows)
+    
+    def _score_sensor(
+        self,
+        query_embedding: np.ndarray,
+        name_id: str,
+        sensor_data: SensorData,
+        top_k: int,
+        threshold: Optional[float],
+        first_match: bool
+    ) -> dict:
+        # Called with the sensor's rows retained
+        if not len(sensor_data):
+            raise HTTPException(status_code=404, detail=f"No sensor data found for text sensor '{name_id}'")
+        
+        # Score every paragraph with one matrix-vector product of unit vectors and rank only the best
+        try:
+            with SCORING.time():
+                if first_match and threshold is not None:
+                    ranked = [sensor_data.first_match(self.embedding_store, query_embedding, threshold)]
+                elif top_k > 1 or threshold is not None:
+                    ranked = sensor_data.top_matches(self.embedding_store, query_embedding, top_k, threshold)
+                else:
+                    ranked = [sensor_data.best_match(self.embedding_store, query_embedding)]
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error calculating similarity: {str(e)}")
+        
+        best_index, best_score = ranked[0]
+        result = {
+            "confidence_score": best_score,
+            "matched_paragraph": sensor_data.source(best_index),
+            "match_path": "embedding"
+        }
+        if top_k > 1 or threshold is not None:
+            result["matches"] = [
+                {"paragraph": sensor_data.source(index), "score": score}
+                for index, score in ranked
+                if threshold is None or score >= threshold
+            ]
+        if threshold is not None:
+            result["threshold"] = threshold
+            result["matched"] = best_score >= threshold
+        return result
+    
+    def lexical_match(
+        self, input_text: str, name_id: str, top_k: int = 1, threshold: Optional[float] = None
+    ) -> Optional[dict]:
+        """
+        Answer a similarity check without the model when the input repeats a stored paragraph exactly.
+        
+        Only single-result checks use the fast path; ranking several paragraphs needs their scores.
+        
+        Args:
+            input_text: Validated input text
+            name_id: Validated sensor nameId
+            top_k: Number of ranked paragraphs requested
+            threshold: Minimum score of a returned paragraph
+            
+        Returns:
+            Optional[dict]: Similarity result like score_query's with match_path exact and score 1.0,
+                or None when the embedding path must answer
+        """
+        if self.lexical is None or top_k > 1:
+            return None
+        sensor_data = self.sensor_data_list.get(name_id)
+        if sensor_data is None or not len(sensor_data):
+            return None
+        
+        with SCORING.time():
+            index = self.lexical.exact(input_text, sensor_data)
+        if index is None:
+            return None
+        result = {
+            "confidence_score": 1.0,
+            "matched_paragraph": sensor_data.paragraphs[index],
+            "match_path": "exact"
         }
+        if threshold is not None:
+            result["matches"] = [{"paragraph": result["matched_paragraph"], "score": 1.0}]
+            result["threshold"] = threshold
+            result["matched"] = True
+        return result
     
     def calculate_similarity(self, input_text: str, name_id: str) -> dict:
         """
@@ -194,48 +841,147 @@ class SensorService:
         Returns:
             dict: Similarity result with confidence score and matched paragraph
         """
-        # Validate inputs
-        validated_name_id = validate_name_id(name_id)
-        validated_text = validate_text_content(input_text, max_length=5000, field_name="input text")
+        validated_text, validated_name_id = self.validate_similarity_request(input_text, name_id)
         
-        # Check if sensor exists
-        self.check_sensor_exists(validated_name_id, "similarity check")
+        lexical = self.lexical_match(validated_text, validated_name_id)
+        if lexical is not None:
+            return lexical
         
-        # Generate embedding for input text
-        try:
-            input_embedding = self.model.encode(validated_text)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error generating embedding for input text: {str(e)}")
+        # Generate embedding for input text unless it is cached
+        input_embedding = self.lookup_query_embedding(validated_text)
+        if input_embedding is None:
+            input_embedding = self.encode_queries([validated_text])[0]
+        
+        return self.score_query(input_embedding, validated_name_id)
+    
+    def verify_batch(
+        self,
+        items: List[Tuple[str, str]],
+        top_k: int = 1,
+        threshold: Optional[float] = None,
+        first_match: bool = False
+    ) -> List[dict]:
+        """
+        Check many (nameId, text) pairs with a single model call.
         
-        # Get stored sensor data
-        sensor_pairs = self.sensor_data_list[validated_name_id]
+        Args:
+            items: (nameId, text) pairs, e.g. every smart field of a form
+            top_k: Maximum number of ranked paragraphs per item
+            threshold: Minimum score of a returned paragraph
+            first_match: Stop scoring a sensor at its first paragraph reaching the threshold
+            
+        Returns:
+            List[dict]: Per-item result or error, in request order
+        """
+        validate_verify_items(items)
         
-        if not sensor_pairs:
-            raise HTTPException(status_code=404, detail=f"No sensor data found for text sensor '{validated_name_id}'")
+        results: List[dict] = []
+        pending: List[Tuple[int, str, str]] = []
+        for i, (name_id, text) in enumerate(items):
+            results.append({"name_id": name_id})
+            try:
+                validated_text, validated_name_id = self.validate_similarity_request(text, name_id)
+            except HTTPException as e:
+                results[i].update(error=str(e.detail), status_code=e.status_code)
+                continue
+            lexical = self.lexical_match(validated_text, validated_name_id, top_k, threshold)
+            if lexical is not None:
+                results[i]["result"] = lexical
+                continue
+            pending.append((i, validated_text, validated_name_id))
         
-        # Calculate similarities
-        similarity_scores = []
-        for paragraph, stored_embedding in sensor_pairs:
+        # Encode every distinct uncached text together
+        embeddings: Dict[str, np.ndarray] = {}
+        for _, text, _ in pending:
+            if text not in embeddings:
+                cached = self.lookup_query_embedding(text)
+                if cached is not None:
+                    embeddings[text] = cached
+        missing = list(dict.fromkeys(text for _, text, _ in pending if text not in embeddings))
+        if missing:
             try:
-                # Reshape embeddings for cosine_similarity function
-                input_emb_reshaped = input_embedding.reshape(1, -1)
-                stored_emb_reshaped = stored_embedding.reshape(1, -1)
-                
-                # Calculate cosine similarity
-                similarity = cosine_similarity(input_emb_reshaped, stored_emb_reshaped)[0][0]
-                similarity_scores.append((similarity, paragraph))
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=f"Error calculating similarity: {str(e)}")
+                embeddings.update(zip(missing, self.encode_queries(missing)))
+            except HTTPException as e:
+                for i, text, _ in pending:
+                    if text not in embeddings:
+                        results[i].update(error=str(e.detail), status_code=e.status_code)
+                pending = [item for item in pending if item[1] in embeddings]
         
-        # Find best match
-        best_match = max(similarity_scores, key=lambda x: x[0])
-        highest_score, matched_paragraph = best_match
+        for i, text, name_id in pending:
+            try:
+                results[i]["result"] = self.score_query(embeddings[text], name_id, top_k, threshold, first_match)
+            except HTTPException as e:
+                results[i].update(error=str(e.detail), status_code=e.status_code)
+        
+        return results
+    
+    def search(self, query_embedding: np.ndarray, top_k: int) -> dict:
+        """
+        Find the best matching paragraphs across all sensors.
+        
+        Args:
+            query_embedding: Unit-length query embedding
+            top_k: Maximum number of hits to return
+            
+        Returns:
+            dict: Ranked hits and the search method used
+        """
+        method = self.search_index.method
+        try:
+            with SCORING.time():
+                # Evicted sensors first: one reloaded meanwhile is then found in the index instead
+                evicted = self._search_evicted(query_embedding, top_k)
+                hits = self.search_index.search(query_embedding, top_k)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error searching text sensors: {str(e)}")
+        
+        if evicted:
+            best = {}
+            for name_id, paragraph, score in hits + evicted:
+                if best.get((name_id, paragraph), -np.inf) < score:
+                    best[(name_id, paragraph)] = score
+            hits = sorted(
+                ((name_id, paragraph, score) for (name_id, paragraph), score in best.items()),
+                key=lambda hit: -hit[2]
+            )[:top_k]
         
         return {
-            "confidence_score": float(highest_score),
-            "matched_paragraph": matched_paragraph
+            "hits": [
+                {"name_id": name_id, "paragraph": paragraph, "score": score}
+                for name_id, paragraph, score in hits
+            ],
+            "method": method
         }
     
+    def _search_evicted(self, query_embedding: np.ndarray, top_k: int) -> List[Tuple[str, str, float]]:
+        # The index only holds resident sensors; evicted ones are scored from their files without reloading them
+        if self.namespaces is None or top_k <= 0:
+            return []
+        hits = []
+        for name_id in self.namespaces.evicted():
+            sensor_data = self.sensor_data_list.get(name_id)
+            if sensor_data is None or sensor_data.resident:
+                continue
+            try:
+                vectors = self.namespaces.read(name_id)
+            except FileNotFoundError:
+                if self.retired:
+                    raise self._retired_error()
+                # Reloaded, replaced or deleted meanwhile
+                continue
+            scores = vectors @ query_embedding
+            seen = set()
+            for chunk in top_k_indices(scores, len(scores)).tolist():
+                paragraph = sensor_data.source(chunk)
+                if paragraph not in seen:
+                    seen.add(paragraph)
+                    hits.append((name_id, paragraph, float(scores[chunk])))
+                    if len(seen) == top_k:
+                        break
+        return hits
+    
     def get_all_sensors(self) -> dict:
         """
         Get all stored sensors.
@@ -243,15 +989,82 @@ class SensorService:
         Returns:
             dict: All sensors with their text content and count
         """
-        sensors_mapping = {}
-        for name_id in self.sensor_data_list.keys():
-            if name_id in self.text_store:
-                sensors_mapping[name_id] = self.text_store[name_id]
+        return self.list_sensors()
+    
+    @property
+    def listing_etag(self) -> str:
+        """Weak ETag of the sensor listing; changes whenever a sensor is created, changed or removed."""
+        return f'W/"{len(self.sensor_data_list):x}-{self._listing_digest:032x}"'
+    
+    def _ordered_names(self) -> List[str]:
+        version, names = self._sorted_names
+        if version != self._names_version:
+            version = self._names_version
+            # Snapshot the keys: inference threads may add sensors while we sort
+            names = sorted(list(self.sensor_data_list))
+            self._sorted_names = (version, names)
+        return names
+    
+    def list_sensors(self, mode: str = "full", limit: Optional[int] = None, cursor: Optional[str] = None) -> dict:
+        """
+        List stored sensors, optionally one page at a time.
         
-        return {
-            "sensors": sensors_mapping,
-            "count": len(sensors_mapping)
-        }
+        Pages are ordered by nameId. Without limit and cursor every sensor is returned, in creation order.
+        
+        Args:
+            mode: full (nameId -> text), summary (nameId with paragraph and character counts) or names
+            limit: Maximum number of sensors in the page
+            cursor: next_cursor of the previous page
+            
+        Returns:
+            dict: The sensors of the page in the requested mode, their count, the total number of
+                sensors and the cursor of the next page (None on the last page)
+            
+        Raises:
+            HTTPException: If the mode or cursor is invalid
+        """
+        if mode not in LIST_MODES:
+            raise HTTPException(status_code=400, detail=f"Invalid mode '{mode}', expected one of {', '.join(LIST_MODES)}")
+        
+        next_cursor = None
+        if limit is None and cursor is None:
+            # Snapshot the keys: inference threads may add sensors while we iterate
+            names = list(self.sensor_data_list)
+        else:
+            ordered = self._ordered_names()
+            start = bisect_right(ordered, self._decode_cursor(cursor)) if cursor else 0
+            end = len(ordered) if limit is None else start + limit
+            names = ordered[start:end]
+            if names and end < len(ordered):
+                next_cursor = base64.urlsafe_b64encode(names[-1].encode("utf-8")).decode("ascii").rstrip("=")
+        
+        result = {"total": len(self.sensor_data_list), "next_cursor": next_cursor}
+        if mode == "names":
+            page = [name for name in names if name in self.sensor_data_list]
+            result["names"] = page
+        elif mode == "summary":
+            page = []
+            for name_id in names:
+                sensor_data = self.sensor_data_list.get(name_id)
+                text = self.text_store.get(name_id)
+                if sensor_data is not None and text is not None:
+                    page.append({"name_id": name_id, "paragraphs_count": len(sensor_data), "characters": len(text)})
+            result["summaries"] = page
+        else:
+            page = {}
+            for name_id in names:
+                text = self.text_store.get(name_id)
+                if text is not None:
+                    page[name_id] = text
+            result["sensors"] = page
+        result["count"] = len(page)
+        return result
+    
+    def _decode_cursor(self, cursor: str) -> str:
+        try:
+            return base64.b64decode(cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True).decode("utf-8")
+        except (binascii.Error, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
     
     def delete_sensor(self, name_id: str) -> dict:
         """
@@ -269,11 +1082,41 @@ class SensorService:
         # Check if sensor exists
         self.check_sensor_exists(validated_name_id, "deletion")
         
-        # Remove from both stores
-        if validated_name_id in self.text_store:
-            del self.text_store[validated_name_id]
+        # Remove from both stores and release the sensor's embeddings
+        self.remove_sensor(validated_name_id)
         
-        if validated_name_id in self.sensor_data_list:
-            del self.sensor_data_list[validated_name_id]
+        return {"message": f"Text sensor '{validated_name_id}' deleted successfully"}
+    
+    def remove_sensor(self, name_id: str, persist: bool = True) -> None:
+        """
+        Remove a sensor from both stores and release its embeddings.
         
-        return {"message": f"Text sensor '{validated_name_id}' deleted successfully"}
\ No newline at end of file
+        Args:
+            name_id: Validated sensor nameId
+            persist: Whether to journal the deletion in the snapshot
+        """
+        with self._mutation() if persist else self.embedding_store.lock:
+            text = self.text_store.pop(name_id, None)
+            if text is not None:
+                self._listing_digest ^= _sensor_digest(name_id, text)
+            sensor_data = self.sensor_data_list.pop(name_id, None)
+            if sensor_data is not None:
+                self._names_version += 1
+                if sensor_data.resident:
+                    self.search_index.remove_sensor(name_id, sensor_data)
+                    self.embedding_store.release(sensor_data.rows)
+                if self.namespaces is not None:
+                    self.namespaces.forget(name_id)
+            if persist and self.snapshot is not None:
+                self.snapshot.record_delete(name_id)
+                self._maybe_compact_snapshot()
+    
+    def retire(self) -> None:
+        """Refuse further changes; a service for a reloaded model has replaced this one."""
+        with self.embedding_store.lock:
+            self.retired = True
+    
+    def sync(self) -> None:
+        """Apply sensor changes made by other worker processes sharing the snapshot."""
+        if self.snapshot is not None:
+            self.snapshot.sync(self)
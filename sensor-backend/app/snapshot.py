@@ -0,0 +1,497 @@
+"""
+On-disk snapshot of sensors and their embeddings.
+Embeddings live in a memory-mapped matrix file; an append-only NDJSON journal records
+which sensors exist and which matrix rows hold their paragraphs, so restarts need no re-embedding.
+The journal doubles as a change feed, letting several worker processes share one snapshot.
+"""
+
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .store import MappedEmbeddingStore, SensorData, paragraph_key
+
+META_FILE = "meta.json"
+# Matrix file per row dtype, so a file is never read as rows of another width
+MATRIX_FILES = {"float32": "embeddings.f32", "float16": "embeddings.f16"}
+JOURNAL_FILE = "journal.ndjson"
+LOCK_FILE = "journal.lock"
+
+
+class Snapshot:
+    """Persists the embedding store and sensor definitions in a directory."""
+
+    def __init__(
+        self,
+        directory: str,
+        model_name: str,
+        compact_min_records: int = 10000,
+        shared: bool = False,
+        precision: str = "float32",
+        rerank_candidates: int = 16,
+        backend: str = "torch",
+        quantization: Optional[str] = None,
+    ):
+        """
+        Open (or create) a snapshot directory.
+
+        A snapshot written with a different model, backend, quantization or matrix dtype is discarded:
+        its embeddings are not usable, so sensors are restored from their text and re-embedded instead.
+
+        Args:
+            directory: Directory holding the snapshot files
+            model_name: Identity of the model producing the embeddings
+            compact_min_records: Journal length below which compaction is never triggered
+            shared: Whether other processes use the snapshot at the same time; freed rows are
+                then only overwritten after two compactions, since another worker may still be reading them
+            precision: Storage precision of the embeddings (float16 halves the matrix file;
+                int8 keeps a float32 file for re-ranking and int8 codes in memory)
+            rerank_candidates: Candidates re-scored at full precision per result with int8 precision
+            backend: Runtime expected to produce the embeddings (torch or onnx)
+            quantization: ONNX dynamic quantization config expected, if any
+        """
+        self.directory = directory
+        self.model_name = model_name
+        self.backend = backend
+        self.quantization = quantization
+        self.compact_min_records = max(1, compact_min_records)
+        self.shared = shared
+        self.precision = precision
+        self.rerank_candidates = rerank_candidates
+        self.dtype = "float16" if precision == "float16" else "float32"
+        self.matrix_file = MATRIX_FILES[self.dtype]
+        os.makedirs(directory, exist_ok=True)
+
+        # Writers serialize on an flock; the depth makes exclusive() re-entrant within a process
+        self._lock_fd = os.open(self._path(LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+        self._depth = 0
+
+        with self._file_lock():
+            meta = self._read_meta()
+            self.model_matches = self._matches(meta)
+            if meta is not None and not self.model_matches:
+                print(
+                    f"Snapshot in {directory} was written by model {meta.get('model')!r} "
+                    f"({meta.get('backend', 'torch')}, quantization {meta.get('quantization')}) "
+                    f"as {meta.get('dtype', 'float32')}, re-embedding sensors"
+                )
+                self._discard_vectors()
+            self.dim: Optional[int] = meta.get("dim") if self.model_matches else None
+
+        self.store = self._create_store(self._path(self.matrix_file), self.dim)
+
+        self._journal = self._open_journal()
+        self._offset = 0
+        self._records = 0
+        # Rows free at the last checkpoint; those still free at the next one may be reused (shared mode)
+        self._checkpoint_free: List[int] = []
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _create_store(self, path: str, dim: Optional[int]) -> MappedEmbeddingStore:
+        return MappedEmbeddingStore(
+            path, dim=dim, reuse_rows=not self.shared,
+            precision=self.precision, rerank_candidates=self.rerank_candidates
+        )
+
+    def _matches(self, meta: Optional[dict]) -> bool:
+        # Snapshots from before backends were recorded were all written by torch
+        return (
+            meta is not None
+            and meta.get("model") == self.model_name
+            and meta.get("dtype", "float32") == self.dtype
+            and meta.get("backend", "torch") == self.backend
+            and meta.get("quantization") == self.quantization
+        )
+
+    def _discard_vectors(self) -> None:
+        # The old vectors are useless; the journal still holds every sensor's text
+        for name in (*MATRIX_FILES.values(), META_FILE):
+            if os.path.exists(self._path(name)):
+                os.remove(self._path(name))
+
+    def _open_journal(self) -> int:
+        return os.open(self._path(JOURNAL_FILE), os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _read_meta(self) -> Optional[dict]:
+        try:
+            with open(self._path(META_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, dim: int) -> None:
+        tmp = self._path(META_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({
+                "model": self.model_name, "dim": dim, "dtype": self.dtype,
+                "backend": self.backend, "quantization": self.quantization
+            }, f)
+        os.replace(tmp, self._path(META_FILE))
+        self.dim = dim
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    @contextmanager
+    def exclusive(self, service) -> Iterator[None]:
+        """
+        Hold the cross-process writer lock, caught up with every other writer.
+
+        Callers must hold the store lock.
+
+        Args:
+            service: SensorService receiving the records written by other processes
+        """
+        self._depth += 1
+        try:
+            if self._depth == 1:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+                self._catch_up(service)
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _read_records(self) -> List[dict]:
+        # Only complete lines are consumed; one still being written is picked up next time
+        size = os.fstat(self._journal).st_size
+        if size <= self._offset:
+            return []
+        data = os.pread(self._journal, size - self._offset, self._offset)
+        end = data.rfind(b"\n") + 1
+        self._offset += end
+
+        records = []
+        for line in data[:end].splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # A torn line from a crash is ignored
+                continue
+        self._records += len(records)
+        return records
+
+    def _journal_replaced(self) -> bool:
+        try:
+            return os.stat(self._path(JOURNAL_FILE)).st_ino != os.fstat(self._journal).st_ino
+        except FileNotFoundError:
+            return False
+
+    def _new_records(self) -> List[dict]:
+        records = self._read_records()
+        if not self._journal_replaced():
+            return records
+
+        # Another process compacted the journal. Nobody appends to the old file any more, so it is
+        # drained first; the compacted prefix restates state we already hold and is skipped.
+        records += self._read_records()
+        os.close(self._journal)
+        self._journal = self._open_journal()
+        self._offset = 0
+        self._records = 0
+        compacted = self._read_records()
+        for i, record in enumerate(compacted):
+            if record.get("op") == "checkpoint":
+                self._apply_checkpoint(record)
+                return records + compacted[i + 1:]
+        return records + compacted
+
+    def _apply_checkpoint(self, record: dict) -> None:
+        # Rows registered by later records are taken back out of the reusable set
+        self._checkpoint_free = record.get("free", [])
+        if self.shared:
+            self.store.allow_reuse(record.get("reusable", []))
+
+    def has_changes(self) -> bool:
+        """
+        Cheap check for records written by other processes.
+
+        Returns:
+            bool: True when the journal grew or was replaced since it was last read
+        """
+        try:
+            return os.fstat(self._journal).st_size > self._offset or self._journal_replaced()
+        except OSError:
+            # The journal is being reopened after a compaction; let sync find out under the lock
+            return True
+
+    def _catch_up(self, service) -> None:
+        records = self._new_records()
+        if records:
+            self._apply(records, service)
+
+    def _apply(self, records: List[dict], service) -> None:
+        if self.dim is None:
+            meta = self._read_meta()
+            self.dim = meta.get("dim") if meta else None
+        if self.dim is not None:
+            self.store.refresh(self.dim)
+
+        for record in records:
+            op = record.get("op")
+            if op == "put":
+                chunks = record.get("chunks") or record["paragraphs"]
+                keys = [paragraph_key(c) for c in chunks]
+                self.store.register(keys, record["rows"])
+                rows = self.store.acquire(keys, {})
+                sensor_data = SensorData(record["paragraphs"], rows, record.get("chunks"), record.get("spans"))
+                service.store_sensor(record["name_id"], record["text"], sensor_data, persist=False)
+            elif op == "del":
+                service.remove_sensor(record["name_id"], persist=False)
+
+    def sync(self, service) -> None:
+        """
+        Apply the records other processes have written since the journal was last read.
+
+        Args:
+            service: SensorService sharing this snapshot's store
+        """
+        if not self.has_changes():
+            return
+        with service.embedding_store.lock:
+            self._catch_up(service)
+
+    def restore(self, service) -> int:
+        """
+        Load every journaled sensor into a service without re-embedding it.
+
+        Sensors whose embeddings are unusable (model change, missing rows) are re-created from text.
+
+        Args:
+            service: SensorService sharing this snapshot's store
+
+        Returns:
+            int: Number of sensors restored
+        """
+        with service.embedding_store.lock:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            self._depth += 1
+            try:
+                restored = self._restore(service)
+            finally:
+                self._depth -= 1
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+        print(f"Restored {restored} text sensors from snapshot in {self.directory}")
+        return restored
+
+    def _restore(self, service) -> int:
+        # The loaded model is the authority: e.g. a backend failing its parity check falls back to torch
+        self._adopt_identity(service.model)
+
+        # Another worker may have re-embedded a discarded snapshot while we waited for the lock
+        meta = self._read_meta()
+        if self._matches(meta):
+            self.model_matches = True
+            self.dim = meta.get("dim")
+        elif meta is not None:
+            print(
+                f"Snapshot in {self.directory} was written by the {meta.get('backend', 'torch')} backend, "
+                f"not the loaded {self.backend} one, re-embedding sensors"
+            )
+            # Rewritten for the loaded model by the compaction that ends the restore
+            os.remove(self._path(META_FILE))
+            self.model_matches = False
+
+        # The journal's final state: last put wins, deletes remove
+        sensors: Dict[str, dict] = {}
+        checkpoint = None
+        for record in self._new_records():
+            if record.get("op") == "put":
+                sensors[record["name_id"]] = record
+            elif record.get("op") == "del":
+                sensors.pop(record["name_id"], None)
+            elif record.get("op") == "checkpoint":
+                checkpoint = record
+
+        if self.dim is not None:
+            self.store.refresh(self.dim)
+
+        restored = 0
+        failed = 0
+        for name_id, record in sensors.items():
+            text, rows = record["text"], record.get("rows", [])
+            chunks = record.get("chunks") or record["paragraphs"]
+            try:
+                if not self.model_matches or len(rows) != len(chunks):
+                    raise KeyError(name_id)
+                keys = [paragraph_key(c) for c in chunks]
+                self.store.register(keys, rows)
+                acquired = self.store.acquire(keys, {})
+                sensor_data = SensorData(record["paragraphs"], acquired, record.get("chunks"), record.get("spans"))
+                service.store_sensor(name_id, text, sensor_data, persist=False)
+            except KeyError:
+                try:
+                    service.create_sensor(name_id, text)
+                except Exception as e:
+                    print(f"Could not restore text sensor '{name_id}': {e}")
+                    failed += 1
+                    continue
+            restored += 1
+
+        if not self.shared:
+            self.store.reclaim()
+        elif checkpoint is not None and self.model_matches:
+            self._apply_checkpoint(checkpoint)
+        # Compacting would drop the journal entries of sensors that failed to restore
+        if not failed:
+            self.compact(service)
+        return restored
+
+    def _adopt_identity(self, model) -> None:
+        # Record the backend and quantization a loaded model actually runs with
+        self.backend = getattr(model, "backend", "torch")
+        self.quantization = getattr(model, "quantization", None)
+
+    def _append(self, records: List[dict]) -> None:
+        # Writers hold the exclusive lock and are caught up, so the journal ends where we stopped reading
+        data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8")
+        os.write(self._journal, data)
+        self._offset += len(data)
+        self._records += len(records)
+
+    @staticmethod
+    def _put_record(name_id: str, text: str, sensor_data: SensorData) -> dict:
+        record = {
+            "op": "put",
+            "name_id": name_id,
+            "text": text,
+            "paragraphs": list(sensor_data.paragraphs),
+            "rows": np.asarray(sensor_data.rows).tolist(),
+        }
+        # Rows belong to the chunks; they are only written when chunking changed the paragraphs
+        if sensor_data.spans is not None:
+            record["chunks"] = list(sensor_data.chunks)
+            record["spans"] = [list(span) for span in sensor_data.spans]
+        return record
+
+    def record_put(self, name_id: str, text: str, sensor_data: SensorData) -> None:
+        """
+        Journal a created or replaced sensor.
+
+        Args:
+            name_id: Sensor nameId
+            text: Original text
+            sensor_data: The sensor's paragraphs and the matrix rows of their embeddings
+        """
+        if not os.path.exists(self._path(META_FILE)):
+            self._write_meta(int(self.store.matrix.shape[1]))
+        self._append([self._put_record(name_id, text, sensor_data)])
+
+    def record_delete(self, name_id: str) -> None:
+        """
+        Journal a deleted sensor.
+
+        Args:
+            name_id: Sensor nameId
+        """
+        self._append([{"op": "del", "name_id": name_id}])
+
+    def needs_compaction(self, sensor_count: int) -> bool:
+        """
+        Whether the journal has grown well beyond the live state it describes.
+
+        Args:
+            sensor_count: Live sensors
+
+        Returns:
+            bool: True when at least half of the journal is superseded
+        """
+        return self._records >= max(self.compact_min_records, 2 * sensor_count)
+
+    def compact(self, service) -> None:
+        """
+        Rewrite the journal with only the live state and flush the matrix.
+
+        Callers hold the store lock and the writer lock, so the rewritten journal matches
+        the in-memory state of every process exactly.
+
+        Args:
+            service: SensorService whose sensors are persisted
+        """
+        records = [
+            self._put_record(name_id, service.text_store.get(name_id, ""), sensor_data)
+            for name_id, sensor_data in service.sensor_data_list.items()
+        ]
+        checkpoint = {"op": "checkpoint"}
+        if self.shared:
+            # Rows already free at the previous checkpoint have been released by every worker since:
+            # each one replays the journal before its next request
+            free = self.store.free_rows()
+            checkpoint["free"] = free
+            checkpoint["reusable"] = sorted(set(self._checkpoint_free).intersection(free))
+        records.append(checkpoint)
+
+        self.store.flush()
+        if self.store.matrix is not None and not os.path.exists(self._path(META_FILE)):
+            self._write_meta(int(self.store.matrix.shape[1]))
+
+        tmp = self._path(JOURNAL_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._path(JOURNAL_FILE))
+
+        os.close(self._journal)
+        self._journal = self._open_journal()
+        self._offset = os.fstat(self._journal).st_size
+        self._records = len(records)
+        self._apply_checkpoint(checkpoint)
+
+    def rebuild_store(self) -> MappedEmbeddingStore:
+        """
+        Empty store for embeddings of a reloaded model, backed by a file next to the current matrix.
+
+        Returns:
+            MappedEmbeddingStore: Store to pass to adopt once it is filled
+        """
+        path = self._path(self.matrix_file + ".rebuild")
+        if os.path.exists(path):
+            os.remove(path)
+        return self._create_store(path, None)
+
+    def adopt(self, service) -> None:
+        """
+        Make a service built on rebuild_store() the one the snapshot persists.
+
+        meta.json is removed first: a crash before the new journal is in place then makes the next
+        start re-embed sensors from their text instead of reading rows of the wrong matrix.
+
+        Args:
+            service: Service whose embedding store came from rebuild_store()
+        """
+        store = service.embedding_store
+        with store.lock, self._file_lock():
+            if os.path.exists(self._path(META_FILE)):
+                os.remove(self._path(META_FILE))
+            store.flush()
+            os.replace(store.path, self._path(self.matrix_file))
+            store.path = self._path(self.matrix_file)
+
+            self.store = store
+            self._adopt_identity(service.model)
+            self.model_matches = True
+            self.dim = None
+            # Rows of the replaced matrix say nothing about the new one
+            self._checkpoint_free = []
+            # Writes meta.json once the journal matches the new matrix
+            self.compact(service)
+        service.snapshot = self
+
+    def close(self) -> None:
+        """Flush the matrix and close the journal."""
+        self.store.flush()
+        os.close(self._journal)
+        os.close(self._lock_fd)
@@ -0,0 +1,714 @@
+"""
+Storage structures for sensor embeddings.
+Paragraph embeddings live once in a content-addressed, reference-counted pool;
+each sensor keeps its paragraphs and the pool rows holding their embeddings.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+PRECISIONS = ("float32", "float16", "int8")
+
+# Rows scored per block when scanning the whole store, bounding the upcast temporaries
+SCORE_BLOCK_ROWS = 1024
+
+# Chunks of one sensor scored per block in first-match mode, before checking for a match
+FIRST_MATCH_BLOCK_ROWS = 64
+
+
+def normalize_rows(embeddings: Union[np.ndarray, Sequence[np.ndarray]]) -> np.ndarray:
+    """
+    Stack embeddings into a contiguous float32 matrix of L2-normalized rows.
+
+    Args:
+        embeddings: 2-D array or sequence of 1-D embedding vectors
+
+    Returns:
+        np.ndarray: Matrix of shape (n, dim); zero vectors stay zero
+    """
+    matrix = np.array(embeddings, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return np.ascontiguousarray(matrix)
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-vector scaled int8 quantization.
+
+    Args:
+        vectors: Matrix of float rows
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: int8 codes and the float32 scale of each row (row ~= codes * scale)
+    """
+    peaks = np.abs(vectors).max(axis=1) if len(vectors) else np.empty(0, dtype=np.float32)
+    scales = np.where(peaks > 0, peaks / 127.0, 1.0).astype(np.float32)
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first, without sorting every score.
+
+    Args:
+        scores: 1-D score array
+        k: Number of indices wanted
+
+    Returns:
+        np.ndarray: Up to k indices ordered by descending score
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def paragraph_key(paragraph: str) -> bytes:
+    """
+    Content address of a paragraph.
+
+    Args:
+        paragraph: Paragraph text
+
+    Returns:
+        bytes: 16-byte BLAKE2b digest of the UTF-8 text
+    """
+    return hashlib.blake2b(paragraph.encode("utf-8"), digest_size=16).digest()
+
+
+class EmbeddingStore:
+    """Reference-counted pool of normalized paragraph embeddings, keyed by paragraph hash."""
+
+    def __init__(
+        self,
+        initial_capacity: int = 1024,
+        reuse_rows: bool = True,
+        precision: str = "float32",
+        rerank_candidates: int = 16,
+    ):
+        """
+        Initialize an empty store.
+
+        With int8 precision the resident int8 codes score every candidate and only the best
+        ones are re-scored from the full-precision rows, which are read from the matrix on demand.
+
+        Args:
+            initial_capacity: Number of rows allocated once the embedding size is known
+            reuse_rows: Whether freed rows are handed out again
+            precision: Storage precision of the embeddings: float32, float16 or int8
+            rerank_candidates: Candidates re-scored at full precision per result with int8 precision
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown embedding precision {precision!r}")
+        self.initial_capacity = max(1, initial_capacity)
+        self.reuse_rows = reuse_rows
+        self.precision = precision
+        self.rerank_candidates = max(1, rerank_candidates)
+        # The matrix holds full-precision rows, except with float16 where it is the only copy
+        self.dtype = np.dtype(np.float16 if precision == "float16" else np.float32)
+        # Guards the pool and lets callers swap sensor entries atomically with it
+        self.lock = threading.RLock()
+
+        self._matrix = None
+        self._size = 0
+        self._free: List[int] = []
+        # Freed rows that may be handed out again without reuse_rows, see allow_reuse
+        self._reusable: Set[int] = set()
+        self._rows: Dict[bytes, int] = {}
+        self._row_keys: Dict[int, bytes] = {}
+        self._refs: Dict[int, int] = {}
+        # int8 codes and per-row scales, swapped together so readers never see a mismatched pair
+        self._quantized: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @property
+    def quantized(self) -> bool:
+        """Whether scores are approximate and need re-ranking at full precision."""
+        return self.precision == "int8"
+
+    @property
+    def row_bytes(self) -> int:
+        """Memory per embedding row, including int8 codes and scale when quantized; 0 before the first row."""
+        if self._matrix is None:
+            return 0
+        dim = int(self._matrix.shape[1])
+        return dim * self.dtype.itemsize + (dim + 4 if self.quantized else 0)
+
+    @property
+    def dim(self) -> Optional[int]:
+        """Embedding size, once known."""
+        return None if self._matrix is None else int(self._matrix.shape[1])
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Backing matrix; rows not referenced by any sensor hold stale data."""
+        return self._matrix
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def size(self) -> int:
+        """Number of rows ever handed out; rows at or beyond it are unused."""
+        return self._size
+
+    def missing(self, keys: Iterable[bytes]) -> List[bytes]:
+        """
+        Keys whose embeddings are not stored yet, without duplicates.
+
+        Args:
+            keys: Paragraph keys
+
+        Returns:
+            List[bytes]: Unknown keys in first-seen order
+        """
+        with self.lock:
+            return list(dict.fromkeys(key for key in keys if key not in self._rows))
+
+    def acquire(self, keys: Sequence[bytes], embeddings: Dict[bytes, np.ndarray]) -> np.ndarray:
+        """
+        Take one reference per key, storing the embeddings of keys not seen before.
+
+        Args:
+            keys: Paragraph keys in sensor order
+            embeddings: Normalized embeddings for keys that may be missing from the store
+
+        Returns:
+            np.ndarray: Row index of each key
+
+        Raises:
+            KeyError: If a key is neither stored nor provided
+        """
+        with self.lock:
+            new_keys = [key for key in dict.fromkeys(keys) if key not in self._rows]
+            for key in new_keys:
+                if key not in embeddings:
+                    raise KeyError("No embedding provided for a new paragraph")
+
+            for key, row in zip(new_keys, self._allocate(len(new_keys), embeddings, new_keys)):
+                self._rows[key] = row
+                self._row_keys[row] = key
+                self._refs[row] = 0
+
+            rows = np.fromiter((self._rows[key] for key in keys), dtype=np.int64, count=len(keys))
+            for row in rows.tolist():
+                self._refs[row] += 1
+            return rows
+
+    def release(self, rows: np.ndarray) -> None:
+        """
+        Drop one reference per row, freeing rows nobody references any more.
+
+        Args:
+            rows: Row indices previously returned by acquire
+        """
+        with self.lock:
+            for row in rows.tolist():
+                self._refs[row] -= 1
+                if self._refs[row] == 0:
+                    del self._refs[row]
+                    del self._rows[self._row_keys.pop(row)]
+                    self._free.append(row)
+
+    def retain(self, rows: np.ndarray) -> None:
+        """
+        Take one more reference per row already referenced, e.g. to keep a sensor's rows from being
+        handed to other paragraphs while it is scored; drop it again with release.
+
+        Args:
+            rows: Row indices referenced by a current sensor
+        """
+        with self.lock:
+            for row in rows.tolist():
+                self._refs[row] += 1
+
+    def _allocate(self, count: int, embeddings: Dict[bytes, np.ndarray], keys: List[bytes]) -> List[int]:
+        if not count:
+            return []
+        vectors = normalize_rows([embeddings[key] for key in keys])
+
+        if self._matrix is None:
+            self._matrix = self._create_matrix(max(self.initial_capacity, count), vectors.shape[1])
+
+        # Reuse freed rows when they cover the whole request, otherwise append one contiguous block
+        if self.reuse_rows and len(self._free) >= count:
+            self._free.sort(reverse=True)
+            rows = [self._free.pop() for _ in range(count)]
+        elif not self.reuse_rows and len(self._reusable) >= count:
+            rows = sorted(self._reusable)[:count]
+            self._reusable.difference_update(rows)
+            taken = set(rows)
+            self._free = [row for row in self._free if row not in taken]
+        else:
+            rows = list(range(self._size, self._size + count))
+            self._size += count
+            if self._size > len(self._matrix):
+                # Readers holding the old matrix keep a valid (if smaller) array
+                self._matrix = self._grow_matrix(max(self._size, 2 * len(self._matrix)))
+
+        self._matrix[rows] = vectors
+        if self.quantized:
+            self._quantize(rows, vectors)
+        return rows
+
+    def _quantize(self, rows: List[int], vectors: np.ndarray) -> None:
+        codes, scales = self._quantized if self._quantized is not None else (None, None)
+        if codes is None or len(codes) < len(self._matrix):
+            grown_codes = np.zeros((len(self._matrix), self._matrix.shape[1]), dtype=np.int8)
+            grown_scales = np.ones(len(self._matrix), dtype=np.float32)
+            if codes is not None:
+                grown_codes[:len(codes)] = codes
+                grown_scales[:len(scales)] = scales
+            codes, scales = grown_codes, grown_scales
+        codes[rows], scales[rows] = quantize_int8(vectors)
+        self._quantized = (codes, scales)
+
+    def _create_matrix(self, capacity: int, dim: int) -> np.ndarray:
+        return np.zeros((capacity, dim), dtype=self.dtype)
+
+    def _grow_matrix(self, capacity: int) -> np.ndarray:
+        grown = np.zeros((capacity, self._matrix.shape[1]), dtype=self.dtype)
+        grown[:len(self._matrix)] = self._matrix
+        return grown
+
+    def reclaim(self) -> None:
+        """Free every row below the high-water mark that no sensor references, e.g. after a restore."""
+        with self.lock:
+            for row in [row for row, refs in self._refs.items() if refs == 0]:
+                del self._refs[row]
+                del self._rows[self._row_keys.pop(row)]
+            self._free = [row for row in range(self._size) if row not in self._refs]
+
+    def free_rows(self) -> List[int]:
+        """
+        Rows below the high-water mark that no sensor references.
+
+        Returns:
+            List[int]: Row indices, ascending
+        """
+        with self.lock:
+            return [row for row in range(self._size) if row not in self._refs]
+
+    def allow_reuse(self, rows: Iterable[int]) -> None:
+        """
+        Let a store without reuse_rows hand out freed rows again, once no other process can still read them.
+
+        Rows referenced meanwhile are skipped.
+
+        Args:
+            rows: Row indices
+        """
+        with self.lock:
+            self._reusable = {row for row in rows if row < self._size and row not in self._refs}
+
+    def key_rows(self) -> Dict[bytes, int]:
+        """
+        Current paragraph key -> row mapping.
+
+        Returns:
+            Dict[bytes, int]: A copy of the mapping
+        """
+        with self.lock:
+            return dict(self._rows)
+
+    def gather(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Stored matrix rows, as a view when the rows are consecutive.
+
+        Args:
+            rows: Row indices
+
+        Returns:
+            np.ndarray: Matrix of shape (len(rows), dim) in the matrix dtype
+        """
+        matrix = self._matrix
+        start = int(rows[0])
+        if int(rows[-1]) - start + 1 == len(rows) and np.all(np.diff(rows) == 1):
+            return matrix[start:start + len(rows)]
+        return matrix.take(rows, axis=0)
+
+    def vectors(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Embeddings of the given rows at the best precision stored.
+
+        Args:
+            rows: Row indices
+
+        Returns:
+            np.ndarray: float32 matrix of shape (len(rows), dim)
+        """
+        return self._matrix.take(rows, axis=0).astype(np.float32, copy=False)
+
+    def _score_rows(self, query: np.ndarray, rows) -> np.ndarray:
+        # rows is a slice or an index array
+        if self.quantized:
+            codes, scales = self._quantized
+            return (codes[rows].astype(np.float32) @ query) * scales[rows]
+        block = self._matrix[rows]
+        if block.dtype != np.float32:
+            block = block.astype(np.float32)
+        return block @ query
+
+    def scores(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Cosine similarity of a normalized query against stored rows.
+
+        Scores are exact with float32 storage, close with float16 and approximate with int8;
+        see rerank.
+
+        Args:
+            query: Unit-length query vector
+            rows: Row indices; None scores every row below size
+
+        Returns:
+            np.ndarray: One score per row
+        """
+        if rows is not None:
+            if not self.quantized and self.dtype == np.float32:
+                return self.gather(rows) @ query
+            return self._score_rows(query, rows)
+
+        size = self._size
+        if not self.quantized and self.dtype == np.float32:
+            return self._matrix[:size] @ query
+        return np.concatenate([
+            self._score_rows(query, slice(start, min(start + SCORE_BLOCK_ROWS, size)))
+            for start in range(0, size, SCORE_BLOCK_ROWS)
+        ]) if size else np.empty(0, dtype=np.float32)
+
+    def candidates(self, k: int) -> int:
+        """
+        Number of best-scoring rows to pass to rerank for k final results.
+
+        Args:
+            k: Results wanted
+
+        Returns:
+            int: k, widened for approximate int8 scores
+        """
+        return max(k, self.rerank_candidates) if self.quantized else k
+
+    def rerank(self, query: np.ndarray, rows: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pick the k best of some candidate rows, re-scoring them at full precision if scores were approximate.
+
+        Args:
+            query: Unit-length query vector
+            rows: Candidate row indices
+            scores: Their scores from scores()
+            k: Results wanted
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Positions into rows of the k best, best first, and their final scores
+        """
+        if self.quantized and len(rows):
+            scores = self.vectors(rows) @ query
+        order = top_k_indices(scores, k)
+        return order, scores[order]
+
+    def stats(self) -> dict:
+        """
+        Snapshot of pool usage.
+
+        Returns:
+            dict: Unique embeddings, references, free and allocated rows, precision, resident
+                embedding memory and memory saved compared to float32; with int8, the size of the
+                full-precision re-ranking rows, which are counted apart since they live in a mapped
+                file backed by the page cache
+        """
+        with self.lock:
+            allocated = 0 if self._matrix is None else len(self._matrix)
+            full_bytes = 0 if self._matrix is None else allocated * self._matrix.shape[1] * 4
+            matrix_bytes = 0 if self._matrix is None else int(self._matrix.nbytes)
+            if self.quantized:
+                resident = sum(int(a.nbytes) for a in self._quantized) if self._quantized is not None else 0
+            else:
+                resident = matrix_bytes
+            return {
+                "unique_paragraphs": len(self._rows),
+                "references": sum(self._refs.values()),
+                "free_rows": len(self._free),
+                "allocated_rows": allocated,
+                "precision": self.precision,
+                "embedding_bytes": resident,
+                "float32_bytes": full_bytes,
+                "bytes_saved": full_bytes - resident,
+                "rerank_bytes": matrix_bytes if self.quantized else 0,
+                "rerank_mapped": self.quantized and isinstance(self._matrix, np.memmap),
+            }
+
+
+class MappedEmbeddingStore(EmbeddingStore):
+    """Embedding store whose matrix is a memory-mapped file, so embeddings survive restarts and can be paged out."""
+
+    def __init__(
+        self,
+        path: Optional[str],
+        dim: Optional[int] = None,
+        initial_capacity: int = 1024,
+        reuse_rows: bool = True,
+        precision: str = "float32",
+        rerank_candidates: int = 16,
+    ):
+        """
+        Open or create a file-backed store.
+
+        Args:
+            path: Matrix file (raw rows in the matrix dtype); None maps an unnamed temporary file,
+                which lets the kernel page full-precision rows out under memory pressure
+            dim: Embedding size of an existing file; None starts a new one
+            initial_capacity: Number of rows allocated once the embedding size is known
+            reuse_rows: Whether freed rows are overwritten by new embeddings as soon as they are freed;
+                without it, only rows passed to allow_reuse are
+            precision: Storage precision of the embeddings: float32, float16 or int8
+            rerank_candidates: Candidates re-scored at full precision per result with int8 precision
+        """
+        super().__init__(initial_capacity, reuse_rows, precision, rerank_candidates)
+        self.path = path
+        self._file = tempfile.TemporaryFile() if path is None else None
+        if dim is not None:
+            self.refresh(dim)
+
+    def _map(self, capacity: int, dim: int) -> np.ndarray:
+        # The file is shared with other processes: it may only ever grow
+        row_bytes = dim * self.dtype.itemsize
+        f = self._file if self._file is not None else open(self.path, "a+b")
+        try:
+            size = f.seek(0, os.SEEK_END)
+            if size < capacity * row_bytes:
+                f.truncate(capacity * row_bytes)
+            else:
+                capacity = size // row_bytes
+        finally:
+            if f is not self._file:
+                f.close()
+        target = self._file if self._file is not None else self.path
+        return np.memmap(target, dtype=self.dtype, mode="r+", shape=(capacity, dim))
+
+    def refresh(self, dim: int) -> None:
+        """
+        Map rows appended to the file by other processes.
+
+        Pages are read on first access, so mapping costs nothing up front.
+
+        Args:
+            dim: Embedding size of the file
+        """
+        with self.lock:
+            if self.path is None or not os.path.exists(self.path):
+                return
+            rows = os.path.getsize(self.path) // (self.dtype.itemsize * dim)
+            if rows and (self._matrix is None or rows > len(self._matrix)):
+                self._matrix = np.memmap(self.path, dtype=self.dtype, mode="r+", shape=(rows, dim))
+
+    def register(self, keys: Sequence[bytes], rows: Sequence[int]) -> None:
+        """
+        Record that rows, written by another process or a previous run, hold paragraph embeddings.
+
+        Args:
+            keys: Paragraph keys
+            rows: Matrix row of each key
+        """
+        with self.lock:
+            added = []
+            for key, row in zip(keys, rows):
+                if key in self._rows:
+                    continue
+                self._rows[key] = row
+                self._row_keys[row] = key
+                self._refs[row] = 0
+                self._size = max(self._size, row + 1)
+                if row in self._free:
+                    self._free.remove(row)
+                self._reusable.discard(row)
+                added.append(row)
+            if added and self.quantized:
+                self._quantize(added, self.vectors(np.asarray(added)))
+
+    def _create_matrix(self, capacity: int, dim: int) -> np.ndarray:
+        return self._map(capacity, dim)
+
+    def _grow_matrix(self, capacity: int) -> np.ndarray:
+        self._matrix.flush()
+        return self._map(capacity, self._matrix.shape[1])
+
+    def flush(self) -> None:
+        """Write dirty pages of the matrix back to the file."""
+        with self.lock:
+            if self._matrix is not None:
+                self._matrix.flush()
+
+
+class SensorData:
+    """Paragraphs of one sensor, the chunks embedded for them and the store rows of those embeddings (row i <-> chunk i)."""
+
+    __slots__ = ("paragraphs", "chunks", "spans", "rows", "lexicon")
+
+    def __init__(
+        self,
+        paragraphs: List[str],
+        rows: Optional[np.ndarray],
+        chunks: Optional[List[str]] = None,
+        spans: Optional[List[Tuple[int, int]]] = None,
+    ):
+        """
+        Build sensor data from paragraphs and the store rows of their chunks.
+
+        Args:
+            paragraphs: Paragraph texts
+            rows: Store row of each chunk's embedding, in the same order; None while the
+                embeddings are evicted to disk
+            chunks: Embedded texts, if they differ from the paragraphs
+            spans: (first, last) paragraph of each chunk, if chunks are given
+        """
+        self.paragraphs = tuple(paragraphs)
+        self.chunks = self.paragraphs if chunks is None else tuple(chunks)
+        if rows is not None and len(self.chunks) != len(rows):
+            raise ValueError("Each chunk must have exactly one embedding")
+        self.spans = None if spans is None else tuple((int(first), int(last)) for first, last in spans)
+        if self.spans is not None and len(self.spans) != len(self.chunks):
+            raise ValueError("Each chunk must have exactly one source span")
+        self.rows = rows
+        # Lexical fast-path index, built on the first similarity check
+        self.lexicon = None
+
+    def __len__(self) -> int:
+        return len(self.paragraphs)
+
+    @property
+    def resident(self) -> bool:
+        """Whether the embeddings are in the store rather than evicted to disk."""
+        return self.rows is not None
+
+    def with_rows(self, rows: Optional[np.ndarray]) -> "SensorData":
+        """
+        The same sensor with its embeddings in other rows, or evicted (None).
+
+        Args:
+            rows: Store row of each chunk's embedding, or None
+
+        Returns:
+            SensorData: New sensor data sharing paragraphs, chunks, spans and lexical index
+        """
+        sensor_data = SensorData(self.paragraphs, rows, self.chunks if self.spans is not None else None, self.spans)
+        sensor_data.lexicon = self.lexicon
+        return sensor_data
+
+    def source(self, chunk: int) -> str:
+        """
+        Text a chunk was taken from: its whole paragraph, or the lines merged into it.
+
+        Args:
+            chunk: Chunk index
+
+        Returns:
+            str: Source paragraph text
+        """
+        if self.spans is None:
+            return self.paragraphs[chunk]
+        first, last = self.spans[chunk]
+        return "\n".join(self.paragraphs[first:last + 1])
+
+    def score(self, store: EmbeddingStore, query: np.ndarray) -> np.ndarray:
+        """
+        Cosine similarity of a normalized query against every chunk, at the store's precision.
+
+        Args:
+            store: Store holding this sensor's embeddings
+            query: Unit-length query vector
+
+        Returns:
+            np.ndarray: One score per chunk
+        """
+        return store.scores(query, self.rows)
+
+    def best_match(self, store: EmbeddingStore, query: np.ndarray) -> Tuple[int, float]:
+        """
+        Chunk closest to a normalized query, re-ranked at full precision when scores are approximate.
+
+        Args:
+            store: Store holding this sensor's embeddings
+            query: Unit-length query vector
+
+        Returns:
+            Tuple[int, float]: Index of the best chunk and its score
+        """
+        scores = self.score(store, query)
+        candidates = top_k_indices(scores, store.candidates(1))
+        order, final = store.rerank(query, self.rows[candidates], scores[candidates], 1)
+        return int(candidates[order[0]]), float(final[0])
+
+    def top_matches(
+        self, store: EmbeddingStore, query: np.ndarray, k: int, threshold: Optional[float] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Up to k chunks closest to a normalized query, one per source paragraph, best first.
+
+        Only the best scores are ordered (a partial sort). With a threshold and exact scores, no more
+        chunks than score at least the threshold are ranked, but the best chunk is always returned
+        so the caller knows how close the query came.
+
+        Args:
+            store: Store holding this sensor's embeddings
+            query: Unit-length query vector
+            k: Paragraphs wanted
+            threshold: Score the caller will filter on, if any
+
+        Returns:
+            List[Tuple[int, float]]: (chunk index, score) pairs, at least one
+        """
+        scores = self.score(store, query)
+        if threshold is not None and not store.quantized:
+            k = max(1, min(k, int(np.count_nonzero(scores >= threshold))))
+        wanted = k
+        while True:
+            candidates = top_k_indices(scores, store.candidates(wanted))
+            order, final = store.rerank(query, self.rows[candidates], scores[candidates], wanted)
+            # Windows of one long paragraph share their source; keep the best of them
+            matches: Dict[object, Tuple[int, float]] = {}
+            for position, score in zip(order, final):
+                chunk = int(candidates[position])
+                source = self.spans[chunk] if self.spans is not None else chunk
+                if source not in matches:
+                    matches[source] = (chunk, float(score))
+            if len(matches) >= k or wanted >= len(scores):
+                return list(matches.values())[:k]
+            wanted *= 2
+
+    def first_match(self, store: EmbeddingStore, query: np.ndarray, threshold: float) -> Tuple[int, float]:
+        """
+        Best chunk of the first block of chunks holding one that scores at least the threshold.
+
+        Scoring stops at that block, so a sensor whose early paragraphs match is not scored in full.
+
+        Args:
+            store: Store holding this sensor's embeddings
+            query: Unit-length query vector
+            threshold: Score that counts as a match
+
+        Returns:
+            Tuple[int, float]: Index of the matching chunk and its score; the best chunk overall when
+                none reaches the threshold
+        """
+        best = (0, float("-inf"))
+        for start in range(0, len(self.rows), FIRST_MATCH_BLOCK_ROWS):
+            rows = self.rows[start:start + FIRST_MATCH_BLOCK_ROWS]
+            scores = store.scores(query, rows)
+            candidates = top_k_indices(scores, store.candidates(1))
+            order, final = store.rerank(query, rows[candidates], scores[candidates], 1)
+            chunk, score = start + int(candidates[order[0]]), float(final[0])
+            if score >= threshold:
+                return chunk, score
+            if score > best[1]:
+                best = (chunk, score)
+        return best
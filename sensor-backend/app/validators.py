@@ -28,11 +28,14 @@ def validate_name_id(name_id: str) -> str:
     if len(name_id) > 100:
         raise HTTPException(status_code=400, detail="nameId is too long (maximum 100 characters)")
     
-    # Check for valid characters (alphanumeric, hyphens, underscores)
-    if not all(c.isalnum() or c in '-_' for c in name_id):
+    # Check for valid characters (alphanumeric, hyphens, underscores), with an optional "namespace:" prefix
+    namespace, separator, name = name_id.partition(':')
+    parts = (namespace, name) if separator else (name_id,)
+    if not all(part and all(c.isalnum() or c in '-_' for c in part) for part in parts):
         raise HTTPException(
             status_code=400, 
-            detail="nameId can only contain letters, numbers, hyphens, and underscores"
+            detail="nameId can only contain letters, numbers, hyphens, and underscores, "
+                   "optionally prefixed by a namespace and ':'"
         )
     
     return name_id
@@ -124,4 +127,28 @@ def validate_bulk_sensors(sensors_dict: dict) -> dict:
                 detail=f"Validation failed for sensor '{name_id}': {e.detail}"
             )
     
-    return validated_sensors
\ No newline at end of file
+    return validated_sensors
+
+
+def validate_verify_items(items: list) -> list:
+    """
+    Validate the size of a batch verification request.
+    
+    Individual items are validated separately so one bad item does not fail the batch.
+    
+    Args:
+        items: List of (nameId, text) pairs
+        
+    Returns:
+        list: The items
+        
+    Raises:
+        HTTPException: If the batch is empty or too large
+    """
+    if not items:
+        raise HTTPException(status_code=400, detail="No items provided for batch verification")
+    
+    if len(items) > 200:  # A large form, well beyond what the UI sends at once
+        raise HTTPException(status_code=400, detail="Too many items for batch verification (maximum 200)")
+    
+    return items
@@ -0,0 +1,4 @@
+"""
+Benchmark and load-test suite for the semantic sensor API.
+Run with: python -m benchmarks.run --help
+"""
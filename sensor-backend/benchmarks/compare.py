@@ -0,0 +1,67 @@
+"""
+Compare two benchmark reports, e.g. from two commits.
+Prints throughput and p50/p99 changes per measurement and exits non-zero when a regression exceeds the threshold.
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, List, Optional, Tuple
+
+Key = Tuple[str, int, int]
+
+
+def load(path: str) -> Dict[Key, dict]:
+    with open(path) as f:
+        report = json.load(f)
+    return {(r["scenario"], r["sensors"], r["concurrency"]): r for r in report["results"]}
+
+
+def change(old: Optional[float], new: Optional[float]) -> Optional[float]:
+    if not old or new is None:
+        return None
+    return (new - old) / old
+
+
+def compare(baseline: Dict[Key, dict], candidate: Dict[Key, dict], threshold: float) -> Tuple[List[str], int]:
+    """
+    Line per measurement present in both reports.
+
+    Args:
+        baseline: Results of the reference run
+        candidate: Results of the run being checked
+        threshold: Relative throughput drop or p99 increase counted as a regression
+
+    Returns:
+        tuple: (report lines, number of regressions)
+    """
+    lines = [f"{'scenario':<20} {'sensors':>7} {'conc':>4} {'rps':>9} {'p50':>9} {'p99':>9}"]
+    regressions = 0
+    for key in sorted(set(baseline) & set(candidate)):
+        old, new = baseline[key], candidate[key]
+        rps = change(old["throughput_rps"], new["throughput_rps"])
+        p50 = change(old["latency_ms"]["p50"], new["latency_ms"]["p50"])
+        p99 = change(old["latency_ms"]["p99"], new["latency_ms"]["p99"])
+        regressed = (rps is not None and rps < -threshold) or (p99 is not None and p99 > threshold)
+        regressions += regressed
+        cells = [f"{value:+9.1%}" if value is not None else f"{'n/a':>9}" for value in (rps, p50, p99)]
+        lines.append(f"{key[0]:<20} {key[1]:>7} {key[2]:>4} {' '.join(cells)}{'  REGRESSION' if regressed else ''}")
+    return lines, regressions
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("baseline", help="Report of the reference commit")
+    parser.add_argument("candidate", help="Report of the commit being checked")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative change counted as a regression")
+    args = parser.parse_args(argv)
+
+    lines, regressions = compare(load(args.baseline), load(args.candidate), args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"{regressions} regression(s) beyond {args.threshold:.0%}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
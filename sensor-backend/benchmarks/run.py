@@ -0,0 +1,352 @@
+"""
+Benchmark and load test for the semantic sensor API.
+Drives the app in-process or a running server over HTTP and reports throughput and latency percentiles as JSON.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+import httpx
+import numpy as np
+
+SCENARIOS = ("create_text_sensor", "check_similarity", "bulk_create_sensors", "get_text_sensors")
+
+# Largest bulk request the API accepts
+BULK_LIMIT = 50
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "ze", "pa", "qu", "dor", "fen", "gal", "hus", "rin"]
+
+
+class TextGenerator:
+    """Deterministic sensor and query texts from a seeded vocabulary."""
+
+    def __init__(self, seed: int, vocabulary_size: int = 2000):
+        self.rng = random.Random(seed)
+        self.words = sorted({
+            "".join(self.rng.choice(SYLLABLES) for _ in range(self.rng.randint(2, 4)))
+            for _ in range(vocabulary_size)
+        })
+
+    def sentence(self, low: int = 8, high: int = 20) -> str:
+        return " ".join(self.rng.choice(self.words) for _ in range(self.rng.randint(low, high))).capitalize() + "."
+
+    def sensor_text(self, max_paragraphs: int = 4) -> str:
+        # One paragraph per line, as the API splits them
+        return "\n".join(self.sentence() for _ in range(self.rng.randint(1, max_paragraphs)))
+
+
+def percentiles(latencies: List[float]) -> dict:
+    """
+    Latency summary in milliseconds.
+
+    Args:
+        latencies: Request latencies in seconds
+
+    Returns:
+        dict: p50, p95, p99, mean and max
+    """
+    if not latencies:
+        return {"p50": None, "p95": None, "p99": None, "mean": None, "max": None}
+    values = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "p50": round(float(p50), 3),
+        "p95": round(float(p95), 3),
+        "p99": round(float(p99), 3),
+        "mean": round(float(values.mean()), 3),
+        "max": round(float(values.max()), 3),
+    }
+
+
+async def drive(client: httpx.AsyncClient, requests: Iterator[Callable], concurrency: int) -> dict:
+    """
+    Send requests from a shared iterator with a fixed number of concurrent clients.
+
+    Args:
+        client: HTTP client bound to the app or server
+        requests: Functions taking the client and returning a request coroutine
+        concurrency: Requests in flight at once
+
+    Returns:
+        dict: Request and error counts, wall time, throughput and latency percentiles
+    """
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+
+    async def worker():
+        for request in requests:
+            started = time.perf_counter()
+            try:
+                response = await request(client)
+                status = str(response.status_code) if response.status_code >= 400 else None
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            if status is not None:
+                errors[status] = errors.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    seconds = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors.values()),
+        "error_statuses": errors,
+        "seconds": round(seconds, 4),
+        "throughput_rps": round(len(latencies) / seconds, 2) if seconds > 0 else None,
+        "latency_ms": percentiles(latencies),
+    }
+
+
+class Benchmark:
+    """Grows a sensor population step by step and measures every scenario at each size."""
+
+    def __init__(self, client: httpx.AsyncClient, args: argparse.Namespace):
+        self.client = client
+        self.args = args
+        self.texts = TextGenerator(args.seed)
+        self.rng = random.Random(args.seed + 1)
+        self.population: List[str] = []
+        self.scratch = 0
+
+    async def _bulk_create(self, names: List[str]) -> List[str]:
+        # Setup and cleanup traffic is not measured
+        async def create(chunk):
+            response = await self.client.post(
+                "/bulk-create-sensors", json={"sensors": {name: self.texts.sensor_text() for name in chunk}}
+            )
+            response.raise_for_status()
+            return response.json()["created"] + response.json()["skipped"]
+
+        chunks = [names[i:i + BULK_LIMIT] for i in range(0, len(names), BULK_LIMIT)]
+        created = []
+        for i in range(0, len(chunks), self.args.setup_concurrency):
+            for names_done in await asyncio.gather(*(create(c) for c in chunks[i:i + self.args.setup_concurrency])):
+                created.extend(names_done)
+        return created
+
+    async def _delete(self, names: List[str]) -> None:
+        for i in range(0, len(names), self.args.setup_concurrency):
+            await asyncio.gather(*(
+                self.client.delete(f"/text-sensor/{name}") for name in names[i:i + self.args.setup_concurrency]
+            ))
+
+    async def grow(self, size: int) -> None:
+        """Create population sensors until there are `size` of them."""
+        names = [f"bench-{i:07d}" for i in range(len(self.population), size)]
+        if names:
+            started = time.perf_counter()
+            self.population.extend(await self._bulk_create(names))
+            print(f"Population at {len(self.population)} sensors ({time.perf_counter() - started:.1f}s)", file=sys.stderr)
+
+    def _scratch_names(self, count: int) -> List[str]:
+        names = [f"bench-tmp-{self.scratch + i:07d}" for i in range(count)]
+        self.scratch += count
+        return names
+
+    async def create_text_sensor(self, concurrency: int) -> dict:
+        names = self._scratch_names(self.args.requests)
+        bodies = [(name, {"text": self.texts.sensor_text()}) for name in names]
+        result = await drive(
+            self.client,
+            iter([lambda c, n=name, b=body: c.post(f"/create-text-sensor/{n}", json=b) for name, body in bodies]),
+            concurrency,
+        )
+        await self._delete(names)
+        return result
+
+    async def bulk_create_sensors(self, concurrency: int) -> dict:
+        batches = [self._scratch_names(self.args.bulk_size) for _ in range(self.args.bulk_requests)]
+        bodies = [{"sensors": {name: self.texts.sensor_text() for name in batch}} for batch in batches]
+        result = await drive(
+            self.client,
+            iter([lambda c, b=body: c.post("/bulk-create-sensors", json=b) for body in bodies]),
+            concurrency,
+        )
+        await self._delete([name for batch in batches for name in batch])
+        return result
+
+    async def check_similarity(self, concurrency: int) -> dict:
+        # Fresh query texts, so the query cache does not hide model cost
+        targets = [(self.rng.choice(self.population), {"text": self.texts.sentence()}) for _ in range(self.args.requests)]
+        return await drive(
+            self.client,
+            iter([lambda c, n=name, b=body: c.post(f"/text-sensor/{n}", json=b) for name, body in targets]),
+            concurrency,
+        )
+
+    async def get_text_sensors(self, concurrency: int) -> dict:
+        return await drive(
+            self.client,
+            iter([lambda c: c.get("/text-sensors") for _ in range(self.args.list_requests)]),
+            concurrency,
+        )
+
+    async def run(self) -> List[dict]:
+        results = []
+        for size in self.args.sizes:
+            await self.grow(size)
+            for concurrency in self.args.concurrency:
+                for scenario in self.args.scenarios:
+                    if scenario == "check_similarity" and not self.population:
+                        continue
+                    result = await getattr(self, scenario)(concurrency)
+                    results.append({"scenario": scenario, "sensors": len(self.population), "concurrency": concurrency, **result})
+                    print(
+                        f"{scenario:<20} sensors={len(self.population):<7} concurrency={concurrency:<3} "
+                        f"rps={result['throughput_rps']} p50={result['latency_ms']['p50']}ms "
+                        f"p99={result['latency_ms']['p99']}ms errors={result['errors']}",
+                        file=sys.stderr,
+                    )
+        if self.args.url and not self.args.keep:
+            await self._delete(self.population)
+        return results
+
+
+def git_revision() -> Optional[dict]:
+    here = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=here, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=here, capture_output=True, text=True, check=True
+        ).stdout
+        return {"commit": commit, "dirty": bool(status.strip())}
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def int_list(value: str) -> List[int]:
+    return sorted({int(item) for item in value.split(",") if item.strip()})
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="Benchmark a running server instead of the app in-process")
+    parser.add_argument("--stub", action="store_true", help="Replace SentenceTransformer with a deterministic stub (in-process only)")
+    parser.add_argument("--stub-dim", type=int, default=384, help="Embedding size of the stub model")
+    parser.add_argument("--stub-batch-ms", type=float, default=0.0, help="Simulated cost of each stub encode call")
+    parser.add_argument("--stub-text-ms", type=float, default=0.0, help="Simulated cost per text encoded by the stub")
+    parser.add_argument("--sizes", type=int_list, default=int_list("10,100,1000,10000,100000"), help="Sensor counts to measure at")
+    parser.add_argument("--concurrency", type=int_list, default=int_list("1,8,32"), help="Concurrent clients to measure with")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenarios to run")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per create/similarity measurement")
+    parser.add_argument("--bulk-requests", type=int, default=20, help="Requests per bulk create measurement")
+    parser.add_argument("--bulk-size", type=int, default=BULK_LIMIT, help="Sensors per bulk create request")
+    parser.add_argument("--list-requests", type=int, default=20, help="Requests per list measurement")
+    parser.add_argument("--setup-concurrency", type=int, default=8, help="Concurrent requests while populating and cleaning up")
+    parser.add_argument("--seed", type=int, default=1234, help="Seed for generated texts and query targets")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--keep", action="store_true", help="Keep the population sensors on the server after the run")
+    parser.add_argument("--output", "-o", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    if args.url and args.stub:
+        parser.error("--stub only applies in-process; start the server with the stub instead")
+    if not 1 <= args.bulk_size <= BULK_LIMIT:
+        parser.error(f"--bulk-size must be between 1 and {BULK_LIMIT}")
+    return args
+
+
+def load_app(args: argparse.Namespace):
+    """Import the app in this process, with the stub model and without a snapshot unless configured."""
+    if args.stub:
+        from benchmarks.stub_model import install
+
+        install(args.stub_dim, args.stub_batch_ms, args.stub_text_ms)
+    # Sensors from earlier runs would skew the population; opt back in by exporting SNAPSHOT_DIR
+    os.environ.setdefault("SNAPSHOT_DIR", "")
+    # History is written as in production, but to a throwaway database
+    os.environ.setdefault("HISTORY_DB", os.path.join(tempfile.mkdtemp(prefix="sensor-bench-"), "history.db"))
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import main
+
+    return main.app
+
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float) -> None:
+    """Poll /readyz, so model loading and warm-up are not measured."""
+    deadline = time.monotonic() + timeout
+    while True:
+        response = await client.get("/readyz")
+        if response.status_code == 200:
+            return
+        body = response.json()
+        if body.get("status") == "failed":
+            raise SystemExit(f"Model did not load: {body.get('error')}")
+        if time.monotonic() > deadline:
+            raise SystemExit(f"Service not ready after {timeout:.0f}s")
+        await asyncio.sleep(0.1)
+
+
+async def benchmark(args: argparse.Namespace) -> dict:
+    async with contextlib.AsyncExitStack() as stack:
+        if args.url:
+            transport, base_url = None, args.url.rstrip("/")
+        else:
+            # ASGITransport does not send lifespan events; run startup and shutdown here
+            app = load_app(args)
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            transport, base_url = httpx.ASGITransport(app=app), "http://benchmark"
+        return await run_benchmark(args, transport, base_url)
+
+
+async def run_benchmark(args: argparse.Namespace, transport: Optional[httpx.ASGITransport], base_url: str) -> dict:
+    limits = httpx.Limits(max_connections=max(args.concurrency + [args.setup_concurrency]))
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        await wait_until_ready(client, args.timeout)
+        health = (await client.get("/health")).json()
+        started = time.time()
+        results = await Benchmark(client, args).run()
+
+    return {
+        "meta": {
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(started)),
+            "duration_seconds": round(time.time() - started, 2),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "target": args.url or "in-process",
+            "model": {"stub": args.stub, "dim": args.stub_dim, "batch_ms": args.stub_batch_ms, "text_ms": args.stub_text_ms}
+            if args.stub else health.get("model"),
+            "inference": health.get("inference"),
+            "storage": health.get("storage"),
+            "config": {
+                key: getattr(args, key)
+                for key in ("sizes", "concurrency", "scenarios", "requests", "bulk_requests", "bulk_size", "list_requests", "seed")
+            },
+        },
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    report = asyncio.run(benchmark(args))
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
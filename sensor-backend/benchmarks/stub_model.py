@@ -0,0 +1,72 @@
+"""
+Deterministic stand-in for SentenceTransformer.
+Lets benchmarks measure service overhead without model cost, and with a fixed, configurable model cost.
+"""
+
+import hashlib
+import sys
+import time
+import types
+from typing import List, Union
+
+import numpy as np
+
+
+class StubSentenceTransformer:
+    """Embeds each text as a pseudo-random unit vector seeded by its content."""
+
+    # Set by install() before the app loads the model
+    dim = 384
+    latency_ms_per_batch = 0.0
+    latency_ms_per_text = 0.0
+
+    def __init__(self, model_name_or_path: str = "stub", **kwargs):
+        self.model_name_or_path = model_name_or_path
+        self.kwargs = kwargs
+
+    def _embed(self, text: str) -> np.ndarray:
+        seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        """
+        Embed one text or a list of texts.
+
+        Args:
+            sentences: Text or list of texts
+            batch_size: Accepted for compatibility; the simulated cost is charged per call
+
+        Returns:
+            np.ndarray: One vector for a single text, otherwise a matrix with one row per text
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        delay = self.latency_ms_per_batch + self.latency_ms_per_text * len(texts)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        matrix = np.stack([self._embed(text) for text in texts]) if texts else np.empty((0, self.dim), np.float32)
+        return matrix[0] if single else matrix
+
+    def save(self, path: str) -> None:
+        """Nothing to persist for the stub."""
+
+
+def install(dim: int = 384, latency_ms_per_batch: float = 0.0, latency_ms_per_text: float = 0.0) -> None:
+    """
+    Make `sentence_transformers.SentenceTransformer` resolve to the stub.
+
+    Must run before the app is imported; torch is then never loaded.
+
+    Args:
+        dim: Embedding size
+        latency_ms_per_batch: Simulated fixed cost of each encode call
+        latency_ms_per_text: Simulated cost per encoded text
+    """
+    StubSentenceTransformer.dim = dim
+    StubSentenceTransformer.latency_ms_per_batch = latency_ms_per_batch
+    StubSentenceTransformer.latency_ms_per_text = latency_ms_per_text
+
+    module = types.ModuleType("sentence_transformers")
+    module.SentenceTransformer = StubSentenceTransformer
+    sys.modules["sentence_transformers"] = module
@@ -1,22 +1,71 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
-from sentence_transformers import SentenceTransformer
+from fastapi.responses import JSONResponse, Response
 import uvicorn
 import json
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
 
 from app.schemas import (
     CreateSensorRequest, SimilarityRequest, SimilarityResponse,
     BulkCreateRequest, BulkCreateResponse, SensorListResponse,
-    CreateSensorResponse, DeleteSensorResponse, HealthResponse
+    CreateSensorResponse, UpdateSensorResponse, DeleteSensorResponse, HealthResponse,
+    SearchRequest, SearchResponse, BatchVerifyRequest, BatchVerifyResponse, SimilarityHistoryResponse
 )
 from app.services import SensorService
+from app.validators import validate_text_content
+from app.config import (
+    INFERENCE_WORKERS, INFERENCE_QUEUE_SIZE, INFERENCE_RETRY_AFTER, TORCH_NUM_THREADS,
+    QUERY_BATCH_MAX_SIZE, QUERY_BATCH_MAX_WAIT_MS, QUERY_CACHE_SIZE, QUERY_CACHE_MAX_MB,
+    SEARCH_ANN_MIN_ROWS, SEARCH_IVF_NPROBE, SNAPSHOT_DIR, SNAPSHOT_COMPACT_MIN_RECORDS, SNAPSHOT_SHARED,
+    EMBED_BATCH_SIZE, RELOAD_PAUSE_MS, STORAGE_PRECISION, RERANK_CANDIDATES,
+    MODEL_NAME, INFERENCE_BACKEND, ONNX_QUANTIZATION, ONNX_EXPORT_DIR, BACKEND_PARITY_CHECK, BACKEND_PARITY_TOLERANCE,
+    INGEST_BATCH_SIZE, INGEST_MAX_LINE_BYTES,
+    HISTORY_DB, HISTORY_QUEUE_SIZE, HISTORY_FLUSH_INTERVAL_MS, HISTORY_BATCH_SIZE, HISTORY_DROP_POLICY,
+    ENCODER_PROCESSES, ENCODER_THREADS_PER_PROCESS, ENCODER_POOL_MIN_TEXTS,
+    NAMESPACE_MEMORY_MB, NAMESPACE_BUDGETS, EVICTION_DIR
+)
+from app.inference import InferenceExecutor, configure_torch_threads
+from app.backends import load_backend, check_parity, warm_up
+from app.batching import MicroBatcher
+from app.cache import EmbeddingCache
+from app.store import EmbeddingStore, MappedEmbeddingStore
+from app.index import SearchIndex
+from app.snapshot import Snapshot
+from app.reload import ModelReloader
+from app.ingest import NDJSONResponse, ingest_ndjson
+from app.history import HistoryLogger
+from app.encoders import EncoderPool
+from app.namespaces import NamespaceBudgets
+from app.metrics import record_request, register_gauges, render as render_metrics
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Serve (liveness, health) right away while the model loads in the background"""
+    global model_loader
+    await asyncio.get_running_loop().run_in_executor(None, open_storage)
+    model_loader = asyncio.ensure_future(start_model())
+    try:
+        yield
+    finally:
+        # A load still running in its thread is abandoned with the process
+        model_loader.cancel()
+        if history is not None:
+            history.flush()
+        if encoder_pool is not None:
+            encoder_pool.shutdown()
+        # Evicted embeddings are only meaningful to this process
+        if sensor_service is not None and sensor_service.namespaces is not None:
+            sensor_service.namespaces.clear()
 
 app = FastAPI(
     title="Semantic Description Sensor API",
     description="API for semantic similarity detection using sentence transformers",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS - Allow all origins for development
@@ -28,6 +77,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Count every request per route and status, including those rejected by the exception handlers below
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        record_request(route.path if route is not None else "unmatched", status_code, time.perf_counter() - start)
+
 # Custom exception handlers
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -62,13 +124,33 @@ async def json_decode_exception_handler(request: Request, exc: json.JSONDecodeEr
 # Load the sentence transformer model
 model = None
 model_error = None
+# Background task loading the model at startup; the service is ready once the model is also warmed up
+model_loader: Optional[asyncio.Future] = None
+ready = False
+
+def build_model():
+    """Instantiate the sentence transformer model on the configured backend"""
+    configure_torch_threads(TORCH_NUM_THREADS)
+    backend = load_backend(MODEL_NAME, INFERENCE_BACKEND, ONNX_QUANTIZATION, ONNX_EXPORT_DIR)
+    if backend.backend == "torch" or not BACKEND_PARITY_CHECK:
+        return backend
+    
+    # Stored embeddings and similarity thresholds assume PyTorch output; refuse a backend that drifts
+    reference = load_backend(MODEL_NAME, "torch")
+    backend.parity = check_parity(reference, backend, BACKEND_PARITY_TOLERANCE)
+    print(f"Backend parity with torch: {backend.parity}")
+    if not backend.parity["passed"]:
+        print(f"{backend.backend} backend is outside the parity tolerance, using torch instead")
+        reference.parity = backend.parity
+        return reference
+    return backend
 
 def load_model():
     """Load the sentence transformer model with proper error handling"""
     global model, model_error
     try:
         print("Loading sentence transformer model...")
-        model = SentenceTransformer('all-MiniLM-L6-v2')
+        model = build_model()
         model_error = None
         print("Model loaded successfully")
         return True
@@ -81,110 +163,517 @@ def load_model():
 
 # In-memory storage for text sensors
 text_store = {}  # nameId -> original full text
-sensor_data_list = {}  # nameId -> [(paragraph, embedding), (paragraph, embedding), ...]
+sensor_data_list = {}  # nameId -> SensorData (paragraphs + embedding store rows)
+
+# Storage is opened by lifespan rather than on import: the uvicorn reloader and spawned encoder workers
+# (which import this file again as __mp_main__) must not open, or discard, the snapshot and history.
+# Optional on-disk snapshot: embeddings in a memory-mapped file, sensors in an append-only journal.
+# With SNAPSHOT_SHARED, every uvicorn worker maps the same file and replays the others' journal records.
+snapshot = None
+snapshot_restored = False
+# paragraph hash -> normalized embedding, shared by all sensors
+embedding_store = None
+search_index = None
+# Per-namespace memory budgets; a snapshot's mapped embeddings are already paged out by the OS instead
+namespaces = None
+
+def create_embedding_store():
+    """In-memory store at the configured precision"""
+    if STORAGE_PRECISION == "int8":
+        # Full-precision rows for re-ranking go to a temporary file mapping instead of the heap
+        return MappedEmbeddingStore(None, precision="int8", rerank_candidates=RERANK_CANDIDATES)
+    return EmbeddingStore(precision=STORAGE_PRECISION)
+
+# Query embeddings shared by every service instance; emptied whenever the model changes
+query_cache = EmbeddingCache(max_entries=QUERY_CACHE_SIZE, max_bytes=QUERY_CACHE_MAX_MB * 1024 * 1024)
 
 # Initialize service (will be set after model loads)
 sensor_service = None
 
-# Try to load model on startup
-load_model()
+def create_sensor_service():
+    """Build a service for the current model over the shared stores"""
+    global snapshot_restored
+    service = SensorService(
+        model, text_store, sensor_data_list, embedding_store, search_index,
+        query_cache=query_cache, snapshot=snapshot, encoder_pool=encoder_pool, namespaces=namespaces
+    )
+    # The first working service loads the sensors saved by previous runs
+    if snapshot is not None and not snapshot_restored:
+        snapshot.restore(service)
+        snapshot_restored = True
+    return service
+
+# Blocking model calls run here so the event loop keeps serving other requests
+inference_executor = InferenceExecutor(
+    max_workers=INFERENCE_WORKERS,
+    max_queue=INFERENCE_QUEUE_SIZE,
+    retry_after=INFERENCE_RETRY_AFTER
+)
+
+def create_query_batcher(service):
+    """Batch query texts from concurrent similarity checks into one model call of a service"""
+    return MicroBatcher(
+        service.encode_queries,
+        inference_executor,
+        max_batch_size=QUERY_BATCH_MAX_SIZE,
+        max_wait_ms=QUERY_BATCH_MAX_WAIT_MS
+    )
+
+# Each service gets its own batcher, so queries are always encoded by the model that scores them
+query_batcher = None
+
+# Audit trail of similarity checks, written to SQLite behind the requests
+history = None
 
-# Initialize service after model is loaded
-if model is not None:
-    sensor_service = SensorService(model, text_store, sensor_data_list)
+def open_storage():
+    """Open the snapshot, embedding store, namespace budgets and history of the serving process"""
+    global snapshot, embedding_store, search_index, namespaces, history
+    snapshot = Snapshot(
+        SNAPSHOT_DIR, MODEL_NAME, SNAPSHOT_COMPACT_MIN_RECORDS, shared=SNAPSHOT_SHARED,
+        precision=STORAGE_PRECISION, rerank_candidates=RERANK_CANDIDATES,
+        backend=INFERENCE_BACKEND, quantization=(ONNX_QUANTIZATION or None) if INFERENCE_BACKEND == "onnx" else None
+    ) if SNAPSHOT_DIR else None
+    embedding_store = snapshot.store if snapshot is not None else create_embedding_store()
+    search_index = SearchIndex(embedding_store, ann_min_rows=SEARCH_ANN_MIN_ROWS, nprobe=SEARCH_IVF_NPROBE)
+    if NAMESPACE_MEMORY_MB or NAMESPACE_BUDGETS:
+        if snapshot is None:
+            namespaces = NamespaceBudgets(EVICTION_DIR, int(NAMESPACE_MEMORY_MB * 1024 * 1024), NAMESPACE_BUDGETS)
+        else:
+            print("Namespace memory budgets are not applied with SNAPSHOT_DIR")
+    history = HistoryLogger(
+        HISTORY_DB,
+        max_queue=HISTORY_QUEUE_SIZE,
+        flush_interval_ms=HISTORY_FLUSH_INTERVAL_MS,
+        batch_size=HISTORY_BATCH_SIZE,
+        drop_policy=HISTORY_DROP_POLICY
+    ) if HISTORY_DB else None
+
+# Rebuilds every sensor for a reloaded model while the current one keeps serving
+model_reloader = ModelReloader(inference_executor, step_paragraphs=EMBED_BATCH_SIZE, pause_ms=RELOAD_PAUSE_MS)
+
+def set_sensor_service(service):
+    """Make a service, and the stores it works on, the ones serving requests"""
+    global model, sensor_service, query_batcher, text_store, sensor_data_list, embedding_store, search_index
+    model = service.model
+    text_store = service.text_store
+    sensor_data_list = service.sensor_data_list
+    embedding_store = service.embedding_store
+    search_index = service.search_index
+    previous_batcher, query_batcher = query_batcher, create_query_batcher(service)
+    sensor_service = service
+    if previous_batcher is not None:
+        previous_batcher.close()
+
+def build_reload_service(new_model):
+    """Empty service with fresh stores for a reloaded model"""
+    store = snapshot.rebuild_store() if snapshot is not None else create_embedding_store()
+    index = SearchIndex(store, ann_min_rows=SEARCH_ANN_MIN_ROWS, nprobe=SEARCH_IVF_NPROBE)
+    budgets = sensor_service.namespaces.renew() if sensor_service.namespaces is not None else None
+    return SensorService(new_model, {}, {}, store, index, namespaces=budgets)
+
+def swap_sensor_service(service):
+    """Switch to a service rebuilt for a reloaded model; runs while the old store is locked, so only swaps references"""
+    service.query_cache = query_cache
+    query_cache.bind_model(service.model)
+    set_sensor_service(service)
+
+def finish_sensor_service_swap(previous, service):
+    """Persist a swapped-in service and release what the replaced one held; runs once the old store is unlocked"""
+    if snapshot is not None:
+        # Changes the new service took before adoption are in the compacted journal
+        snapshot.adopt(service)
+    if previous.namespaces is not None:
+        # Waits for reads of evicted sensors still running on the old service
+        previous.namespaces.clear()
+    replace_encoder_pool(service)
+
+# Worker processes encoding large bulk creations, each with its own copy of the model
+encoder_pool = None
+
+def create_encoder_pool(for_model):
+    """Pool of encoder processes for a loaded model, if configured"""
+    if not ENCODER_PROCESSES or for_model is None:
+        return None
+    return EncoderPool.for_model(
+        for_model,
+        export_root=ONNX_EXPORT_DIR,
+        processes=ENCODER_PROCESSES,
+        threads_per_process=ENCODER_THREADS_PER_PROCESS,
+        batch_size=EMBED_BATCH_SIZE,
+        min_texts=ENCODER_POOL_MIN_TEXTS
+    )
+
+def replace_encoder_pool(service):
+    """Give a reloaded model's service workers that load its weights; the old workers finish in the background"""
+    global encoder_pool
+    if encoder_pool is None:
+        return
+    previous, encoder_pool = encoder_pool, create_encoder_pool(service.model)
+    encoder_pool.start()
+    service.encoder_pool = encoder_pool
+    previous.shutdown(wait=False)
+
+async def start_model():
+    """Load the model, restore saved sensors and warm up, all off the event loop"""
+    global encoder_pool, model_error, ready
+    loop = asyncio.get_running_loop()
+    if not await loop.run_in_executor(None, load_model):
+        return
+    try:
+        if encoder_pool is None or not encoder_pool.serves(model):
+            # Workers of an earlier load hold its weights
+            if encoder_pool is not None:
+                encoder_pool.shutdown(wait=False)
+            encoder_pool = create_encoder_pool(model)
+            if encoder_pool is not None:
+                encoder_pool.start()
+        service = await loop.run_in_executor(None, create_sensor_service)
+        set_sensor_service(service)
+        # On the inference threads, so the dummy batch initializes what real requests will use
+        seconds = await inference_executor.run(warm_up, service.model, EMBED_BATCH_SIZE)
+        print(f"Model warmed up in {seconds:.2f}s")
+        ready = True
+    except Exception as e:
+        model_error = f"Failed to start the sensor service: {str(e)}"
+        print(model_error)
+
+# Gauges are read when /metrics is scraped, always from the current stores
+register_gauges({
+    "sensor_sensors": ("Stored text sensors", lambda: len(sensor_data_list)),
+    "sensor_unique_paragraphs": ("Unique paragraph embeddings in the store", lambda: len(embedding_store)),
+    "sensor_paragraph_references": ("Paragraphs across all sensors", lambda: embedding_store.stats()["references"]),
+    "sensor_embedding_bytes": ("Resident memory of stored embeddings", lambda: embedding_store.stats()["embedding_bytes"]),
+    "sensor_rerank_bytes": (
+        "Full-precision re-ranking rows of int8 storage, in a mapped file backed by the page cache",
+        lambda: embedding_store.stats()["rerank_bytes"]
+    ),
+    "sensor_inference_pending": ("Model calls running or queued on the inference executor", lambda: inference_executor.pending),
+    "sensor_query_batch_max_size": (
+        "Largest number of query texts encoded in one micro-batch",
+        lambda: query_batcher.max_batch_size if query_batcher is not None else QUERY_BATCH_MAX_SIZE
+    ),
+    "sensor_query_batch_max_wait_ms": (
+        "Longest time the first query text of a micro-batch waits for company",
+        lambda: query_batcher.max_wait_ms if query_batcher is not None else QUERY_BATCH_MAX_WAIT_MS
+    ),
+    "sensor_query_batch_queue_depth": (
+        "Query texts waiting for the next micro-batch",
+        lambda: query_batcher.stats()["queue_depth"] if query_batcher is not None else 0
+    ),
+    "sensor_query_cache_entries": ("Cached query embeddings", lambda: query_cache.stats()["entries"]),
+    "sensor_query_cache_hit_ratio": ("Query cache hits per lookup", lambda: query_cache.stats()["hit_rate"]),
+    "sensor_model_loaded": ("1 when the model is loaded", lambda: model is not None),
+    "sensor_ready": ("1 once the model is loaded and warmed up", lambda: ready),
+    "sensor_reload_progress": ("Progress of the current or last model reload", lambda: model_reloader.stats()["progress"]),
+    "sensor_history_queue_depth": (
+        "Similarity checks waiting to be written to the history",
+        lambda: history.stats()["queue_depth"] if history is not None else 0
+    ),
+    "sensor_history_dropped": (
+        "Similarity checks dropped from the history queue since startup",
+        lambda: history.stats()["dropped"] if history is not None else 0
+    ),
+    "sensor_namespace_evictions": (
+        "Sensors evicted to disk by namespace memory budgets since the model was loaded",
+        lambda: namespace_stats().get("evictions", 0)
+    ),
+    "sensor_namespace_reloads": (
+        "Evicted sensors loaded back from disk since the model was loaded",
+        lambda: namespace_stats().get("reloads", 0)
+    ),
+})
+
+def namespace_stats() -> dict:
+    """Budgets, residency and evictions per namespace of the serving service, empty without budgets"""
+    if sensor_service is None or sensor_service.namespaces is None:
+        return {}
+    return sensor_service.namespaces.stats()
 
 @app.get("/")
 async def root():
     return {"message": "Semantic Description Sensor API is running"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics: stage latencies, request and error counters, store and queue gauges."""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
+def starting() -> bool:
+    """Whether the startup model load is still running"""
+    return model_loader is not None and not model_loader.done()
+
+@app.get("/livez")
+async def liveness():
+    """Liveness probe: the process is serving requests, whether or not the model is loaded."""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readiness():
+    """Readiness probe: 200 once the model is loaded and warmed up, 503 before or if loading failed."""
+    if ready and sensor_service is not None:
+        return {"status": "ready", "model": MODEL_NAME}
+    status = "loading" if starting() else "failed"
+    return JSONResponse(status_code=503, content={"status": status, "model": MODEL_NAME, "error": model_error})
+
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
-    model_status = "loaded" if model is not None else "failed"
-    health_status = "healthy" if model is not None else "degraded"
+    if model is not None:
+        model_status, health_status = "loaded", "healthy" if ready else "starting"
+    elif starting():
+        model_status, health_status = "loading", "starting"
+    else:
+        model_status, health_status = "failed", "degraded"
     
     return HealthResponse(
         status=health_status,
         service="semantic-sensor-api",
-        model="all-MiniLM-L6-v2",
+        model=MODEL_NAME,
         model_status=model_status,
-        model_error=model_error
+        model_error=model_error,
+        storage={
+            "sensors": len(sensor_data_list),
+            **embedding_store.stats()
+        },
+        search=search_index.stats(),
+        inference={
+            "executor": inference_executor.stats(),
+            "query_batching": query_batcher.stats() if query_batcher is not None else {},
+            "query_cache": query_cache.stats(),
+            "backend": model.describe() if model is not None else {},
+            "chunking": sensor_service.chunker.describe() if sensor_service is not None else {},
+            "encoder_pool": encoder_pool.stats() if encoder_pool is not None else {},
+            "lexical": (
+                sensor_service.lexical.stats()
+                if sensor_service is not None and sensor_service.lexical is not None else {}
+            )
+        },
+        reload=model_reloader.stats(),
+        history=history.stats() if history is not None else None,
+        namespaces=namespace_stats() or None
     )
 
-@app.post("/reload-model")
+@app.post("/reload-model", status_code=202)
 async def reload_model():
-    """Reload the sentence transformer model"""
-    global sensor_service
-    success = load_model()
-    if success:
-        # Reinitialize service with new model
-        sensor_service = SensorService(model, text_store, sensor_data_list)
+    """Reload the sentence transformer model, re-embedding every sensor in the background"""
+    global model_loader
+    if starting():
+        raise HTTPException(status_code=409, detail="The model is still loading; progress is reported by /readyz")
+    if sensor_service is None:
+        # Nothing to re-embed: load the model the way startup does
+        model_loader = asyncio.ensure_future(start_model())
+        await model_loader
+        if sensor_service is None:
+            raise HTTPException(
+                status_code=503, 
+                detail=f"Failed to reload model: {model_error}"
+            )
         return {"message": "Model reloaded successfully", "status": "loaded"}
-    else:
+    
+    if snapshot is not None and snapshot.shared:
         raise HTTPException(
-            status_code=503, 
-            detail=f"Failed to reload model: {model_error}"
+            status_code=409,
+            detail="Model reload is not supported with a shared snapshot; restart the workers instead"
         )
+    # The current model keeps serving until the new one and its embeddings are swapped in together
+    started = model_reloader.start(
+        build_model, build_reload_service, lambda: sensor_service, swap_sensor_service, finish_sensor_service_swap
+    )
+    if not started:
+        raise HTTPException(status_code=409, detail="A model reload is already in progress")
+    return {"message": "Model reload started; progress is reported by /health", "status": "reloading"}
 
 @app.post("/bulk-create-sensors", response_model=BulkCreateResponse)
 async def bulk_create_sensors(request: BulkCreateRequest):
     """Bulk create text sensors from browser storage."""
     try:
-        ensure_service_available()
-        return sensor_service.bulk_create_sensors(request.sensors)
+        await ensure_service_available()
+        return await inference_executor.run(sensor_service.bulk_create_sensors, request.sensors)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error bulk creating sensors: {str(e)}")
 
+@app.post("/bulk-create-sensors/stream", response_class=NDJSONResponse)
+async def stream_create_sensors(request: Request):
+    """Create any number of sensors from an NDJSON body of {"name_id", "text"} lines, streaming one result line each."""
+    await ensure_service_available()
+    return NDJSONResponse(ingest_ndjson(
+        request.stream(),
+        lambda: sensor_service,
+        inference_executor,
+        batch_size=INGEST_BATCH_SIZE,
+        max_line_bytes=INGEST_MAX_LINE_BYTES
+    ))
+
 # Service initialization helper
-def ensure_service_available():
-    """Ensure the sensor service is available"""
-    global sensor_service
+async def ensure_service_available():
+    """Ensure the sensor service is available, caught up with other workers sharing the snapshot"""
+    loop = asyncio.get_running_loop()
     if sensor_service is None:
+        if starting():
+            raise HTTPException(
+                status_code=503,
+                detail="Sensor service is starting - model is loading",
+                headers={"Retry-After": str(INFERENCE_RETRY_AFTER)}
+            )
         if model is not None:
-            sensor_service = SensorService(model, text_store, sensor_data_list)
+            service = await loop.run_in_executor(None, create_sensor_service)
+            if sensor_service is None:
+                set_sensor_service(service)
         else:
             raise HTTPException(status_code=503, detail="Sensor service is not available - model not loaded")
+    # Only another worker can change a shared snapshot; checking the journal size is a cheap fstat, and
+    # replaying its records takes the store lock and the file lock, so that runs off the event loop
+    if snapshot is not None and snapshot.shared and snapshot.has_changes():
+        await loop.run_in_executor(None, sensor_service.sync)
 
 @app.post("/create-text-sensor/{name_id}", response_model=CreateSensorResponse)
 async def create_text_sensor(name_id: str, request: CreateSensorRequest):
     """Create a text sensor by splitting text into paragraphs and generating embeddings."""
     try:
-        ensure_service_available()
-        return sensor_service.create_sensor(name_id, request.text)
+        await ensure_service_available()
+        return await inference_executor.run(sensor_service.create_sensor, name_id, request.text)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating text sensor: {str(e)}")
 
-@app.post("/text-sensor/{name_id}", response_model=SimilarityResponse)
+@app.put("/text-sensor/{name_id}", response_model=UpdateSensorResponse)
+async def update_text_sensor(name_id: str, request: CreateSensorRequest):
+    """Replace a text sensor's text, encoding only its new or edited paragraphs."""
+    try:
+        await ensure_service_available()
+        return await inference_executor.run(sensor_service.update_sensor, name_id, request.text)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating text sensor: {str(e)}")
+
+@app.post("/text-sensor/{name_id}", response_model=SimilarityResponse, response_model_exclude_none=True)
 async def check_similarity(name_id: str, request: SimilarityRequest):
     """Check semantic similarity against a specific text sensor."""
     try:
-        ensure_service_available()
-        result = sensor_service.calculate_similarity(request.text, name_id)
+        await ensure_service_available()
+        # A reload may swap the service while we wait; the query is scored by the model that encoded it
+        service, batcher = sensor_service, query_batcher
+        text, validated_name_id = service.validate_similarity_request(request.text, name_id)
+        # Inputs repeating a stored paragraph are answered without the model
+        result = service.lexical_match(text, validated_name_id, request.top_k, request.threshold)
+        if result is None:
+            query_embedding = service.lookup_query_embedding(text)
+            if query_embedding is None:
+                query_embedding = await batcher.encode(text)
+            score_args = (query_embedding, validated_name_id, request.top_k, request.threshold, request.first_match)
+            if service.namespaces is not None:
+                # Scoring may reload an evicted sensor from disk, which must not block the event loop
+                result = await inference_executor.run(service.score_query, *score_args)
+            else:
+                result = service.score_query(*score_args)
+        if history is not None:
+            matches_count = len(result["matches"]) if "matches" in result else 1
+            history.record(text, validated_name_id, result["confidence_score"], request.threshold, matches_count)
         return SimilarityResponse(**result)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error checking similarity: {str(e)}")
 
-@app.get("/text-sensors", response_model=SensorListResponse)
-async def get_text_sensors():
-    """Return mapping of nameIds to their text content and count of sensors."""
+@app.post("/text-sensors/verify", response_model=BatchVerifyResponse, response_model_exclude_none=True)
+async def verify_text_sensors(request: BatchVerifyRequest):
+    """Check many (nameId, text) pairs at once, e.g. every smart field of a form."""
     try:
-        ensure_service_available()
-        result = sensor_service.get_all_sensors()
+        await ensure_service_available()
+        items = [(item.name_id, item.text) for item in request.items]
+        results = await inference_executor.run(
+            sensor_service.verify_batch, items, request.top_k, request.threshold, request.first_match
+        )
+        if history is not None:
+            for (_, text), item in zip(items, results):
+                if "result" in item:
+                    result = item["result"]
+                    matches_count = len(result["matches"]) if "matches" in result else 1
+                    history.record(
+                        text.strip(), item["name_id"], result["confidence_score"], request.threshold, matches_count
+                    )
+        return BatchVerifyResponse(results=results)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error verifying text sensors: {str(e)}")
+
+@app.post("/search", response_model=SearchResponse)
+async def search_text_sensors(request: SearchRequest):
+    """Return the top-k matching paragraphs across all text sensors."""
+    try:
+        await ensure_service_available()
+        service, batcher = sensor_service, query_batcher
+        text = validate_text_content(request.text, max_length=5000, field_name="input text")
+        query_embedding = service.lookup_query_embedding(text)
+        if query_embedding is None:
+            query_embedding = await batcher.encode(text)
+        result = await inference_executor.run(service.search, query_embedding, request.top_k)
+        return SearchResponse(**result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching text sensors: {str(e)}")
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names the current ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = etag[2:] if etag.startswith("W/") else etag
+    return any(
+        (tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip()) == current
+        for tag in if_none_match.split(",")
+    )
+
+@app.get("/text-sensors", response_model=SensorListResponse, response_model_exclude_none=True)
+async def get_text_sensors(
+    request: Request,
+    response: Response,
+    mode: str = Query("full", pattern="^(full|summary|names)$"),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None
+):
+    """Return sensors (full text, summaries or names only), optionally paginated, with an ETag for conditional polling."""
+    try:
+        await ensure_service_available()
+        service = sensor_service
+        # Taken before reading the sensors: a change in between makes the next poll fetch again
+        etag = service.listing_etag
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        result = service.list_sensors(mode, limit, cursor)
+        response.headers.update(headers)
         return SensorListResponse(**result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving text sensors: {str(e)}")
 
+@app.get("/similarity-checks", response_model=SimilarityHistoryResponse)
+async def get_similarity_checks(limit: int = Query(50, ge=1, le=1000), name_id: Optional[str] = None):
+    """Return the most recent similarity checks, newest first."""
+    if history is None:
+        raise HTTPException(status_code=404, detail="Similarity check history is disabled (HISTORY_DB is empty)")
+    try:
+        checks = await asyncio.get_running_loop().run_in_executor(None, history.recent, limit, name_id)
+        return SimilarityHistoryResponse(checks=checks, count=len(checks))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving similarity check history: {str(e)}")
+
 @app.delete("/text-sensor/{name_id}", response_model=DeleteSensorResponse)
 async def delete_text_sensor(name_id: str):
     """Remove text sensor and return success confirmation."""
     try:
-        ensure_service_available()
-        result = sensor_service.delete_sensor(name_id)
+        await ensure_service_available()
+        # Off the event loop: deleting takes the store lock and may journal and compact the snapshot
+        result = await inference_executor.run(sensor_service.delete_sensor, name_id)
         return DeleteSensorResponse(**result)
     except HTTPException:
         raise
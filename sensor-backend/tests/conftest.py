@@ -0,0 +1,72 @@
+"""
+Shared fixtures for the semantic sensor API tests.
+Every test runs against the deterministic stub model, without a snapshot or history unless it opens one.
+"""
+
+import os
+import time
+
+import pytest
+
+# Configuration is read on import, so it is fixed before any app module loads
+os.environ["SNAPSHOT_DIR"] = ""
+os.environ["HISTORY_DB"] = ""
+os.environ["NAMESPACE_MEMORY_MB"] = "0"
+os.environ["NAMESPACE_BUDGETS"] = ""
+os.environ["ENCODER_PROCESSES"] = "0"
+os.environ["CHUNK_MAX_TOKENS"] = "0"
+os.environ["LEXICAL_FAST_PATH"] = "true"
+os.environ["STORAGE_PRECISION"] = "float32"
+
+from benchmarks.stub_model import StubSentenceTransformer, install  # noqa: E402
+
+install(dim=32)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.services import SensorService  # noqa: E402
+
+
+class CountingModel(StubSentenceTransformer):
+    """Stub model that counts the texts it encodes."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.encoded = 0
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        self.encoded += 1 if isinstance(sentences, str) else len(sentences)
+        return super().encode(sentences, batch_size=batch_size, **kwargs)
+
+
+@pytest.fixture
+def model():
+    return CountingModel()
+
+
+@pytest.fixture
+def make_service(model):
+    """Build a SensorService over empty sensor dictionaries; keyword arguments go to SensorService."""
+    def build(snapshot=None, **kwargs):
+        if snapshot is not None:
+            kwargs["embedding_store"] = snapshot.store
+        return SensorService(kwargs.pop("model", model), {}, {}, snapshot=snapshot, **kwargs)
+    return build
+
+
+@pytest.fixture
+def client():
+    """TestClient of the app, once the model is loaded and warmed up."""
+    import main
+
+    # The app keeps its sensors in module globals; every test starts without any
+    main.text_store, main.sensor_data_list = {}, {}
+    main.sensor_service = None
+    main.ready = False
+    with TestClient(main.app) as test_client:
+        deadline = time.time() + 30
+        while not main.ready:
+            assert main.model_error is None, main.model_error
+            assert time.time() < deadline, "model did not load"
+            time.sleep(0.01)
+        yield test_client
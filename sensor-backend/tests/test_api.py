@@ -0,0 +1,70 @@
+def create(client, name_id, text):
+    response = client.post(f"/create-text-sensor/{name_id}", json={"text": text})
+    assert response.status_code == 200, response.text
+
+
+def test_listing_is_not_modified_until_a_sensor_changes(client):
+    create(client, "address", "Main street 1")
+    first = client.get("/text-sensors")
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+
+    unchanged = client.get("/text-sensors", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.headers["etag"] == etag
+    assert unchanged.content == b""
+    # Weak comparison, and any of several tags
+    assert client.get("/text-sensors", headers={"If-None-Match": f'"other", {etag[2:]}'}).status_code == 304
+
+    create(client, "phone", "+1 555 0100")
+    changed = client.get("/text-sensors", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["count"] == 2
+
+
+def test_etag_depends_on_content_only(client):
+    create(client, "address", "Main street 1")
+    etag = client.get("/text-sensors").headers["etag"]
+
+    assert client.put("/text-sensor/address", json={"text": "Main street 2"}).status_code == 200
+    assert client.get("/text-sensors").headers["etag"] != etag
+    assert client.put("/text-sensor/address", json={"text": "Main street 1"}).status_code == 200
+    assert client.get("/text-sensors").headers["etag"] == etag
+
+
+def test_cursor_pages_through_every_sensor_in_name_order(client):
+    names = [f"sensor-{i:02d}" for i in range(7)]
+    for name_id in reversed(names):
+        create(client, name_id, f"text of {name_id}")
+
+    seen, cursor = [], None
+    while True:
+        params = {"mode": "names", "limit": 3}
+        if cursor is not None:
+            params["cursor"] = cursor
+        page = client.get("/text-sensors", params=params).json()
+        assert page["total"] == 7
+        seen.extend(page["names"])
+        cursor = page.get("next_cursor")
+        if cursor is None:
+            break
+    assert seen == names
+
+
+def test_cursor_survives_deletion_of_the_last_seen_sensor(client):
+    for name_id in ["a", "b", "c", "d"]:
+        create(client, name_id, f"text {name_id}")
+    page = client.get("/text-sensors", params={"mode": "summary", "limit": 2}).json()
+    assert [summary["name_id"] for summary in page["summaries"]] == ["a", "b"]
+
+    assert client.delete("/text-sensor/b").status_code == 200
+    rest = client.get("/text-sensors", params={"limit": 2, "cursor": page["next_cursor"]}).json()
+    assert rest["sensors"] == {"c": "text c", "d": "text d"}
+    assert "next_cursor" not in rest
+
+
+def test_invalid_cursor_is_rejected(client):
+    create(client, "address", "Main street 1")
+    response = client.get("/text-sensors", params={"cursor": "%%%"})
+    assert response.status_code == 400
@@ -0,0 +1,43 @@
+import asyncio
+import threading
+
+import numpy as np
+
+from app.batching import MicroBatcher
+from app.inference import InferenceExecutor
+
+
+def encode_lengths(texts):
+    return np.array([[len(text)] for text in texts], dtype=np.float32)
+
+
+def test_concurrent_texts_are_encoded_together():
+    async def run():
+        batcher = MicroBatcher(encode_lengths, InferenceExecutor(), max_batch_size=8, max_wait_ms=50)
+        results = await asyncio.gather(*[batcher.encode("x" * i) for i in range(1, 6)])
+        return batcher, [float(row[0]) for row in results]
+
+    batcher, lengths = asyncio.run(run())
+    assert lengths == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert batcher.stats()["batches"] == 1
+    assert batcher.stats()["largest_batch"] == 5
+
+
+def test_closed_batcher_finishes_queued_texts_and_stops():
+    async def run():
+        batcher = MicroBatcher(encode_lengths, InferenceExecutor(), max_batch_size=4, max_wait_ms=20)
+        waiting = [asyncio.ensure_future(batcher.encode("x" * i)) for i in range(1, 7)]
+        await asyncio.sleep(0)
+        # Replaced services close their batcher from an inference thread
+        closer = threading.Thread(target=batcher.close)
+        closer.start()
+        closer.join()
+        lengths = [float(row[0]) for row in await asyncio.gather(*waiting)]
+        await asyncio.sleep(0.05)
+        late = float((await batcher.encode("late"))[0])
+        return batcher, lengths, late
+
+    batcher, lengths, late = asyncio.run(run())
+    assert lengths == [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+    assert batcher._worker.done()
+    assert late == 4.0
@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from app.inference import InferenceExecutor
+from app.ingest import ingest_ndjson, ndjson_lines, parse_sensor_line
+
+
+async def stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def split(chunks, max_line_bytes=1024):
+    async def collect():
+        return [line async for line in ndjson_lines(stream(*chunks), max_line_bytes)]
+    return asyncio.run(collect())
+
+
+def test_lines_are_split_across_chunks():
+    assert split([b'{"a"', b': 1}\n{"b": 2}\n', b'\n  \n{"c"', b": 3}"]) == [
+        (1, b'{"a": 1}'),
+        (2, b'{"b": 2}'),
+        (5, b'{"c": 3}'),
+    ]
+
+
+def test_oversized_lines_are_reported_and_skipped():
+    lines = split([b"x" * 6, b"x" * 6, b"xx\nshort\n", b"y" * 20], max_line_bytes=10)
+    assert lines == [(1, None), (2, b"short"), (3, None)]
+
+
+def test_line_at_the_limit_is_accepted():
+    assert split([b"x" * 10 + b"\n"], max_line_bytes=10) == [(1, b"x" * 10)]
+
+
+@pytest.mark.parametrize("line", [b"not json", b"[1, 2]", b'{"name_id": "a"}', b'{"name_id": 1, "text": "t"}'])
+def test_invalid_lines_are_rejected(line):
+    with pytest.raises(HTTPException) as error:
+        parse_sensor_line(line)
+    assert error.value.status_code == 400
+
+
+def test_ingest_reports_every_line(make_service):
+    service = make_service()
+    body = (
+        b'{"name_id": "a", "text": "alpha"}\n'
+        + b'{"name_id": "b", "text": "' + b"b" * 200 + b'"}\n'
+        + b"oops\n"
+        + b'{"name_id": "c", "text": "gamma"}\n'
+    )
+
+    async def run():
+        chunks = stream(body[:20], body[20:90], body[90:])
+        return [json.loads(line) async for line in ingest_ndjson(
+            chunks, lambda: service, InferenceExecutor(), batch_size=1, max_line_bytes=100
+        )]
+
+    results = asyncio.run(run())
+    # Rejected lines are reported right away, created ones once their batch is encoded
+    assert sorted((r["line"], r["status"], r.get("status_code")) for r in results[:-1]) == [
+        (1, "created", None),
+        (2, "failed", 413),
+        (3, "failed", 400),
+        (4, "created", None),
+    ]
+    assert results[-1] == {"done": True, "created": 2, "skipped": 0, "failed": 2}
+    assert sorted(service.text_store) == ["a", "c"]
+
+
+def test_stream_endpoint_rejects_oversized_lines(client, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "INGEST_MAX_LINE_BYTES", 64)
+    body = '{"name_id": "long", "text": "%s"}\n{"name_id": "short", "text": "fine"}\n' % ("x" * 100)
+    response = client.post("/bulk-create-sensors/stream", content=body)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert results[0]["status_code"] == 413
+    assert "too long" in results[0]["error"]
+    assert results[1]["name_id"] == "short" and results[1]["status"] == "created"
+    assert results[-1]["done"] is True
@@ -0,0 +1,62 @@
+import pytest
+
+from app.lexical import LexicalMatcher, normalize_text
+
+
+def test_normalization_ignores_case_unicode_form_and_whitespace():
+    assert normalize_text("  Main\tSTREET \n 1 ") == "main street 1"
+    assert normalize_text("Ｍａｉｎ Straße") == normalize_text("main STRASSE")
+
+
+def test_exact_repeat_is_answered_without_the_model(make_service, model):
+    service = make_service(lexical=LexicalMatcher())
+    service.create_sensor("address", "Main street 1\n\nSecond floor")
+    encoded = model.encoded
+
+    result = service.calculate_similarity("  second   FLOOR ", "address")
+    assert result == {"confidence_score": 1.0, "matched_paragraph": "Second floor", "match_path": "exact"}
+    assert model.encoded == encoded
+    assert service.lexical.stats() == {"exact_hits": 1, "misses": 0}
+
+
+def test_other_inputs_take_the_embedding_path(make_service, model):
+    service = make_service(lexical=LexicalMatcher())
+    service.create_sensor("address", "Main street 1\n\nSecond floor")
+    encoded = model.encoded
+
+    result = service.calculate_similarity("Second floor, left door", "address")
+    assert result["match_path"] == "embedding"
+    assert model.encoded == encoded + 1
+    assert service.lexical.stats()["misses"] == 1
+
+
+def test_exact_path_reports_threshold_fields(make_service):
+    service = make_service(lexical=LexicalMatcher())
+    service.create_sensor("address", "Main street 1")
+
+    result = service.lexical_match("main street 1", "address", threshold=0.9)
+    assert result["matched"] is True
+    assert result["matches"] == [{"paragraph": "Main street 1", "score": 1.0}]
+    # Ranking several paragraphs needs their scores
+    assert service.lexical_match("main street 1", "address", top_k=2) is None
+
+
+def test_exact_path_can_be_disabled(make_service, model):
+    service = make_service()
+    # LEXICAL_FAST_PATH=false leaves the service without a matcher
+    service.lexical = None
+    service.create_sensor("address", "Main street 1")
+
+    result = service.calculate_similarity("Main street 1", "address")
+    assert result["match_path"] == "embedding"
+    assert result["confidence_score"] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_replaced_sensor_gets_a_new_lexicon(make_service):
+    service = make_service(lexical=LexicalMatcher())
+    service.create_sensor("address", "Main street 1")
+    assert service.calculate_similarity("Main street 1", "address")["match_path"] == "exact"
+
+    service.update_sensor("address", "Harbour road 7")
+    assert service.calculate_similarity("Harbour road 7", "address")["match_path"] == "exact"
+    assert service.calculate_similarity("Main street 1", "address")["match_path"] == "embedding"
@@ -0,0 +1,127 @@
+import asyncio
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from app.inference import InferenceExecutor
+from app.namespaces import NamespaceBudgets, namespace_of
+from app.reload import ModelReloader
+
+# Room for two one-paragraph sensors of the 32-dimensional stub model (128 bytes each)
+BUDGET = 300
+
+
+@pytest.fixture
+def budgets(tmp_path):
+    namespaces = NamespaceBudgets(str(tmp_path), budgets={"acme": BUDGET})
+    yield namespaces
+    namespaces.clear()
+
+
+@pytest.fixture
+def service(make_service, budgets):
+    # Without the exact path, every check reads the sensor's embeddings
+    service = make_service(namespaces=budgets)
+    service.lexical = None
+    return service
+
+
+def score(service, text, name_id):
+    return service.score_query(service.encode_queries([text])[0], name_id)
+
+
+def test_namespace_of():
+    assert namespace_of("acme:billing-address") == "acme"
+    assert namespace_of("billing-address") == "default"
+
+
+def test_least_recently_used_sensor_is_evicted(service, budgets):
+    for name_id in ["acme:a", "acme:b", "globex:a", "globex:b", "globex:c"]:
+        service.create_sensor(name_id, f"text of {name_id}")
+    assert budgets.evicted() == []
+
+    score(service, "text of acme:a", "acme:a")
+    service.create_sensor("acme:c", "text of acme:c")
+
+    assert budgets.evicted() == ["acme:b"]
+    assert not service.sensor_data_list["acme:b"].resident
+    # Unlimited namespaces keep everything; the evicted sensor's rows are freed
+    assert len(service.embedding_store) == 5
+    stats = budgets.stats()["namespaces"]
+    assert stats["acme"]["resident_bytes"] <= BUDGET
+    assert stats["acme"]["evictions"] == 1
+    assert stats["globex"]["evicted_sensors"] == 0
+
+
+def test_evicted_sensor_is_reloaded_on_use(service, budgets):
+    for name_id in ["acme:a", "acme:b", "acme:c"]:
+        service.create_sensor(name_id, f"text of {name_id}")
+    assert budgets.evicted() == ["acme:a"]
+    budgets._writer.submit(lambda: None).result()
+    assert os.path.exists(budgets.path("acme:a"))
+
+    result = score(service, "text of acme:a", "acme:a")
+    assert result["confidence_score"] == pytest.approx(1.0, abs=1e-5)
+    assert service.sensor_data_list["acme:a"].resident
+    assert not os.path.exists(budgets.path("acme:a"))
+    # Making it resident again evicted the next least recently used one
+    assert budgets.evicted() == ["acme:b"]
+    assert budgets.stats()["reloads"] == 1
+
+
+def test_replaced_or_deleted_evicted_sensors_lose_their_file(service, budgets):
+    for name_id in ["acme:a", "acme:b", "acme:c", "acme:d"]:
+        service.create_sensor(name_id, f"text of {name_id}")
+    budgets._writer.submit(lambda: None).result()
+
+    service.update_sensor("acme:a", "new text of acme:a")
+    service.delete_sensor("acme:b")
+    assert not os.path.exists(budgets.path("acme:a"))
+    assert not os.path.exists(budgets.path("acme:b"))
+    assert score(service, "new text of acme:a", "acme:a")["matched_paragraph"] == "new text of acme:a"
+    with pytest.raises(HTTPException) as error:
+        score(service, "text of acme:b", "acme:b")
+    assert error.value.status_code == 404
+
+
+def test_reload_rebuilds_evicted_sensors_and_retires_the_old_service(service, budgets, make_service, model):
+    for name_id in ["acme:a", "acme:b", "acme:c", "acme:d", "plain"]:
+        service.create_sensor(name_id, f"text of {name_id}")
+    assert sorted(budgets.evicted()) == ["acme:a", "acme:b"]
+
+    serving = [service]
+
+    def build_service(new_model):
+        return make_service(model=new_model, namespaces=serving[0].namespaces.renew())
+
+    async def reload():
+        reloader = ModelReloader(InferenceExecutor(), step_paragraphs=2, pause_ms=0)
+        assert reloader.start(
+            lambda: model,
+            build_service,
+            lambda: serving[0],
+            lambda new: serving.__setitem__(0, new),
+            lambda old, new: old.namespaces.clear(),
+        )
+        await reloader._task
+        return reloader
+
+    reloader = asyncio.run(reload())
+    assert reloader.state == "completed", reloader.error
+
+    new = serving[0]
+    assert new is not service and service.retired
+    new.lexical = None
+    assert new.text_store == service.text_store
+    for name_id in new.text_store:
+        result = score(new, f"text of {name_id}", name_id)
+        assert result["confidence_score"] == pytest.approx(1.0, abs=1e-5)
+    assert new.namespaces.stats()["namespaces"]["acme"]["resident_bytes"] <= BUDGET
+
+    # The old generation's files are gone; writes and reads of evicted sensors ask the client to retry
+    assert not os.path.exists(budgets.directory)
+    for call in (lambda: score(service, "text of acme:a", "acme:a"), lambda: service.create_sensor("x", "text")):
+        with pytest.raises(HTTPException) as error:
+            call()
+        assert error.value.status_code == 503
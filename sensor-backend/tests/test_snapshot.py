@@ -0,0 +1,146 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from app.snapshot import JOURNAL_FILE, Snapshot
+
+
+@pytest.fixture
+def open_snapshot(tmp_path):
+    """Open Snapshots of one temporary directory, closing them after the test."""
+    opened = []
+
+    def open_(**kwargs):
+        snapshot = Snapshot(str(tmp_path), "stub", **kwargs)
+        opened.append(snapshot)
+        return snapshot
+
+    yield open_
+    for snapshot in opened:
+        try:
+            snapshot.close()
+        except OSError:
+            pass
+
+
+def journal_ops(snapshot):
+    with open(os.path.join(snapshot.directory, JOURNAL_FILE), encoding="utf-8") as f:
+        return [json.loads(line)["op"] for line in f]
+
+
+def compact(service):
+    with service.embedding_store.lock, service.snapshot.exclusive(service):
+        service.snapshot.compact(service)
+
+
+def test_restore_reads_embeddings_without_the_model(open_snapshot, make_service, model):
+    service = make_service(snapshot=open_snapshot())
+    service.create_sensor("address", "Main street 1\n\nSecond floor")
+    service.create_sensor("phone", "+1 555 0100")
+    service.create_sensor("gone", "Removed before restart")
+    service.delete_sensor("gone")
+    saved = service.embedding_store.vectors(service.sensor_data_list["address"].rows).copy()
+    service.snapshot.close()
+
+    encoded = model.encoded
+    restored = make_service(snapshot=open_snapshot())
+    assert restored.snapshot.restore(restored) == 2
+
+    assert model.encoded == encoded
+    assert restored.text_store == {"address": "Main street 1\n\nSecond floor", "phone": "+1 555 0100"}
+    np.testing.assert_array_equal(restored.embedding_store.vectors(restored.sensor_data_list["address"].rows), saved)
+    query = restored.encode_queries(["Second floor"])[0]
+    result = restored.score_query(query, "address")
+    assert result["matched_paragraph"] == "Second floor"
+    assert result["confidence_score"] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_restore_compacts_the_journal_and_reclaims_rows(open_snapshot, make_service):
+    service = make_service(snapshot=open_snapshot())
+    service.create_sensor("a", "alpha")
+    service.create_sensor("b", "beta")
+    for i in range(3):
+        service.update_sensor("b", f"beta {i}")
+    freed = int(service.sensor_data_list["a"].rows[0])
+    service.delete_sensor("a")
+    service.snapshot.close()
+
+    restored = make_service(snapshot=open_snapshot())
+    restored.snapshot.restore(restored)
+    assert journal_ops(restored.snapshot) == ["put", "checkpoint"]
+    # Rows nobody references after the restore are handed out again
+    assert freed in restored.embedding_store.free_rows()
+    restored.create_sensor("c", "gamma")
+    assert int(restored.sensor_data_list["c"].rows[0]) == freed
+    assert restored.embedding_store.size == service.embedding_store.size
+
+
+def test_compaction_keeps_only_the_live_state(open_snapshot, make_service):
+    service = make_service(snapshot=open_snapshot(compact_min_records=4))
+    service.create_sensor("a", "first")
+    service.create_sensor("b", "second")
+    service.update_sensor("a", "first, changed")
+    service.delete_sensor("b")
+    # The fourth record triggered a compaction
+    assert journal_ops(service.snapshot) == ["put", "checkpoint"]
+
+    service.create_sensor("c", "third")
+    service.snapshot.close()
+    restored = make_service(snapshot=open_snapshot())
+    restored.snapshot.restore(restored)
+    assert restored.text_store == {"a": "first, changed", "c": "third"}
+
+
+def test_shared_snapshot_reuses_rows_after_two_checkpoints(open_snapshot, make_service):
+    service = make_service(snapshot=open_snapshot(shared=True))
+    service.create_sensor("a", "alpha")
+    service.create_sensor("b", "beta")
+    freed = int(service.sensor_data_list["a"].rows[0])
+    service.delete_sensor("a")
+
+    # Another worker may still read the row until it replays the deletion
+    compact(service)
+    service.create_sensor("c", "gamma")
+    assert int(service.sensor_data_list["c"].rows[0]) != freed
+
+    compact(service)
+    service.create_sensor("d", "delta")
+    assert int(service.sensor_data_list["d"].rows[0]) == freed
+    assert service.embedding_store.size == 3
+
+
+def test_shared_workers_see_each_others_changes(open_snapshot, make_service):
+    first = make_service(snapshot=open_snapshot(shared=True))
+    second = make_service(snapshot=open_snapshot(shared=True))
+    first.snapshot.restore(first)
+    second.snapshot.restore(second)
+
+    first.create_sensor("address", "Main street 1")
+    second.sync()
+    assert second.text_store == {"address": "Main street 1"}
+    np.testing.assert_array_equal(
+        second.embedding_store.vectors(second.sensor_data_list["address"].rows),
+        first.embedding_store.vectors(first.sensor_data_list["address"].rows),
+    )
+
+    second.delete_sensor("address")
+    first.sync()
+    assert first.text_store == {}
+
+
+def test_snapshot_of_another_model_is_re_embedded(open_snapshot, make_service, model, tmp_path):
+    service = make_service(snapshot=open_snapshot())
+    service.create_sensor("address", "Main street 1")
+    service.snapshot.close()
+
+    other = Snapshot(str(tmp_path), "another-model")
+    try:
+        assert not other.model_matches
+        encoded = model.encoded
+        restored = make_service(snapshot=other)
+        assert other.restore(restored) == 1
+        assert model.encoded == encoded + 1
+    finally:
+        other.close()
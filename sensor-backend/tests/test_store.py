@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+
+from app.store import EmbeddingStore, normalize_rows, paragraph_key
+
+
+def random_vectors(count, dim=32, seed=0):
+    return normalize_rows(np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32))
+
+
+def acquire_texts(store, texts, vectors=None):
+    keys = [paragraph_key(text) for text in texts]
+    if vectors is None:
+        vectors = random_vectors(len(texts), seed=len(store))
+    return store.acquire(keys, dict(zip(keys, vectors)))
+
+
+def test_equal_paragraphs_share_one_row():
+    store = EmbeddingStore(initial_capacity=4)
+    first = acquire_texts(store, ["alpha", "beta"])
+    second = acquire_texts(store, ["beta", "gamma", "beta"])
+
+    assert second[0] == first[1] == second[2]
+    assert len(store) == 3
+    assert store.stats()["references"] == 5
+
+
+def test_release_frees_a_row_with_its_last_reference():
+    store = EmbeddingStore(initial_capacity=4)
+    first = acquire_texts(store, ["alpha", "beta"])
+    second = acquire_texts(store, ["beta"])
+
+    store.release(first)
+    assert len(store) == 1
+    assert store.free_rows() == [int(first[0])]
+
+    store.release(second)
+    assert len(store) == 0
+    assert store.free_rows() == [0, 1]
+
+
+def test_freed_rows_are_reused():
+    store = EmbeddingStore(initial_capacity=4)
+    rows = acquire_texts(store, ["alpha", "beta", "gamma"])
+    store.release(rows[:2])
+
+    reused = acquire_texts(store, ["delta", "epsilon"])
+    assert sorted(reused.tolist()) == sorted(rows[:2].tolist())
+    assert store.size == 3
+    assert store.key_rows()[paragraph_key("delta")] in rows[:2].tolist()
+
+
+def test_freed_rows_wait_for_allow_reuse_without_reuse_rows():
+    store = EmbeddingStore(initial_capacity=4, reuse_rows=False)
+    rows = acquire_texts(store, ["alpha", "beta"])
+    store.release(rows[:1])
+
+    appended = acquire_texts(store, ["gamma"])
+    assert appended.tolist() == [2]
+
+    store.allow_reuse(store.free_rows())
+    reused = acquire_texts(store, ["delta"])
+    assert reused.tolist() == [int(rows[0])]
+
+
+def test_retained_rows_are_not_reused():
+    store = EmbeddingStore(initial_capacity=4)
+    rows = acquire_texts(store, ["alpha"])
+    vector = store.vectors(rows)[0].copy()
+
+    store.retain(rows)
+    store.release(rows)
+    acquire_texts(store, ["beta"])
+    np.testing.assert_array_equal(store.vectors(rows)[0], vector)
+
+    store.release(rows)
+    assert store.free_rows() == [int(rows[0])]
+
+
+def test_precision_requires_a_known_name():
+    with pytest.raises(ValueError):
+        EmbeddingStore(precision="bfloat16")
+
+
+@pytest.mark.parametrize("precision, tolerance", [("float32", 1e-6), ("float16", 1e-2), ("int8", 1e-6)])
+def test_rerank_finds_the_stored_query(precision, tolerance):
+    vectors = random_vectors(200)
+    store = EmbeddingStore(initial_capacity=8, precision=precision, rerank_candidates=8)
+    rows = acquire_texts(store, [f"paragraph {i}" for i in range(len(vectors))], vectors)
+
+    query = vectors[137]
+    scores = store.scores(query)
+    candidates = np.argsort(-scores)[:store.candidates(3)]
+    order, best = store.rerank(query, candidates, scores[candidates], 3)
+
+    assert candidates[order[0]] == rows[137]
+    assert best[0] == pytest.approx(1.0, abs=tolerance)
+    assert list(best) == sorted(best, reverse=True)
+    # Re-ranked scores are exact for int8, close to float32 for float16
+    np.testing.assert_allclose(best, vectors[candidates[order]] @ query, atol=tolerance)
+
+
+def test_int8_scores_are_approximate_and_widen_candidates():
+    vectors = random_vectors(50)
+    store = EmbeddingStore(initial_capacity=8, precision="int8", rerank_candidates=16)
+    acquire_texts(store, [f"paragraph {i}" for i in range(len(vectors))], vectors)
+
+    assert store.candidates(1) == 16
+    np.testing.assert_allclose(store.scores(vectors[0]), vectors @ vectors[0], atol=0.05)
+    stats = store.stats()
+    assert stats["embedding_bytes"] < stats["float32_bytes"]
+
+
+def test_scoring_keeps_the_sensor_rows_referenced(make_service):
+    service = make_service()
+    service.create_sensor("address", "Main street 1\n\nSecond floor")
+    references = service.embedding_store.stats()["references"]
+
+    query = service.encode_queries(["Main street 1"])[0]
+    with service._scored_sensor("address") as sensor_data:
+        assert service.embedding_store.stats()["references"] == references + len(sensor_data)
+        service.delete_sensor("address")
+        # Deleted meanwhile: the rows still hold this sensor's embeddings until scoring ends
+        assert service.embedding_store.free_rows() == []
+        np.testing.assert_allclose(service.embedding_store.vectors(sensor_data.rows)[0] @ query, 1.0, atol=1e-5)
+    assert len(service.embedding_store.free_rows()) == 2
+    assert service.embedding_store.stats()["references"] == 0